@@ -0,0 +1,29 @@
+"""add users.ldap_dn
+
+Revision ID: 3f1b2c4d5e6a
+Revises: 7c9850f22026
+Create Date: 2026-10-19 02:10:00.000000
+
+"""
+from typing import Union, Sequence
+
+import sqlmodel
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1b2c4d5e6a'
+down_revision: Union[str, None] = '7c9850f22026'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('ldap_dn', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=True))
+    op.create_index(op.f('ix_users_ldap_dn'), 'users', ['ldap_dn'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_ldap_dn'), table_name='users')
+    op.drop_column('users', 'ldap_dn')
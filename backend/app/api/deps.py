@@ -2,7 +2,6 @@ import uuid
 from collections.abc import Generator
 from typing import Annotated
 
-import jwt
 from celery import Celery
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -14,8 +13,8 @@ from app.core import security
 from app.core.cache import Cache, cache
 from app.core.config import settings
 from app.core.database import engine
+from app.core.revocation import get_token_generation
 from app.core.storage import Storage, storage
-from app.model.base import TokenPayload
 from app.model.user import User
 from app.worker.celery import celery_app
 
@@ -50,10 +49,7 @@ CeleryDep = Annotated[Celery, Depends(get_celery_app)]
 
 def get_current_user(session: SessionDep, token: TokenDep, cache: CacheDep) -> User:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = security.decode_token(token)
         if token_data.type != "access":
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,7 +57,7 @@ def get_current_user(session: SessionDep, token: TokenDep, cache: CacheDep) -> U
             )
         user_id = uuid.UUID(token_data.sub)
 
-        if cache.redis.get(f"blacklist:user:{user_id}"):
+        if token_data.gen < get_token_generation(cache, user_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="User forced logout"
             )
@@ -1,3 +1,4 @@
+import secrets
 import uuid
 
 from fastapi import APIRouter, HTTPException
@@ -5,6 +6,7 @@ from sqlalchemy.orm import joinedload
 from sqlmodel import func, select
 
 from app.api.deps import CurrentUser, SessionDep
+from app.core.credentials import app_credentials
 from app.model import (
     Application,
     ApplicationCreate,
@@ -116,10 +118,39 @@ def update_application(
     session.add(app)
     session.commit()
     session.refresh(app)
+    app_credentials.invalidate(app.app_id)
 
     return app
 
 
+@router.post(
+    "/{app_id}/rotate-key",
+    response_model=ApplicationPrivate,
+    summary="Rotate an application key",
+)
+def rotate_application_key(
+    *, session: SessionDep, current_user: CurrentUser, app_id: uuid.UUID
+) -> ApplicationPrivate:
+    """
+    Replace the key of an application; the previous key stops working.
+    """
+    # Fetch application
+    app = session.get(Application, app_id)
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if not current_user.is_superuser and (app.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    # Save to database
+    app.app_key = secrets.token_urlsafe(32)
+    session.add(app)
+    session.commit()
+    session.refresh(app)
+    app_credentials.invalidate(app.app_id)
+
+    return ApplicationPrivate.model_validate(app)
+
+
 @router.delete("/{app_id}", response_model=Message, summary="Delete an application")
 def delete_application(
     *, session: SessionDep, current_user: CurrentUser, app_id: uuid.UUID
@@ -135,7 +166,9 @@ def delete_application(
         raise HTTPException(status_code=400, detail="Not enough permissions")
 
     # Delete from database
+    public_app_id = app.app_id
     session.delete(app)
     session.commit()
+    app_credentials.invalidate(public_app_id)
 
     return Message(message="Application deleted successfully")
@@ -1,10 +1,10 @@
 import asyncio
 import json
-import time
 from typing import Any
 
 from celery.result import AsyncResult
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import CeleryDep, CurrentUser
 from app.core.cache import cache
@@ -12,7 +12,7 @@ from app.core.cache import cache
 router = APIRouter(tags=["Celery"], prefix="/celery")
 
 
-def get_inspect_data(celery_app, method_name: str) -> dict | None:
+async def get_inspect_data(celery_app, method_name: str) -> dict | None:
     """
     Get Celery inspect data with caching and locking to prevent dogpile effect
     """
@@ -21,7 +21,7 @@ def get_inspect_data(celery_app, method_name: str) -> dict | None:
 
     # 1. Try to get from cache
     try:
-        cached_data = cache.redis.get(cache_key)
+        cached_data = await cache.async_redis.get(cache_key)
         if cached_data:
             return json.loads(cached_data)
     except Exception:
@@ -31,21 +31,21 @@ def get_inspect_data(celery_app, method_name: str) -> dict | None:
     acquired_lock = False
     try:
         # Try to acquire lock for 5 seconds
-        acquired_lock = cache.redis.set(lock_key, "1", ex=5, nx=True)
+        acquired_lock = await cache.async_redis.set(lock_key, "1", ex=5, nx=True)
     except Exception:
         pass
 
     if acquired_lock:
         try:
-            # We have the lock, perform the inspection
+            # We have the lock, perform the inspection (a blocking broadcast)
             inspect = celery_app.control.inspect(timeout=1.0)
             method = getattr(inspect, method_name)
-            data = method()
+            data = await run_in_threadpool(method)
 
             # Cache the result
             if data is not None:
                 try:
-                    cache.redis.set(cache_key, json.dumps(data), ex=15)
+                    await cache.async_redis.set(cache_key, json.dumps(data), ex=15)
                 except Exception:
                     pass
             return data
@@ -54,15 +54,15 @@ def get_inspect_data(celery_app, method_name: str) -> dict | None:
         finally:
             # Release lock
             try:
-                cache.redis.delete(lock_key)
+                await cache.async_redis.delete(lock_key)
             except Exception:
                 pass
     else:
         # Lock is held by someone else, wait for result
         for _ in range(20):  # Wait up to 2 seconds (20 * 0.1s)
-            time.sleep(0.1)
+            await asyncio.sleep(0.1)
             try:
-                cached_data = cache.redis.get(cache_key)
+                cached_data = await cache.async_redis.get(cache_key)
                 if cached_data:
                     return json.loads(cached_data)
             except Exception:
@@ -82,19 +82,11 @@ async def get_workers(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
 
     try:
         # Run inspections in parallel
-        loop = asyncio.get_running_loop()
-
-        active_future = loop.run_in_executor(
-            None, get_inspect_data, celery_app, "active"
-        )
-        registered_future = loop.run_in_executor(
-            None, get_inspect_data, celery_app, "registered"
+        active_workers, registered_tasks, stats = await asyncio.gather(
+            get_inspect_data(celery_app, "active"),
+            get_inspect_data(celery_app, "registered"),
+            get_inspect_data(celery_app, "stats"),
         )
-        stats_future = loop.run_in_executor(None, get_inspect_data, celery_app, "stats")
-
-        active_workers = await active_future
-        registered_tasks = await registered_future
-        stats = await stats_future
 
         workers_info = []
         if stats:
@@ -120,7 +112,7 @@ async def get_workers(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
 
 
 @router.get("/tasks/active", summary="Get active Celery tasks")
-def get_active_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
+async def get_active_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
     """
     获取所有活跃的任务
     """
@@ -128,7 +120,7 @@ def get_active_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
     try:
-        active_tasks = get_inspect_data(celery_app, "active")
+        active_tasks = await get_inspect_data(celery_app, "active")
 
         tasks_list = []
         if active_tasks:
@@ -153,7 +145,7 @@ def get_active_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
 
 
 @router.get("/tasks/scheduled", summary="Get scheduled Celery tasks")
-def get_scheduled_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
+async def get_scheduled_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
     """
     获取所有计划任务
     """
@@ -161,7 +153,7 @@ def get_scheduled_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
     try:
-        scheduled_tasks = get_inspect_data(celery_app, "scheduled")
+        scheduled_tasks = await get_inspect_data(celery_app, "scheduled")
 
         tasks_list = []
         if scheduled_tasks:
@@ -186,7 +178,7 @@ def get_scheduled_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any
 
 
 @router.get("/tasks/reserved", summary="Get reserved Celery tasks")
-def get_reserved_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
+async def get_reserved_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
     """
     获取所有保留任务
     """
@@ -194,7 +186,7 @@ def get_reserved_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
     try:
-        reserved_tasks = get_inspect_data(celery_app, "reserved")
+        reserved_tasks = await get_inspect_data(celery_app, "reserved")
 
         tasks_list = []
         if reserved_tasks:
@@ -275,23 +267,15 @@ async def get_celery_stats(current_user: CurrentUser, celery_app: CeleryDep) ->
 
     try:
         # Run inspections in parallel
-        loop = asyncio.get_running_loop()
-
-        active_future = loop.run_in_executor(
-            None, get_inspect_data, celery_app, "active"
+        active, scheduled, reserved, stats = (
+            data or {}
+            for data in await asyncio.gather(
+                get_inspect_data(celery_app, "active"),
+                get_inspect_data(celery_app, "scheduled"),
+                get_inspect_data(celery_app, "reserved"),
+                get_inspect_data(celery_app, "stats"),
+            )
         )
-        scheduled_future = loop.run_in_executor(
-            None, get_inspect_data, celery_app, "scheduled"
-        )
-        reserved_future = loop.run_in_executor(
-            None, get_inspect_data, celery_app, "reserved"
-        )
-        stats_future = loop.run_in_executor(None, get_inspect_data, celery_app, "stats")
-
-        active = await active_future or {}
-        scheduled = await scheduled_future or {}
-        reserved = await reserved_future or {}
-        stats = await stats_future or {}
 
         active_count = sum(len(tasks) for tasks in active.values())
         scheduled_count = sum(len(tasks) for tasks in scheduled.values())
@@ -319,7 +303,7 @@ async def get_celery_stats(current_user: CurrentUser, celery_app: CeleryDep) ->
 
 
 @router.get("/registered-tasks", summary="Get registered Celery tasks")
-def get_registered_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
+async def get_registered_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> Any:
     """
     获取所有已注册的任务类型
     """
@@ -327,7 +311,7 @@ def get_registered_tasks(current_user: CurrentUser, celery_app: CeleryDep) -> An
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
     try:
-        registered = get_inspect_data(celery_app, "registered")
+        registered = await get_inspect_data(celery_app, "registered")
 
         all_tasks = set()
         if registered:
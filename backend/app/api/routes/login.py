@@ -1,25 +1,33 @@
-import secrets
+import logging
 from datetime import datetime, timedelta, timezone
 from typing import Annotated, Any
 
-import httpx
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
 from app import crud
 from app.api.deps import CacheDep, CurrentUser, SessionDep, get_current_active_superuser
 from app.core import security
 from app.core.config import settings
+from app.core.oidc import OidcError, oidc_client
+from app.core.revocation import aget_token_generation, get_token_generation
+from app.core.runtime_settings import runtime_settings
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     get_password_hash,
 )
+from app.core.throttle import (
+    get_login_retry_after,
+    record_login_failure,
+    reset_login_failures,
+)
 from app.model.base import Message, NewPassword, Token, TokenPayload
-from app.model.user import User, UserCreate, UserPublic, UserRegister
+from app.model.user import User, UserPublic, UserRegister
 from app.utils import (
     generate_reset_password_email,
     generate_reset_password_token,
@@ -27,6 +35,8 @@ from app.utils import (
     verify_password_reset_token,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["Login"])
 
 
@@ -35,10 +45,11 @@ def get_login_config():
     """
     Get login configuration
     """
+    config = runtime_settings.get()
     return {
-        "oidc_enabled": settings.OIDC_ENABLED,
-        "oidc_name": settings.OIDC_NAME,
-        "oidc_auto_login": settings.AUTO_LOGIN,
+        "oidc_enabled": config.OIDC_ENABLED,
+        "oidc_name": config.OIDC_NAME,
+        "oidc_auto_login": config.AUTO_LOGIN,
     }
 
 
@@ -46,25 +57,44 @@ def get_login_config():
     "/login/access-token", response_model=Token, summary="OAuth2 access token login"
 )
 def login_access_token(
+    request: Request,
     session: SessionDep,
+    cache: CacheDep,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
+    # Throttle before verifying the password, so locked out attempts are cheap
+    # The client address, taken from X-Forwarded-For when the request comes
+    # from a trusted proxy (FORWARDED_ALLOW_IPS, see scripts/start.sh)
+    ip = request.client.host if request.client else None
+    retry_after = get_login_retry_after(cache.redis, ip, form_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
     user = crud.authenticate(
         session=session, username=form_data.username, password=form_data.password
     )
     if not user:
+        record_login_failure(cache.redis, ip, form_data.username)
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    reset_login_failures(cache.redis, form_data.username)
+    generation = get_token_generation(cache, user.id)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     return Token(
-        access_token=create_access_token(user.id, expires_delta=access_token_expires),
+        access_token=create_access_token(
+            user.id, expires_delta=access_token_expires, generation=generation
+        ),
         refresh_token=create_refresh_token(
-            user.id, expires_delta=refresh_token_expires
+            user.id, expires_delta=refresh_token_expires, generation=generation
         ),
     )
 
@@ -72,7 +102,7 @@ def login_access_token(
 @router.post(
     "/login/refresh-token", response_model=Token, summary="Refresh access token"
 )
-def refresh_token(session: SessionDep, refresh_token: str) -> Token:
+def refresh_token(session: SessionDep, cache: CacheDep, refresh_token: str) -> Token:
     """
     Refresh access token
     """
@@ -92,6 +122,16 @@ def refresh_token(session: SessionDep, refresh_token: str) -> Token:
             status_code=403,
             detail="Invalid token type",
         )
+    if not token_data.sub:
+        raise HTTPException(
+            status_code=403,
+            detail="Could not validate credentials",
+        )
+
+    # Refresh tokens issued before a forced logout are revoked too
+    generation = get_token_generation(cache, token_data.sub)
+    if token_data.gen < generation:
+        raise HTTPException(status_code=400, detail="User forced logout")
 
     user = session.get(User, token_data.sub)
     if not user:
@@ -102,9 +142,11 @@ def refresh_token(session: SessionDep, refresh_token: str) -> Token:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     return Token(
-        access_token=create_access_token(user.id, expires_delta=access_token_expires),
+        access_token=create_access_token(
+            user.id, expires_delta=access_token_expires, generation=generation
+        ),
         refresh_token=create_refresh_token(
-            user.id, expires_delta=refresh_token_expires
+            user.id, expires_delta=refresh_token_expires, generation=generation
         ),
     )
 
@@ -229,98 +271,84 @@ def login_oidc(request: Request):  # noqa: ARG001
     """
     Redirect to OpenID Connect provider for login
     """
-    if not settings.OIDC_ENABLED:
+    config = runtime_settings.get()
+    if not config.OIDC_ENABLED:
         raise HTTPException(status_code=403, detail="OIDC is not enabled")
 
-    if not settings.oidc_configured:
+    if not config.oidc_configured:
         raise HTTPException(status_code=501, detail="OIDC is not configured")
 
     redirect_uri = f"{settings.FRONTEND_HOST}{settings.API_V1_STR}/login/oidc/callback"
 
     return RedirectResponse(
-        f"{settings.OIDC_AUTH_URL}?"
-        f"client_id={settings.OIDC_CLIENT_ID}&"
+        f"{config.OIDC_AUTH_URL}?"
+        f"client_id={config.OIDC_CLIENT_ID}&"
         f"response_type=code&"
-        f"scope={settings.OIDC_SCOPES}&"
+        f"scope={config.OIDC_SCOPES}&"
         f"redirect_uri={redirect_uri}"
     )
 
 
 @router.get("/login/oidc/callback", summary="OIDC login callback")
-async def login_oidc_callback(session: SessionDep, request: Request, code: str):  # noqa: ARG001
+async def login_oidc_callback(
+    session: SessionDep,
+    cache: CacheDep,
+    request: Request,  # noqa: ARG001
+    code: str,
+):
     """
     Callback for OpenID Connect login
     """
-    if not settings.OIDC_ENABLED:
+    config = await runtime_settings.aget()
+    if not config.OIDC_ENABLED:
         raise HTTPException(status_code=403, detail="OIDC is not enabled")
 
-    if not settings.oidc_configured:
+    if not config.oidc_configured:
         raise HTTPException(status_code=501, detail="OIDC is not configured")
 
     redirect_uri = f"{settings.FRONTEND_HOST}{settings.API_V1_STR}/login/oidc/callback"
 
-    async with httpx.AsyncClient(verify=False) as client:
-        response = await client.post(
-            settings.OIDC_TOKEN_URL,
-            data={
-                "grant_type": "authorization_code",
-                "code": code,
-                "redirect_uri": redirect_uri,
-                "client_id": settings.OIDC_CLIENT_ID,
-                "client_secret": settings.OIDC_CLIENT_SECRET,
-            },
-        )
-        if response.status_code != 200:
-            raise HTTPException(status_code=400, detail="OIDC login failed")
-
-        token_data = response.json()
-        id_token = token_data.get("id_token")
-
-        # Decode ID Token without verification for simplicity in this example
-        payload = jwt.decode(id_token, options={"verify_signature": False})
-
-        sub = payload.get("sub")
-        email = payload.get("email")
-
-        if not email:
-            raise HTTPException(status_code=400, detail="Email not found in OIDC token")
-
-        # Find user by OIDC sub
-        user = crud.get_user_by_oidc_sub(session=session, oidc_sub=sub)
-        if not user:
-            # Find user by email
-            user = crud.get_user_by_email(session=session, email=email)
-            if not user:
-                # Create new user
-                user_in = UserCreate(
-                    email=email,
-                    username=payload.get("preferred_username"),
-                    password=secrets.token_urlsafe(32),  # Use random password
-                    full_name=payload.get("name"),
-                )
-                user = crud.create_user(session=session, user_create=user_in)
-
-            # Link OIDC sub to user
-            user.oidc_sub = sub
-            session.add(user)
-            session.commit()
-            session.refresh(user)
-
-        # Check if user is active
-        if not user.is_active:
-            raise HTTPException(status_code=400, detail="Inactive user")
-
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-        access_token = create_access_token(user.id, expires_delta=access_token_expires)
-        refresh_token = create_refresh_token(
-            user.id, expires_delta=refresh_token_expires
-        )
+    try:
+        claims = await oidc_client.exchange_code(config, code, redirect_uri)
+    except OidcError as e:
+        logger.info(f"OIDC login failed: {e}")
+        raise HTTPException(status_code=400, detail="OIDC login failed")
+
+    sub = claims.get("sub")
+    email = claims.get("email")
+    if not sub:
+        raise HTTPException(status_code=400, detail="Subject not found in OIDC token")
+    if not email:
+        raise HTTPException(status_code=400, detail="Email not found in OIDC token")
+
+    # The session is sync: keep its queries (and hashing) off the event loop
+    user = await run_in_threadpool(
+        crud.get_or_create_oidc_user,
+        session=session,
+        sub=sub,
+        email=email,
+        username=claims.get("preferred_username"),
+        full_name=claims.get("name"),
+    )
 
-        # Redirect to frontend with token
-        return RedirectResponse(
-            f"{settings.FRONTEND_HOST}/auth/login?access_token={access_token}&refresh_token={refresh_token}"
-        )
+    # Check if user is active
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    generation = await aget_token_generation(cache, user.id)
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    access_token = create_access_token(
+        user.id, expires_delta=access_token_expires, generation=generation
+    )
+    refresh_token = create_refresh_token(
+        user.id, expires_delta=refresh_token_expires, generation=generation
+    )
+
+    # Redirect to frontend with token
+    return RedirectResponse(
+        f"{settings.FRONTEND_HOST}/auth/login?access_token={access_token}&refresh_token={refresh_token}"
+    )
 
 
 @router.get("/logout/oidc", summary="Logout and redirect to OIDC provider")
@@ -328,13 +356,14 @@ def logout_oidc(request: Request):  # noqa: ARG001
     """
     Redirect to OpenID Connect provider for logout
     """
-    if not settings.OIDC_ENABLED:
+    config = runtime_settings.get()
+    if not config.OIDC_ENABLED:
         raise HTTPException(status_code=403, detail="OIDC is not enabled")
 
-    if not settings.oidc_configured:
+    if not config.oidc_configured:
         raise HTTPException(status_code=501, detail="OIDC is not configured")
 
-    if not settings.SIGNOUT_REDIRECT_URL:
+    if not config.SIGNOUT_REDIRECT_URL:
         raise HTTPException(
             status_code=501, detail="The signout redirect url is not configured"
         )
@@ -342,7 +371,7 @@ def logout_oidc(request: Request):  # noqa: ARG001
     post_logout_redirect_uri = f"{settings.FRONTEND_HOST}/login"
 
     return RedirectResponse(
-        f"{settings.SIGNOUT_REDIRECT_URL}?"
+        f"{config.SIGNOUT_REDIRECT_URL}?"
         f"post_logout_redirect_uri={post_logout_redirect_uri}&"
-        f"client_id={settings.OIDC_CLIENT_ID}"
+        f"client_id={config.OIDC_CLIENT_ID}"
     )
@@ -5,11 +5,12 @@ from typing import Any
 
 from celery.result import AsyncResult
 from fastapi import APIRouter, HTTPException, status
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import QueryableAttribute, defer, joinedload
 from sqlmodel import desc, func, select
 
 from app.api.deps import CeleryDep, CurrentUser, SessionDep
-from app.model.base import Message
+from app.api.responses import PydanticJSONResponse
+from app.model.base import ListFields, Message
 from app.model.task import (
     PeriodicScheduleType,
     Task,
@@ -17,6 +18,7 @@ from app.model.task import (
     TaskPublic,
     TasksPublic,
     TaskStatus,
+    TaskSummariesPublic,
     TaskType,
     TaskUpdate,
 )
@@ -24,15 +26,45 @@ from app.model.task_execution import (
     TaskExecution,
     TaskExecutionPublic,
     TaskExecutionsPublic,
+    TaskExecutionSummariesPublic,
+    TaskExecutionSummaryPublic,
 )
 
 router = APIRouter(tags=["Task"], prefix="/tasks")
 
 
-@router.get("/", response_model=TasksPublic, summary="Retrieve tasks")
+def _attribute(field: Any) -> QueryableAttribute[Any]:
+    """A model field as the mapped attribute it is at runtime, for loader options."""
+    if not isinstance(field, QueryableAttribute):
+        raise TypeError(f"{field!r} is not a mapped attribute")
+    return field
+
+
+# Wide TEXT columns that are only needed by detail views
+TASK_DETAIL_COLUMNS = (
+    _attribute(Task.celery_task_args),
+    _attribute(Task.celery_task_kwargs),
+)
+EXECUTION_DETAIL_COLUMNS = (
+    _attribute(TaskExecution.celery_task_args),
+    _attribute(TaskExecution.celery_task_kwargs),
+    _attribute(TaskExecution.result),
+    _attribute(TaskExecution.traceback),
+)
+
+
+@router.get(
+    "/",
+    response_model=TaskSummariesPublic | TasksPublic,
+    summary="Retrieve tasks",
+)
 def read_tasks(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
-) -> TasksPublic:
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    fields: ListFields = "summary",
+) -> PydanticJSONResponse:
     """
     Retrieve tasks.
     """
@@ -41,6 +73,10 @@ def read_tasks(
     data_statement = (
         select(Task).options(joinedload(Task.owner)).offset(skip).limit(limit)
     )
+    if fields == "summary":
+        data_statement = data_statement.options(
+            *[defer(column) for column in TASK_DETAIL_COLUMNS]
+        )
 
     # Non-superusers can only see their own tasks
     if not current_user.is_superuser:
@@ -51,7 +87,9 @@ def read_tasks(
     total = session.exec(count_statement).one()
     tasks = session.exec(data_statement).all()
 
-    return TasksPublic(tasks=tasks, total=total)
+    if fields == "summary":
+        return PydanticJSONResponse(TaskSummariesPublic(tasks=tasks, total=total))
+    return PydanticJSONResponse(TasksPublic(tasks=tasks, total=total))
 
 
 @router.get(
@@ -451,7 +489,7 @@ def disable_task(
 
 @router.get(
     "/executions/all",
-    response_model=TaskExecutionsPublic,
+    response_model=TaskExecutionSummariesPublic | TaskExecutionsPublic,
     summary="Get all task executions",
 )
 def get_all_task_executions(
@@ -459,40 +497,53 @@ def get_all_task_executions(
     current_user: CurrentUser,
     skip: int = 0,
     limit: int = 100,
-) -> TaskExecutionsPublic:
+    fields: ListFields = "summary",
+) -> TaskExecutionSummariesPublic | TaskExecutionsPublic:
     """
     获取所有任务执行记录（仅管理员或自己的任务）
     """
     statement = (
         select(TaskExecution)
-        .options(joinedload(TaskExecution.task))
+        # Executions only expose the parent task's name columns
+        .options(
+            joinedload(TaskExecution.task).load_only(
+                _attribute(Task.name), _attribute(Task.celery_task_name)
+            )
+        )
         .order_by(desc(TaskExecution.created_at))
         .offset(skip)
         .limit(limit)
     )
+    if fields == "summary":
+        statement = statement.options(
+            *[defer(column) for column in EXECUTION_DETAIL_COLUMNS]
+        )
     executions = session.exec(statement).all()
 
     # 如果不是超级用户，过滤掉不属于自己的任务的执行记录
     if not current_user.is_superuser:
-        from app.model.task import Task
-
         tasks_statement = select(Task.id).where(Task.owner_id == current_user.id)
         user_tasks = session.exec(tasks_statement).all()
         user_task_ids = {t.id for t in user_tasks}
 
         executions = [e for e in executions if e.task_id in user_task_ids]
-    statement = select(func.count()).select_from(TaskExecution)
-    total = session.exec(statement).one()
+    count_statement = select(func.count()).select_from(TaskExecution)
+    total = session.exec(count_statement).one()
 
+    schema = TaskExecutionSummaryPublic if fields == "summary" else TaskExecutionPublic
     execution_public_list = []
     for e in executions:
-        e_public = TaskExecutionPublic.model_validate(e)
+        e_public = schema.model_validate(e)
         if e.task:
             if not e_public.task_name:
                 e_public.task_name = e.task.name
             e_public.celery_task_name = e.task.celery_task_name
         execution_public_list.append(e_public)
 
+    if fields == "summary":
+        return TaskExecutionSummariesPublic(
+            executions=execution_public_list, total=total
+        )
     return TaskExecutionsPublic(executions=execution_public_list, total=total)
 
 
@@ -600,7 +651,7 @@ def get_task_execution_status(
 
 @router.get(
     "/{task_id}/executions",
-    response_model=TaskExecutionsPublic,
+    response_model=TaskExecutionSummariesPublic | TaskExecutionsPublic,
     summary="Get task executions",
 )
 def get_task_executions(
@@ -609,7 +660,8 @@ def get_task_executions(
     task_id: uuid.UUID,
     skip: int = 0,
     limit: int = 100,
-) -> TaskExecutionsPublic:
+    fields: ListFields = "summary",
+) -> TaskExecutionSummariesPublic | TaskExecutionsPublic:
     """
     获取任务的执行记录
     """
@@ -626,15 +678,28 @@ def get_task_executions(
         .offset(skip)
         .limit(limit)
     )
+    if fields == "summary":
+        statement = statement.options(
+            *[defer(column) for column in EXECUTION_DETAIL_COLUMNS]
+        )
     executions = session.exec(statement).all()
-    statement = select(TaskExecution).where(TaskExecution.task_id == task_id)
-    total = len(session.exec(statement).all())
+    count_statement = (
+        select(func.count())
+        .select_from(TaskExecution)
+        .where(TaskExecution.task_id == task_id)
+    )
+    total = session.exec(count_statement).one()
 
+    schema = TaskExecutionSummaryPublic if fields == "summary" else TaskExecutionPublic
     execution_public_list = []
     for e in executions:
-        e_public = TaskExecutionPublic.model_validate(e)
+        e_public = schema.model_validate(e)
         e_public.task_name = task.name
         e_public.celery_task_name = task.celery_task_name
         execution_public_list.append(e_public)
 
+    if fields == "summary":
+        return TaskExecutionSummariesPublic(
+            executions=execution_public_list, total=total
+        )
     return TaskExecutionsPublic(executions=execution_public_list, total=total)
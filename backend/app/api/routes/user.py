@@ -1,19 +1,27 @@
+import csv
+import io
+import json
 import uuid
-from datetime import datetime, timezone
+from collections.abc import Iterator
+from typing import Any
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from pydantic import ValidationError
 from sqlalchemy.orm import joinedload
 from sqlmodel import func, select
 
 from app import crud
 from app.api.deps import (
     CacheDep,
+    CeleryDep,
     CurrentUser,
     SessionDep,
     get_current_active_superuser,
 )
 from app.core.casbin import enforcer
 from app.core.config import settings
+from app.core.revocation import revoke_user_tokens
+from app.core.runtime_settings import runtime_settings
 from app.core.security import get_password_hash, verify_password
 from app.core.storage import storage
 from app.model.base import Message
@@ -22,9 +30,11 @@ from app.model.user import (
     UpdatePassword,
     User,
     UserCreate,
+    UserImportResult,
     UserPrivate,
     UserPublic,
     UserRegister,
+    UsersImportReport,
     UsersPrivate,
     UserUpdate,
     UserUpdateMe,
@@ -77,7 +87,7 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> UserPrivate:
 
     # Create user
     user = crud.create_user(session=session, user_create=user_in)
-    if settings.emails_enabled and user_in.email:
+    if runtime_settings.get().emails_enabled and user_in.email:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.username, password=user_in.password
         )
@@ -90,6 +100,132 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> UserPrivate:
     return user
 
 
+def read_import_rows(
+    file: UploadFile,
+) -> Iterator[tuple[int, dict[str, Any] | None, str | None]]:
+    """
+    Stream (row number, data, error) tuples from a CSV or NDJSON upload.
+    """
+    filename = (file.filename or "").lower()
+    if file.content_type == "text/csv" or filename.endswith(".csv"):
+        file_format = "csv"
+    elif file.content_type in (
+        "application/x-ndjson",
+        "application/jsonl",
+    ) or filename.endswith((".ndjson", ".jsonl")):
+        file_format = "ndjson"
+    else:
+        raise HTTPException(status_code=400, detail="Expected a CSV or NDJSON file")
+
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            # Empty cells fall back to the field defaults
+            yield row_number, {k: v for k, v in row.items() if k and v}, None
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                yield row_number, None, "Invalid JSON"
+                continue
+            if not isinstance(data, dict):
+                yield row_number, None, "Expected a JSON object"
+                continue
+            yield row_number, data, None
+
+
+@router.post(
+    "/bulk",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=UsersImportReport,
+    summary="Import users in bulk",
+)
+def import_users(
+    *,
+    session: SessionDep,
+    celery_app: CeleryDep,
+    file: UploadFile = File(...),
+    send_welcome_email: bool = False,
+) -> UsersImportReport:
+    """
+    Import users from a CSV file with a header row, or an NDJSON file.
+
+    Each row takes the fields of a user creation request. Rows with an email
+    that already exists (or repeats within the file) are skipped.
+    """
+    results: list[UserImportResult] = []
+    pending: list[tuple[UserImportResult, UserCreate]] = []
+    seen_emails: set[str] = set()
+    try:
+        for row_number, data, error in read_import_rows(file):
+            email = data.get("email") if data else None
+            result = UserImportResult(
+                row=row_number,
+                email=email if isinstance(email, str) else None,
+                status="failed",
+                detail=error,
+            )
+            results.append(result)
+            if data is None:
+                continue
+            try:
+                user_in = UserCreate.model_validate(data)
+            except ValidationError as e:
+                first_error = e.errors()[0]
+                field = ".".join(str(loc) for loc in first_error["loc"])
+                result.detail = (
+                    f"{field}: {first_error['msg']}" if field else first_error["msg"]
+                )
+                continue
+            if user_in.email in seen_emails:
+                result.status = "skipped"
+                result.detail = "Duplicate email in file"
+                continue
+            seen_emails.add(user_in.email)
+            pending.append((result, user_in))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+
+    # Skip existing users with one lookup per batch of emails
+    existing = crud.get_existing_emails(
+        session=session, emails=(user_in.email for _, user_in in pending)
+    )
+    new_users = []
+    for result, user_in in pending:
+        if user_in.email in existing:
+            result.status = "skipped"
+            result.detail = "The user with this email already exists in the system"
+        else:
+            new_users.append((result, user_in))
+
+    created = crud.create_users(
+        session=session, users_create=[user_in for _, user_in in new_users]
+    )
+    for (result, _), user in zip(new_users, created, strict=True):
+        if user is None:
+            result.detail = "The user with this email already exists in the system"
+            continue
+        result.status = "created"
+        result.id = user.id
+        result.username = user.username
+        # Welcome emails are sent by the worker, not inline, with a link to
+        # set the password so that it never passes through the broker
+        if send_welcome_email and runtime_settings.get().emails_enabled:
+            celery_app.send_task(
+                "send_new_account_email", kwargs={"user_id": str(user.id)}
+            )
+
+    return UsersImportReport(
+        created=sum(r.status == "created" for r in results),
+        skipped=sum(r.status == "skipped" for r in results),
+        failed=sum(r.status == "failed" for r in results),
+        results=results,
+    )
+
+
 @router.patch("/me", response_model=UserPrivate, summary="Update own user")
 def update_user_me(
     *,
@@ -323,8 +459,8 @@ def force_logout(session: SessionDep, cache: CacheDep, user_id: uuid.UUID) -> Me
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Set timestamp in redis
-    cache.redis.set(f"blacklist:user:{user_id}", datetime.now(timezone.utc).timestamp())
+    # Revoke the tokens issued so far; the user can log in again
+    revoke_user_tokens(cache, user_id)
 
     return Message(message="User forced to logout")
 
@@ -395,19 +531,17 @@ def upload_avatar(
     """
     Upload avatar.
     """
-    # Validate content type
+    # Validate content type and size
     if file.content_type not in ["image/jpeg", "image/png", "image/gif", "image/webp"]:
         raise HTTPException(status_code=400, detail="Invalid file type")
-
-    # Read file content
-    content = file.file.read()
-
-    # Save to storage
-    object_name = storage.save_avatar(
-        user_id=current_user.id,
-        data=content,
-        content_type=file.content_type,
-    )
+    if file.size and file.size > settings.AVATAR_MAX_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    # Resize and save to storage
+    try:
+        object_name = storage.save_avatar(user_id=current_user.id, file=file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Update user
     current_user.avatar = object_name
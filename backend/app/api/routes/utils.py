@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.model.base import Message
+from app.core.cache import cache
+from app.core.security import password_hasher
+from app.model.base import Message, PasswordHashingStats, RedisPoolsStats
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(tags=["Utils"], prefix="/utils")
@@ -27,6 +29,30 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/password-hashing/",
+    dependencies=[Depends(get_current_active_superuser)],
+    summary="Password hashing pool stats",
+)
+def password_hashing_stats() -> PasswordHashingStats:
+    """
+    Queue depth and throughput of the password hashing pool.
+    """
+    return PasswordHashingStats(**password_hasher.stats())
+
+
+@router.get(
+    "/redis-pools/",
+    dependencies=[Depends(get_current_active_superuser)],
+    summary="Redis connection pool stats",
+)
+def redis_pools_stats() -> RedisPoolsStats:
+    """
+    Connections in use and idle in the sync and asyncio Redis pools.
+    """
+    return RedisPoolsStats(**cache.pool_stats())
+
+
 @router.get("/healthz/", summary="Health Check")
 def health_check() -> bool:
     return True
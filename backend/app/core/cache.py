@@ -1,22 +1,300 @@
+import enum
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Generic, TypeVar, cast
+
 import redis
+from redis import asyncio as aioredis
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Key prefixes served from the near cache: hot, read-mostly keys
+NEAR_CACHE_PREFIXES = ("token:generation:", "openapi:app:", "settings:")
+NEAR_CACHE_INVALIDATION_CHANNEL = "__redis__:invalidate"
+# Seconds between reconnection attempts of the invalidation listener
+NEAR_CACHE_RETRY_INTERVAL = 5
+# Seconds between health checks of the tracking connection, and to wait for
+# its reply: Redis stops tracking when that connection drops, silently
+NEAR_CACHE_PING_INTERVAL = 10
+NEAR_CACHE_PING_TIMEOUT = 5
+
+
+class _Missing(enum.Enum):
+    """Marks keys that are not in the near cache (None is a cached value)."""
+
+    MISSING = enum.auto()
+
+
+_MISSING = _Missing.MISSING
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class ExpiringLRU(Generic[K, V]):
+    """
+    Bounded, thread-safe LRU of process-local values that expire.
+
+    Each value is stored with a deadline, on whichever clock the caller uses
+    consistently (`time.time()` or `time.monotonic()`). Expired entries are
+    dropped when read; once `max_size` entries are stored, the least
+    recently used one makes room for the next.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        # key -> (value, deadline)
+        self.__entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: K, now: float) -> V | None:
+        """Value of a key until its deadline, None if expired or unknown."""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: K, value: V, deadline: float) -> None:
+        with self.__lock:
+            self.__entries[key] = (value, deadline)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+class NearCache:
+    """
+    Process-local copy of hot keys, kept coherent by Redis client tracking.
+
+    A listener connection subscribes to the invalidation channel and a
+    tracking connection enables `CLIENT TRACKING ... BCAST` for
+    `NEAR_CACHE_PREFIXES`, redirected to it: Redis then notifies every
+    write to those keys, by any client, and the local copy is dropped.
+    Missing keys are cached too, so checking a key that usually does not
+    exist costs no round trip.
+
+    Works with RESP2 and Redis 6+. Until the listener is connected (or
+    after either connection was lost) reads go straight to Redis. The
+    tracking connection is otherwise idle, so it is pinged periodically.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        async_client: aioredis.Redis,
+        connection_kwargs: dict[str, Any],
+        prefixes: tuple[str, ...] = NEAR_CACHE_PREFIXES,
+        max_size: int = 10000,
+    ) -> None:
+        self.__client = client
+        self.__async_client = async_client
+        self.__connection_kwargs = connection_kwargs
+        self.__prefixes = prefixes
+        self.__max_size = max_size
+        self.__values: dict[str, str | None] = {}
+        # Bumped on every invalidation, so that a value read from Redis is
+        # only stored if no invalidation arrived in the meantime
+        self.__generation = 0
+        self.__lock = threading.Lock()
+        self.__ready = threading.Event()
+        self.__stopped = threading.Event()
+        self.__listener: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.__ready.is_set()
+
+    def get(self, key: str) -> str | None:
+        """GET a key, from process memory when it is tracked."""
+        cached, generation = self._lookup(key)
+        if cached is not _MISSING:
+            return cached
+        value = cast(str | None, self.__client.get(key))
+        self._store(key, value, generation)
+        return value
+
+    async def aget(self, key: str) -> str | None:
+        """GET a key with the asyncio client, from memory when tracked."""
+        cached, generation = self._lookup(key)
+        if cached is not _MISSING:
+            return cached
+        value: str | None = await self.__async_client.get(key)
+        self._store(key, value, generation)
+        return value
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        self.__ready.clear()
+        self._invalidate(None)
+
+    def _lookup(self, key: str) -> tuple[str | None | _Missing, int]:
+        if not key.startswith(self.__prefixes):
+            return _MISSING, -1
+        if self.__listener is None:
+            self._start()
+        with self.__lock:
+            if not self.__ready.is_set():
+                return _MISSING, -1
+            return self.__values.get(key, _MISSING), self.__generation
+
+    def _store(self, key: str, value: str | None, generation: int) -> None:
+        with self.__lock:
+            if generation != self.__generation or not self.__ready.is_set():
+                return
+            if len(self.__values) >= self.__max_size:
+                self.__values.pop(next(iter(self.__values)), None)
+            self.__values[key] = value
+
+    def _invalidate(self, keys: list[str] | None) -> None:
+        with self.__lock:
+            self.__generation += 1
+            if keys is None:
+                self.__values.clear()
+            else:
+                for key in keys:
+                    self.__values.pop(key, None)
+
+    def _start(self) -> None:
+        with self.__lock:
+            if self.__listener is None:
+                self.__listener = threading.Thread(
+                    target=self._listen, name="near-cache-invalidation", daemon=True
+                )
+                self.__listener.start()
+
+    def _listen(self) -> None:
+        while not self.__stopped.is_set():
+            listener = redis.Connection(**self.__connection_kwargs)
+            tracker = redis.Connection(**self.__connection_kwargs)
+            try:
+                listener.send_command("CLIENT", "ID")
+                client_id = listener.read_response()
+                listener.send_command("SUBSCRIBE", NEAR_CACHE_INVALIDATION_CHANNEL)
+                listener.read_response()
+                prefixes = [arg for p in self.__prefixes for arg in ("PREFIX", p)]
+                tracker.send_command(
+                    "CLIENT",
+                    "TRACKING",
+                    "ON",
+                    "REDIRECT",
+                    client_id,
+                    "BCAST",
+                    *prefixes,
+                )
+                tracker.read_response()
+                self.__ready.set()
+                logger.info("Near cache invalidation listener connected")
+
+                next_ping = time.monotonic() + NEAR_CACHE_PING_INTERVAL
+                while not self.__stopped.is_set():
+                    if time.monotonic() >= next_ping:
+                        tracker.send_command("PING")
+                        if not tracker.can_read(timeout=NEAR_CACHE_PING_TIMEOUT):
+                            raise redis.ConnectionError("Tracking connection timed out")
+                        tracker.read_response()
+                        next_ping = time.monotonic() + NEAR_CACHE_PING_INTERVAL
+                    if not listener.can_read(timeout=1):
+                        continue
+                    message = listener.read_response()
+                    if message[0] == "message":
+                        # A list of keys, or None when the database was flushed
+                        self._invalidate(message[2])
+            except (redis.RedisError, OSError) as e:
+                logger.warning(f"Near cache invalidation listener disconnected: {e}")
+            finally:
+                # Without notifications the local copies cannot be trusted
+                self.__ready.clear()
+                self._invalidate(None)
+                listener.disconnect()
+                tracker.disconnect()
+            self.__stopped.wait(NEAR_CACHE_RETRY_INTERVAL)
+
 
 class Cache:
     def __init__(self) -> None:
-        self.__pool = redis.ConnectionPool(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD,
-            decode_responses=True,
-        )
+        connection_kwargs: dict[str, Any] = {
+            "host": settings.REDIS_HOST,
+            "port": settings.REDIS_PORT,
+            "db": settings.REDIS_DB,
+            "password": settings.REDIS_PASSWORD,
+            "decode_responses": True,
+        }
+        self.__pool = redis.ConnectionPool(**connection_kwargs)
         self.__client = redis.Redis(connection_pool=self.__pool)
+        # Used from async code (middleware, async routes), so that Redis
+        # calls do not block the event loop
+        self.__async_pool = aioredis.ConnectionPool(**connection_kwargs)
+        self.__async_client = aioredis.Redis(connection_pool=self.__async_pool)
+        self.__near = (
+            NearCache(
+                self.__client,
+                self.__async_client,
+                connection_kwargs,
+                max_size=settings.REDIS_NEAR_CACHE_MAX_SIZE,
+            )
+            if settings.REDIS_NEAR_CACHE
+            else None
+        )
 
     @property
     def redis(self) -> redis.Redis:
         return self.__client
 
+    @property
+    def async_redis(self) -> aioredis.Redis:
+        return self.__async_client
+
+    def get(self, key: str) -> str | None:
+        """GET a hot key (see `NEAR_CACHE_PREFIXES`) through the near cache."""
+        if self.__near is None:
+            return cast(str | None, self.__client.get(key))
+        return self.__near.get(key)
+
+    async def aget(self, key: str) -> str | None:
+        """Like `get`, with the asyncio client."""
+        if self.__near is None:
+            value: str | None = await self.__async_client.get(key)
+            return value
+        return await self.__near.aget(key)
+
+    async def close(self) -> None:
+        """Close the connections of both pools."""
+        if self.__near is not None:
+            self.__near.stop()
+        self.__pool.disconnect()
+        await self.__async_pool.disconnect()
+
+    def pool_stats(self) -> dict[str, dict[str, int]]:
+        """Connections in use and idle in the sync and asyncio pools."""
+        return {
+            name: {
+                "max_connections": pool.max_connections,
+                "in_use": len(pool._in_use_connections),
+                "available": len(pool._available_connections),
+            }
+            for name, pool in (("sync", self.__pool), ("asyncio", self.__async_pool))
+        }
+
 
 cache = Cache()
@@ -1,4 +1,6 @@
 import os
+import threading
+from collections.abc import Sequence
 
 import casbin
 import casbin_sqlalchemy_adapter
@@ -9,11 +11,38 @@ from app.model.casbin_rule import CasbinRule
 # Get the absolute path to the model file
 model_path = os.path.join(os.path.dirname(__file__), "rbac_model.conf")
 
+
+class Adapter(casbin_sqlalchemy_adapter.Adapter):
+    """SQLAlchemy adapter that saves a batch of policies in one transaction."""
+
+    def add_policies(
+        self, sec: str, ptype: str, rules: Sequence[Sequence[str]]
+    ) -> None:
+        with self._session_scope() as session:
+            for rule in rules:
+                self._save_policy_line(ptype, rule, session)
+
+
 # Initialize the Casbin adapter with SQLAlchemy
-adapter = casbin_sqlalchemy_adapter.Adapter(engine, CasbinRule)
+# (the casbin_rule table is created by the Alembic migrations)
+adapter = Adapter(engine, CasbinRule, create_all_models=False)
+
+# Create the Casbin enforcer. The adapter is attached afterwards so that
+# importing this module does not read the database; policies are loaded by
+# ensure_policy_loaded() at startup or on first use.
+enforcer = casbin.Enforcer(model_path)
+enforcer.set_adapter(adapter)
+
+_policy_lock = threading.Lock()
+_policy_loaded = False
 
-# Create the Casbin enforcer
-enforcer = casbin.Enforcer(model_path, adapter)
 
-# Load existing policies from the database
-enforcer.load_policy()
+def ensure_policy_loaded() -> None:
+    """Load existing policies from the database, once per process."""
+    global _policy_loaded
+    if _policy_loaded:
+        return
+    with _policy_lock:
+        if not _policy_loaded:
+            enforcer.load_policy()
+            _policy_loaded = True
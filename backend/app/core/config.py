@@ -41,6 +41,34 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     # 7 days
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Verified tokens kept in process memory until they expire (0 disables it)
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    # Password hashing: the first scheme hashes new passwords, the others are
+    # still verified and upgraded on the next login (e.g. ["argon2", "bcrypt"],
+    # which requires argon2-cffi)
+    PASSWORD_HASH_SCHEMES: list[str] = ["bcrypt"]
+    # bcrypt work factor (each +1 doubles login CPU time); hashes with other
+    # rounds are upgraded on the next login
+    BCRYPT_ROUNDS: int = 12
+    # Server worker processes (`fastapi run --workers`), which share the CPUs
+    WEB_CONCURRENCY: int = 1
+    # Processes used to hash and verify passwords by each server worker
+    # (defaults to the CPU count divided by WEB_CONCURRENCY; 0 runs bcrypt in
+    # the request thread, as the Celery worker does)
+    PASSWORD_HASH_WORKERS: int | None = None
+    # Hashing jobs allowed in flight before requests get 503 (backpressure).
+    # Each one holds a request thread while it waits, so it is capped at
+    # half of the request threadpool
+    PASSWORD_HASH_MAX_PENDING: int = 16
+
+    # Failed logins allowed per username and per client IP over a sliding
+    # window before further attempts are locked out
+    LOGIN_MAX_FAILURES_PER_USER: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+    # First lockout length, doubled on each repeated lockout up to the maximum
+    LOGIN_LOCKOUT_SECONDS: int = 60
+    LOGIN_LOCKOUT_MAX_SECONDS: int = 3600
 
     FRONTEND_HOST: str = "http://localhost:5173"
 
@@ -112,12 +140,36 @@ class Settings(BaseSettings):
 
         raise ValueError(f"Unknown database type: {self.DATABASE_TYPE}")
 
+    # Rate limits, as "<requests>/<second|minute|hour|day>", keyed by
+    # "app:<app_id>" (or "app:*"), "role:<name>" ("role:guest" for anonymous
+    # callers) and "route:[METHOD ]<path template>", e.g.
+    # {"role:guest": "60/minute", "route:POST /api/v1/users/signup": "5/hour"}
+    RATE_LIMITS: dict[str, str] = {}
+    # Quota of callers without an application or role specific one
+    RATE_LIMIT_DEFAULT: str | None = None
+    # Tokens leased from Redis at once by clients well under their limit, and
+    # seconds before unused leased tokens are given back
+    RATE_LIMIT_LOCAL_BATCH: int = 10
+    RATE_LIMIT_LOCAL_TTL: float = 1.0
+
+    # Expected OpenAPI calls per minute per worker for the in-process replay
+    # Bloom filter (0 disables it; every nonce is then checked in Redis)
+    OPENAPI_NONCE_BLOOM_CAPACITY: int = 0
+
+    # Seconds each external service check may take during application startup
+    STARTUP_CHECK_TIMEOUT: float = 5.0
+
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str | None = None
 
+    # Serve hot keys (token generations, application credentials) from process
+    # memory, invalidated by Redis client tracking (requires Redis 6+)
+    REDIS_NEAR_CACHE: bool = False
+    REDIS_NEAR_CACHE_MAX_SIZE: int = 10000
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def REDIS_URI(self) -> str:
@@ -132,6 +184,8 @@ class Settings(BaseSettings):
     STORAGE_SECRET_KEY: str = "changethis"
     STORAGE_BUCKET_NAME: str = "myapp"
     STORAGE_SECURE: bool = False
+    # Largest accepted avatar upload, in bytes (5 MB)
+    AVATAR_MAX_SIZE: int = 5 * 1024 * 1024
 
     # Email
     SMTP_TLS: bool = True
@@ -166,6 +220,14 @@ class Settings(BaseSettings):
     OIDC_CLIENT_ID: str | None = None
     OIDC_CLIENT_SECRET: str | None = None
     OIDC_SCOPES: str = "openid profile email"
+    # With an issuer, ID tokens are verified against the keys it publishes
+    # (OpenID discovery); without, the claims are read from the userinfo URL
+    OIDC_ISSUER: str | None = None
+    OIDC_TLS_VERIFY: bool = True
+    OIDC_HTTP_POOL_SIZE: int = 20
+    OIDC_HTTP_TIMEOUT: float = 10.0
+    # Seconds the discovery document and signing keys are cached
+    OIDC_METADATA_TTL: int = 3600
     SIGNOUT_REDIRECT_URL: str | None = None
     AUTO_LOGIN: bool = False
 
@@ -192,6 +254,19 @@ class Settings(BaseSettings):
     LDAP_EMAIL_ATTRIBUTE: str = "mail"
     LDAP_USERNAME_ATTRIBUTE: str = "cn"
     LDAP_FULLNAME_ATTRIBUTE: str = "displayName"
+    # Open connections kept per pool (service searches and user binds), and
+    # seconds to wait for a free one
+    LDAP_POOL_SIZE: int = 10
+    LDAP_POOL_TIMEOUT: float = 5.0
+    # Seconds to connect to the LDAP server and to wait for a response
+    LDAP_TIMEOUT: float = 5.0
+    # Users are synced from the directory by the `sync_ldap_users` task, which
+    # reads it in pages of this many entries
+    LDAP_SYNC_PAGE_SIZE: int = 500
+    LDAP_SYNC_INTERVAL_MINUTES: int = 60
+    # Link local accounts to the directory entry with the same email. Off by
+    # default: whoever controls a directory email would get that account
+    LDAP_SYNC_LINK_BY_EMAIL: bool = False
 
     @computed_field  # type: ignore[prop-decorator]
     @property
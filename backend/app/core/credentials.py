@@ -0,0 +1,112 @@
+import logging
+import time
+import uuid
+
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import ExpiringLRU, cache
+from app.core.database import engine
+from app.model.application import Application
+
+logger = logging.getLogger(__name__)
+
+APP_CREDENTIALS_CACHE_PREFIX = "openapi:app"
+# Seconds credentials are shared through Redis, for known and unknown apps
+APP_CREDENTIALS_CACHE_TTL = 300
+APP_CREDENTIALS_NEGATIVE_TTL = 60
+# Seconds credentials are kept in process memory. Invalidation only reaches
+# the local cache of the process that handled the change, so this bounds how
+# long other workers may accept a rotated key or a deactivated app
+APP_CREDENTIALS_LOCAL_TTL = 10
+# Upper bound on credentials kept in process memory
+APP_CREDENTIALS_LOCAL_MAX_SIZE = 10000
+# Stored by `invalidate` instead of deleting the key, for this many seconds.
+# Lookups that read the database before the change only fill missing keys
+# (SET NX), so they cannot write the old key back over it
+APP_CREDENTIALS_TOMBSTONE = "!"
+APP_CREDENTIALS_TOMBSTONE_TTL = 10
+
+
+class AppCredentials:
+    """
+    Cache of OpenAPI application keys, by public `app_id`.
+
+    Lookups go to process memory, then Redis, then the database. Unknown and
+    inactive applications are cached too (as no key), so invalid ids cannot
+    be used to hammer the database.
+    """
+
+    def __init__(self) -> None:
+        # Cache key -> app key ("" for unknown or inactive applications),
+        # until a time.monotonic() deadline
+        self.__keys: ExpiringLRU[str, str] = ExpiringLRU(APP_CREDENTIALS_LOCAL_MAX_SIZE)
+        # Incremented by every invalidation, to discard lookups started before
+        self.__generation = 0
+
+    async def get_app_key(self, app_id: uuid.UUID) -> str | None:
+        """Key of an active application, None if unknown or inactive."""
+        key = f"{APP_CREDENTIALS_CACHE_PREFIX}:{app_id}"
+        now = time.monotonic()
+
+        # 1. Try the in-process cache
+        cached = self.__keys.get(key, now)
+        if cached is not None:
+            return cached or None
+
+        # 2. Try the shared cache ("" marks an unknown application)
+        generation = self.__generation
+        try:
+            value = await cache.aget(key)
+            if value is not None and value != APP_CREDENTIALS_TOMBSTONE:
+                app_key = value or None
+                self._remember(key, app_key, now, generation)
+                return app_key
+        except Exception as e:
+            logger.debug(f"Application credentials cache unavailable: {e}")
+
+        # 3. Load from the database and cache the result
+        app_key = await run_in_threadpool(self._load, app_id)
+        self._remember(key, app_key, now, generation)
+        try:
+            await cache.async_redis.set(
+                key,
+                app_key or "",
+                ex=APP_CREDENTIALS_CACHE_TTL
+                if app_key
+                else APP_CREDENTIALS_NEGATIVE_TTL,
+                nx=True,
+            )
+        except Exception as e:
+            logger.debug(f"Application credentials cache unavailable: {e}")
+        return app_key
+
+    def invalidate(self, app_id: uuid.UUID) -> None:
+        """Forget an application after its key or status change was committed."""
+        key = f"{APP_CREDENTIALS_CACHE_PREFIX}:{app_id}"
+        self.__generation += 1
+        self.__keys.pop(key)
+        try:
+            cache.redis.set(
+                key, APP_CREDENTIALS_TOMBSTONE, ex=APP_CREDENTIALS_TOMBSTONE_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Failed to invalidate credentials of app {app_id}: {e}")
+
+    @staticmethod
+    def _load(app_id: uuid.UUID) -> str | None:
+        with Session(engine) as session:
+            app = session.exec(
+                select(Application).where(Application.app_id == app_id)
+            ).first()
+            return app.app_key if app and app.is_active else None
+
+    def _remember(
+        self, key: str, app_key: str | None, now: float, generation: int
+    ) -> None:
+        # Skipped when an invalidation happened while the key was looked up
+        if generation == self.__generation:
+            self.__keys.set(key, app_key or "", now + APP_CREDENTIALS_LOCAL_TTL)
+
+
+app_credentials = AppCredentials()
@@ -1,9 +1,11 @@
 import logging
+from typing import TYPE_CHECKING
 
-from sqlmodel import Session, and_, create_engine, select
+from sqlmodel import Session, col, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.security import get_password_hash
 from app.model import (
     Api,
     ApiCreate,
@@ -15,13 +17,22 @@ from app.model import (
     ItemCreate,
     Menu,
     MenuCreate,
+    PeriodicScheduleType,
     Role,
+    Task,
+    TaskType,
     User,
     UserCreate,
 )
 
+if TYPE_CHECKING:
+    import casbin
+
 logger = logging.getLogger(__name__)
 
+# Number of users, items, applications and groups seeded in local environments
+DEV_DATA_SIZE = 51
+
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
     connect_args={"check_same_thread": False}
@@ -34,6 +45,18 @@ engine = create_engine(
 # for more details: https://github.com/fastapi/full-stack-fastapi-template/issues/28
 
 
+def add_policies(enforcer: "casbin.Enforcer", rules: list[list[str]]) -> None:
+    """
+    Add the Casbin policies that do not exist yet, in a single batch.
+
+    `Enforcer.add_policies` adds nothing if any of the rules already exists,
+    so existing rules are filtered out first.
+    """
+    new_rules = [rule for rule in rules if not enforcer.has_policy(*rule)]
+    if new_rules:
+        enforcer.add_policies(new_rules)
+
+
 def init_db(session: Session) -> None:
     logger.info("Initializing database with initial data...")
     # Tables should be created with Alembic migrations
@@ -44,26 +67,29 @@ def init_db(session: Session) -> None:
     # SQLModel.metadata.create_all(engine)
 
     # 1. Create initial roles
-    logger.info("1/7 Creating initial roles...")
+    logger.info("1/8 Creating initial roles...")
     roles_info = {
         "admin": "Administrator with full access to all features and settings.",
         "user": "Regular user with access to standard features.",
         "guest": "Guest user with limited access.",
     }
-    for role_name, role_description in roles_info.items():
-        role = session.exec(select(Role).where(Role.name == role_name)).first()
-        if not role:
-            role = Role(name=role_name, description=role_description)
-            session.add(role)
-            session.commit()
+    roles = {role.name: role for role in session.exec(select(Role)).all()}
+    new_roles = [
+        Role(name=role_name, description=role_description)
+        for role_name, role_description in roles_info.items()
+        if role_name not in roles
+    ]
+    session.add_all(new_roles)
+    session.commit()
+    roles.update((role.name, role) for role in new_roles)
 
     # 2. Create initial superuser
-    logger.info("2/7 Creating initial superuser...")
+    logger.info("2/8 Creating initial superuser...")
     user = session.exec(
         select(User).where(User.email == settings.FIRST_SUPERUSER)
     ).first()
     if not user:
-        admin_role = session.exec(select(Role).where(Role.name == "admin")).first()
+        admin_role = roles.get("admin")
         user_in = UserCreate(
             email=settings.FIRST_SUPERUSER,
             password=settings.FIRST_SUPERUSER_PASSWORD,
@@ -73,9 +99,10 @@ def init_db(session: Session) -> None:
         user = crud.create_user(session=session, user_create=user_in)
 
     # 3. Create initial APIs from routes
-    logger.info("3/7 Creating initial APIs from routes...")
+    logger.info("3/8 Creating initial APIs from routes...")
     from app.api.main import api_router
 
+    existing_apis = set(session.exec(select(Api.path, Api.method)).all())
     # Fetch all routes from api_router
     for route in api_router.routes:
         if hasattr(route, "methods"):
@@ -88,65 +115,63 @@ def init_db(session: Session) -> None:
                 name = route.summary if route.summary else route.name
                 group = route.tags[0] if route.tags else "default"
                 # Check if API already exists
-                existing_api = session.exec(
-                    select(Api).where(and_(Api.path == path, Api.method == method))
-                ).first()
-                if not existing_api:
-                    api_in = ApiCreate(
-                        group=group,
-                        name=name,
-                        path=path,
-                        method=method,
-                    )
-                    # Create API
-                    api = Api.model_validate(api_in, update={"owner_id": user.id})
-                    session.add(api)
-                    session.commit()
+                if (path, method) in existing_apis:
+                    continue
+                existing_apis.add((path, method))
+                api_in = ApiCreate(
+                    group=group,
+                    name=name,
+                    path=path,
+                    method=method,
+                )
+                # Create API
+                session.add(Api.model_validate(api_in, update={"owner_id": user.id}))
+    session.commit()
 
     # 4. Create initial casbin policies for api access control
-    logger.info("4/7 Creating initial casbin policies for api access control...")
-    from app.core.casbin import enforcer
+    logger.info("4/8 Creating initial casbin policies for api access control...")
+    from app.core.casbin import enforcer, ensure_policy_loaded
 
-    # Guest policies
-    enforcer.add_policy("api:guest", f"{settings.API_V1_STR}/login/config", "GET")
-    enforcer.add_policy(
-        "api:guest", f"{settings.API_V1_STR}/login/access-token", "POST"
-    )
-    enforcer.add_policy(
-        "api:guest", f"{settings.API_V1_STR}/login/refresh-token", "POST"
-    )
-    enforcer.add_policy(
-        "api:guest", f"{settings.API_V1_STR}/password-recovery/*", "POST"
-    )
-    enforcer.add_policy("api:guest", f"{settings.API_V1_STR}/reset-password/", "POST")
-    enforcer.add_policy(
-        "api:guest", f"{settings.API_V1_STR}/password-recovery-html-content/", "POST"
-    )
-    enforcer.add_policy("api:guest", f"{settings.API_V1_STR}/register", "POST")
-    enforcer.add_policy("api:guest", f"{settings.API_V1_STR}/users/signup", "POST")
-    enforcer.add_policy("api:guest", f"{settings.API_V1_STR}/login/oidc", "POST")
-    enforcer.add_policy(
-        "api:guest", f"{settings.API_V1_STR}/login/oidc/callback", "POST"
-    )
-    enforcer.add_policy("api:guest", f"{settings.API_V1_STR}/logout/oidc", "POST")
+    # Policies already in the database must be known before adding new ones
+    ensure_policy_loaded()
 
+    add_policies(
+        enforcer,
+        [
+            # Guest policies
+            ["api:guest", f"{settings.API_V1_STR}/login/config", "GET"],
+            ["api:guest", f"{settings.API_V1_STR}/login/access-token", "POST"],
+            ["api:guest", f"{settings.API_V1_STR}/login/refresh-token", "POST"],
+            ["api:guest", f"{settings.API_V1_STR}/password-recovery/*", "POST"],
+            ["api:guest", f"{settings.API_V1_STR}/reset-password/", "POST"],
+            [
+                "api:guest",
+                f"{settings.API_V1_STR}/password-recovery-html-content/",
+                "POST",
+            ],
+            ["api:guest", f"{settings.API_V1_STR}/register", "POST"],
+            ["api:guest", f"{settings.API_V1_STR}/users/signup", "POST"],
+            ["api:guest", f"{settings.API_V1_STR}/login/oidc", "POST"],
+            ["api:guest", f"{settings.API_V1_STR}/login/oidc/callback", "POST"],
+            ["api:guest", f"{settings.API_V1_STR}/logout/oidc", "POST"],
+            # User policies
+            ["api:user", f"{settings.API_V1_STR}/users*", "*"],
+            ["api:user", f"{settings.API_V1_STR}/items*", "*"],
+            ["api:user", f"{settings.API_V1_STR}/groups*", "*"],
+            ["api:user", f"{settings.API_V1_STR}/app*", "*"],
+            ["api:user", f"{settings.API_V1_STR}/tasks*", "*"],
+            ["api:user", f"{settings.API_V1_STR}/utils*", "*"],
+            ["api:user", f"{settings.API_V1_STR}/openapi*", "*"],
+            # Admin policies
+            # Usually admin has all permissions, handled by is_superuser check or wildcard policy
+            ["api:admin", "/*", "*"],
+        ],
+    )
     # Allow api:user to inherit api:guest permissions
     enforcer.add_grouping_policy("api:user", "api:guest")
 
-    # User policies
-    enforcer.add_policy("api:user", f"{settings.API_V1_STR}/users*", "*")
-    enforcer.add_policy("api:user", f"{settings.API_V1_STR}/items*", "*")
-    enforcer.add_policy("api:user", f"{settings.API_V1_STR}/groups*", "*")
-    enforcer.add_policy("api:user", f"{settings.API_V1_STR}/app*", "*")
-    enforcer.add_policy("api:user", f"{settings.API_V1_STR}/tasks*", "*")
-    enforcer.add_policy("api:user", f"{settings.API_V1_STR}/utils*", "*")
-    enforcer.add_policy("api:user", f"{settings.API_V1_STR}/openapi*", "*")
-    # Admin policies
-    # Usually admin has all permissions, handled by is_superuser check or wildcard policy
-    enforcer.add_policy("api:admin", "/*", "*")
-
     # 5. Create initial menus
-    logger.info("5/7 Creating initial menus...")
+    logger.info("5/8 Creating initial menus...")
     initial_main_menu_structure = [
         {
             "label": "Home",
@@ -579,19 +604,21 @@ def init_db(session: Session) -> None:
     ]
 
     menu_sort_index = 1000
+    # Existing menus keyed by (name, parent id), loaded in a single query
+    existing_menus = {
+        (name, parent_id): menu_id
+        for menu_id, name, parent_id in session.exec(
+            select(Menu.id, Menu.name, Menu.parent_id)
+        ).all()
+    }
 
     def create_menu_recursive(menu_data, parent_id=None):
         """Recursively create menu items."""
         nonlocal menu_sort_index
         name = menu_data.get("name")
-        statement = select(Menu).where(Menu.name == name)
-        if parent_id:
-            statement = statement.where(Menu.parent_id == parent_id)
-        else:
-            statement = statement.where(Menu.parent_id == None)  # noqa: E711
         # Check if menu already exists
-        existing_menu = session.exec(statement).first()
-        if not existing_menu:
+        menu_id = existing_menus.get((name, parent_id))
+        if not menu_id:
             menu_sort_index += 1
             menu_in = MenuCreate(
                 name=name,
@@ -606,16 +633,16 @@ def init_db(session: Session) -> None:
                 parent_id=parent_id,
                 sort=menu_sort_index,
             )
-            # Create menu
-            existing_menu = Menu.model_validate(menu_in, update={"owner_id": user.id})
-            session.add(existing_menu)
-            session.commit()
-            session.refresh(existing_menu)
+            # Create menu; ids are generated client side, so children can
+            # reference it before anything is flushed
+            menu = Menu.model_validate(menu_in, update={"owner_id": user.id})
+            session.add(menu)
+            menu_id = existing_menus[(name, parent_id)] = menu.id
 
         # Recursively create child items
         if "items" in menu_data:
             for item in menu_data["items"]:
-                create_menu_recursive(item, parent_id=existing_menu.id)
+                create_menu_recursive(item, parent_id=menu_id)
 
     # Create main menus
     for menu in initial_main_menu_structure:
@@ -629,13 +656,12 @@ def init_db(session: Session) -> None:
     if settings.ENVIRONMENT == "local":
         for dev_menu in initial_dev_menu_structure:
             create_menu_recursive(dev_menu)
+    session.commit()
 
     # 6. Create initial casbin policies for menu access control
-    logger.info("6/7 Creating initial casbin policies for menu access control...")
+    logger.info("6/8 Creating initial casbin policies for menu access control...")
     # Guest policies
     guest_menus = ["login", "register", "forgot-password", "reset-password"]
-    for menu_name in guest_menus:
-        enforcer.add_policy("menu:guest", menu_name, "visible")
     # User policies
     user_menus = [
         "home",
@@ -647,8 +673,6 @@ def init_db(session: Session) -> None:
         "task-executions",
         "profile",
     ]
-    for menu_name in user_menus:
-        enforcer.add_policy("menu:user", menu_name, "visible")
     # Admin policies
     admin_menus = [
         "home",
@@ -667,58 +691,109 @@ def init_db(session: Session) -> None:
         "users",
         "settings",
     ]
-    for menu_name in admin_menus:
-        enforcer.add_policy("menu:admin", menu_name, "visible")
+    add_policies(
+        enforcer,
+        [["menu:guest", menu_name, "visible"] for menu_name in guest_menus]
+        + [["menu:user", menu_name, "visible"] for menu_name in user_menus]
+        + [["menu:admin", menu_name, "visible"] for menu_name in admin_menus],
+    )
+
+    # 7. Create periodic system tasks
+    logger.info("7/8 Creating periodic system tasks...")
+    existing_tasks = set(session.exec(select(Task.celery_task_name)).all())
+    if "sync_ldap_users" not in existing_tasks:
+        session.add(
+            Task(
+                name="LDAP user sync",
+                description="Sync users and their attributes from the LDAP directory.",
+                task_type=TaskType.PERIODIC,
+                celery_task_name="sync_ldap_users",
+                periodic_schedule_type=PeriodicScheduleType.INTERVAL,
+                interval_minutes=settings.LDAP_SYNC_INTERVAL_MINUTES,
+                # Deployments without LDAP can enable it once they configure it
+                enabled=settings.LDAP_ENABLED,
+                owner_id=user.id,
+            )
+        )
+        session.commit()
 
-    # 7. Create initial data for dev & testing
-    logger.info("7/7 Creating initial data for dev & testing...")
+    # 8. Create initial data for dev & testing
+    logger.info("8/8 Creating initial data for dev & testing...")
     if settings.ENVIRONMENT == "local":
-        for i in range(1, 52):
-            # Create users
+        # Create users
+        existing_emails = set(session.exec(select(User.email)).all())
+        existing_usernames = set(session.exec(select(User.username)).all())
+        user_role = roles.get("user")
+        # All dev users share the same password, so hash it only once
+        hashed_password = None
+        for i in range(1, DEV_DATA_SIZE + 1):
             email = f"user{i}@example.com"
-            user = session.exec(select(User).where(User.email == email)).first()
-            if not user:
-                user_in = UserCreate(
-                    email=email,
-                    password="changethis",
-                    full_name=f"User {i}",
-                    is_superuser=False,
+            if email in existing_emails:
+                continue
+            hashed_password = hashed_password or get_password_hash("changethis")
+            username = email.split("@")[0]
+            suffix = 0
+            while username in existing_usernames:
+                suffix += 1
+                username = f"{email.split('@')[0]}{suffix}"
+            existing_usernames.add(username)
+            user_in = UserCreate(
+                email=email,
+                username=username,
+                password="changethis",
+                full_name=f"User {i}",
+                is_superuser=False,
+                avatar=crud.get_gravatar_url(email),
+                role_id=user_role.id if user_role else None,
+            )
+            session.add(
+                User.model_validate(
+                    user_in, update={"hashed_password": hashed_password}
+                )
+            )
+        session.commit()
+
+        users_by_email = dict(
+            session.exec(
+                select(User.email, User.id).where(
+                    col(User.email).in_(
+                        [f"user{i}@example.com" for i in range(1, DEV_DATA_SIZE + 1)]
+                    )
                 )
-                user = crud.create_user(session=session, user_create=user_in)
+            ).all()
+        )
+        existing_items = set(session.exec(select(Item.name)).all())
+        existing_apps = set(session.exec(select(Application.name)).all())
+        for i in range(1, DEV_DATA_SIZE + 1):
+            owner_id = users_by_email.get(f"user{i}@example.com")
 
             # Create items
             item_name = f"Item {i}"
-            item = session.exec(select(Item).where(Item.name == item_name)).first()
-            if not item:
+            if item_name not in existing_items:
                 item_in = ItemCreate(
                     name=item_name,
                     description=f"This is item {i}. Longer description to test text wrapping in the UI.",
                 )
-                item = Item.model_validate(item_in, update={"owner_id": user.id})
-                session.add(item)
-                session.commit()
+                session.add(Item.model_validate(item_in, update={"owner_id": owner_id}))
 
             # Create applications
             app_name = f"App {i}"
-            app = session.exec(
-                select(Application).where(Application.name == app_name)
-            ).first()
-            if not app:
+            if app_name not in existing_apps:
                 app_in = ApplicationCreate(
                     name=app_name,
                     description=f"This is app {i}. Longer description to test text wrapping in the UI.",
                 )
-                app = Application.model_validate(app_in, update={"owner_id": user.id})
-                session.add(app)
-                session.commit()
+                session.add(
+                    Application.model_validate(app_in, update={"owner_id": owner_id})
+                )
 
         # Create groups
         users = session.exec(select(User).limit(10)).all()
         member_ids = [user.id for user in users]
-        for i in range(1, 52):
+        existing_groups = set(session.exec(select(Group.name)).all())
+        for i in range(1, DEV_DATA_SIZE + 1):
             group_name = f"Group {i}"
-            group = session.exec(select(Group).where(Group.name == group_name)).first()
-            if not group:
+            if group_name not in existing_groups:
                 group_in = GroupCreate(
                     name=group_name,
                     description=f"This is group {i}. Longer description to test text wrapping in the UI.",
@@ -728,6 +803,6 @@ def init_db(session: Session) -> None:
                 group = Group.model_validate(group_in, update={"owner_id": owner_id})
                 group.members = users
                 session.add(group)
-                session.commit()
+        session.commit()
 
     logger.info("Database initialization complete.")
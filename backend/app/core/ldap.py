@@ -1,74 +1,342 @@
 import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
 
-from ldap3 import ALL, SUBTREE, Connection, Server
+from ldap3 import ALL, BASE, SUBTREE, SYNC, Connection, Entry, Server
 
-from app.core.config import settings
+from app.core.config import Settings
+from app.core.runtime_settings import runtime_settings
 
 logger = logging.getLogger(__name__)
 
+# Idle connections are checked with a root DSE read before reuse after this
+# many seconds, so connections dropped by the server or a firewall are replaced
+LDAP_HEALTH_CHECK_INTERVAL = 60
 
-def authenticate(username: str, password: str) -> dict | None:
-    if not settings.LDAP_ENABLED:
+
+class LdapPoolTimeoutError(Exception):
+    """Raised when no pooled LDAP connection freed up in time."""
+
+
+class LdapConnectionPool:
+    """
+    Bounded pool of open connections to an LDAP server.
+
+    With credentials, connections are bound once when opened and reused for
+    searches; without, they are only opened, for callers that bind on them.
+    At most `size` connections exist; `connection()` waits up to `timeout`
+    seconds for a free one. Connections that raised are closed, idle ones
+    are health checked (see `LDAP_HEALTH_CHECK_INTERVAL`) before reuse.
+    Once the pool is closed, connections in use are closed when returned.
+    """
+
+    def __init__(
+        self,
+        server: Server,
+        size: int,
+        timeout: float,
+        user: str | None = None,
+        password: str | None = None,
+        **connection_kwargs: Any,
+    ) -> None:
+        self.server = server
+        self.size = size
+        self.timeout = timeout
+        self.__user = user
+        self.__password = password
+        self.__connection_kwargs = connection_kwargs
+        # (connection, time.monotonic() it was last returned), most recent last
+        self.__idle: list[tuple[Connection, float]] = []
+        self.__slots = threading.BoundedSemaphore(size)
+        self.__lock = threading.Lock()
+        self.__closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        if not self.__slots.acquire(timeout=self.timeout):
+            raise LdapPoolTimeoutError(
+                f"No LDAP connection available after {self.timeout}s"
+            )
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except Exception:
+            if conn is not None:
+                self._close(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self.__lock:
+                    closed = self.__closed
+                    if not closed:
+                        self.__idle.append((conn, time.monotonic()))
+                if closed:
+                    self._close(conn)
+            self.__slots.release()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__closed = True
+            idle, self.__idle = self.__idle, []
+        for conn, _ in idle:
+            self._close(conn)
+
+    def _checkout(self) -> Connection:
+        while True:
+            with self.__lock:
+                if not self.__idle:
+                    break
+                conn, returned_at = self.__idle.pop()
+            if conn.closed:
+                continue
+            if time.monotonic() - returned_at < LDAP_HEALTH_CHECK_INTERVAL:
+                return conn
+            try:
+                if conn.search("", "(objectClass=*)", BASE, attributes=["1.1"]):
+                    return conn
+            except Exception as e:
+                logger.info(f"Dropping stale LDAP connection: {e}")
+            self._close(conn)
+        return self._open()
+
+    def _open(self) -> Connection:
+        conn = Connection(
+            self.server,
+            user=self.__user,
+            password=self.__password,
+            **self.__connection_kwargs,
+        )
+        if self.__user:
+            # The schema is read by the first bind only, it is kept by the server
+            if not conn.bind(read_server_info=self.server.schema is None):
+                self._close(conn)
+                raise ConnectionError(f"LDAP service bind failed: {conn.result}")
+        else:
+            conn.open()
+        return conn
+
+    @staticmethod
+    def _close(conn: Connection) -> None:
+        try:
+            conn.unbind()
+        except Exception as e:
+            logger.debug(f"Failed to close LDAP connection: {e}")
+
+
+class LdapDirectory:
+    """
+    Pooled access to the directory of one LDAP configuration.
+
+    Searches run on connections bound as the service account (anonymous
+    ones when `LDAP_BIND_PASSWORD` is empty); passwords are verified by
+    rebinding connections of a second pool as the user. Logging in costs a
+    search and a bind, without new connections or schema reads.
+
+    Calls block: they are made from sync routes and Celery tasks, on worker
+    threads, and the pools' slots bound how many of those wait on the
+    directory at once.
+    """
+
+    def __init__(self, config: Settings, client_strategy: str = SYNC) -> None:
+        self.config = config
+        server = Server(
+            config.LDAP_HOST,
+            port=config.LDAP_PORT,
+            get_info=ALL,
+            connect_timeout=config.LDAP_TIMEOUT,
+        )
+        kwargs: dict[str, Any] = {
+            "client_strategy": client_strategy,
+            "receive_timeout": config.LDAP_TIMEOUT,
+        }
+        # Bind with the service account if provided, otherwise anonymously
+        service_account = bool(config.LDAP_BIND_DN and config.LDAP_BIND_PASSWORD)
+        self.search_pool = LdapConnectionPool(
+            server,
+            config.LDAP_POOL_SIZE,
+            config.LDAP_POOL_TIMEOUT,
+            user=config.LDAP_BIND_DN if service_account else None,
+            password=config.LDAP_BIND_PASSWORD if service_account else None,
+            **kwargs,
+        )
+        self.bind_pool = LdapConnectionPool(
+            server, config.LDAP_POOL_SIZE, config.LDAP_POOL_TIMEOUT, **kwargs
+        )
+
+    def find_user(self, username: str) -> Entry | None:
+        """Directory entry of a user, None if not found."""
+        config = self.config
+        with self.search_pool.connection() as conn:
+            conn.search(
+                search_base=config.LDAP_BASE_DN,
+                search_filter=config.LDAP_USER_FILTER.format(username=username),
+                search_scope=SUBTREE,
+                attributes=[
+                    config.LDAP_USERNAME_ATTRIBUTE,
+                    config.LDAP_EMAIL_ATTRIBUTE,
+                    config.LDAP_FULLNAME_ATTRIBUTE,
+                ],
+            )
+            return conn.entries[0] if conn.entries else None
+
+    def iter_users(self, page_size: int) -> Iterator[dict[str, Any]]:
+        """Every user matching `LDAP_USER_FILTER`, in pages of `page_size`."""
+        config = self.config
+        with self.search_pool.connection() as conn:
+            for response in conn.extend.standard.paged_search(
+                search_base=config.LDAP_BASE_DN,
+                search_filter=config.LDAP_USER_FILTER.format(username="*"),
+                search_scope=SUBTREE,
+                attributes=[
+                    config.LDAP_USERNAME_ATTRIBUTE,
+                    config.LDAP_EMAIL_ATTRIBUTE,
+                    config.LDAP_FULLNAME_ATTRIBUTE,
+                ],
+                paged_size=page_size,
+                generator=True,
+            ):
+                if response["type"] == "searchResEntry":
+                    yield response
+
+    def verify_password(self, user_dn: str, password: str) -> bool:
+        # An empty password would make an unauthenticated bind, which succeeds
+        if not password:
+            return False
+        with self.bind_pool.connection() as conn:
+            return bool(
+                conn.rebind(user=user_dn, password=password, read_server_info=False)
+            )
+
+    def close(self) -> None:
+        self.search_pool.close()
+        self.bind_pool.close()
+
+
+_directory: LdapDirectory | None = None
+_directory_lock = threading.Lock()
+
+
+def _server_key(config: Settings) -> tuple[str | None, int, str | None, str | None]:
+    """Settings that require new connections when they change."""
+    return (
+        config.LDAP_HOST,
+        config.LDAP_PORT,
+        config.LDAP_BIND_DN,
+        config.LDAP_BIND_PASSWORD,
+    )
+
+
+def get_directory(config: Settings) -> LdapDirectory:
+    """Directory for the current configuration, recreated when it changes."""
+    global _directory
+    with _directory_lock:
+        directory = _directory
+        if directory is None or _server_key(directory.config) != _server_key(config):
+            if directory is not None:
+                directory.close()
+            directory = _directory = LdapDirectory(config)
+        # Search settings may change without reconnecting
+        directory.config = config
+        return directory
+
+
+def authenticate(username: str, password: str) -> dict[str, str | None] | None:
+    """
+    Check a password against the directory entry of `username`.
+
+    Returns the entry as `{"dn", "username", "email", "full_name"}`, None if
+    the user is unknown or the password is wrong.
+    """
+    config = runtime_settings.get()
+    if not config.LDAP_ENABLED:
         logger.error("LDAP is disabled")
         return None
 
-    if not settings.ldap_configured:
+    if not config.ldap_configured:
         logger.error("LDAP is not configured")
         return None
 
     try:
-        server = Server(settings.LDAP_HOST, port=settings.LDAP_PORT, get_info=ALL)
-
-        # Bind with service account if provided, otherwise anonymous
-        if settings.LDAP_BIND_DN and settings.LDAP_BIND_PASSWORD:
-            conn = Connection(
-                server,
-                user=settings.LDAP_BIND_DN,
-                password=settings.LDAP_BIND_PASSWORD,
-                auto_bind=True,
-            )
-        else:
-            conn = Connection(server, auto_bind=True)
-
-        # Search for the user
-        conn.search(
-            search_base=settings.LDAP_BASE_DN,
-            search_filter=settings.LDAP_USER_FILTER.format(username=username),
-            search_scope=SUBTREE,
-            attributes=[
-                settings.LDAP_USERNAME_ATTRIBUTE,
-                settings.LDAP_EMAIL_ATTRIBUTE,
-                settings.LDAP_FULLNAME_ATTRIBUTE,
-            ],
-        )
+        directory = get_directory(config)
 
-        if not conn.entries:
+        user_entry = directory.find_user(username)
+        if user_entry is None:
             logger.info(f"LDAP user not found: {username}")
             return None
 
-        user_entry = conn.entries[0]
-        user_dn = user_entry.entry_dn
-
         # Verify password by binding as the user
-        user_conn = Connection(server, user=user_dn, password=password)
-        if not user_conn.bind():
+        if not directory.verify_password(user_entry.entry_dn, password):
             logger.info(f"LDAP password verification failed for user: {username}")
             return None
 
         # Extract user info
         email = (
-            str(user_entry[settings.LDAP_EMAIL_ATTRIBUTE])
-            if settings.LDAP_EMAIL_ATTRIBUTE in user_entry
+            str(user_entry[config.LDAP_EMAIL_ATTRIBUTE])
+            if config.LDAP_EMAIL_ATTRIBUTE in user_entry
             else None
         )
         full_name = (
-            str(user_entry[settings.LDAP_FULLNAME_ATTRIBUTE])
-            if settings.LDAP_FULLNAME_ATTRIBUTE in user_entry
+            str(user_entry[config.LDAP_FULLNAME_ATTRIBUTE])
+            if config.LDAP_FULLNAME_ATTRIBUTE in user_entry
             else None
         )
 
-        return {"username": username, "email": email, "full_name": full_name}
+        return {
+            "dn": user_entry.entry_dn,
+            "username": username,
+            "email": email,
+            "full_name": full_name,
+        }
 
     except Exception as e:
         logger.error(f"LDAP authentication error: {e}")
         return None
+
+
+def verify_user(user_dn: str, password: str) -> bool:
+    """Check the password of a user synced from the directory, with one bind."""
+    config = runtime_settings.get()
+    if not config.ldap_configured:
+        logger.error("LDAP is not configured")
+        return False
+    try:
+        return get_directory(config).verify_password(user_dn, password)
+    except Exception as e:
+        logger.error(f"LDAP authentication error: {e}")
+        return False
+
+
+def _first_value(attributes: dict[str, Any], name: str) -> str | None:
+    value = attributes.get(name)
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return str(value) if value else None
+
+
+def fetch_directory_users() -> list[dict[str, str | None]]:
+    """
+    Every user of the directory, as `{"dn", "username", "email", "full_name"}`.
+
+    Read with paged searches of `LDAP_SYNC_PAGE_SIZE` entries, so large
+    directories neither hit server size limits nor load in one response.
+    """
+    config = runtime_settings.get()
+    directory = get_directory(config)
+    return [
+        {
+            "dn": entry["dn"],
+            "username": _first_value(
+                entry["attributes"], config.LDAP_USERNAME_ATTRIBUTE
+            ),
+            "email": _first_value(entry["attributes"], config.LDAP_EMAIL_ATTRIBUTE),
+            "full_name": _first_value(
+                entry["attributes"], config.LDAP_FULLNAME_ATTRIBUTE
+            ),
+        }
+        for entry in directory.iter_users(config.LDAP_SYNC_PAGE_SIZE)
+    ]
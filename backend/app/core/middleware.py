@@ -6,16 +6,20 @@ import uuid
 import jwt
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.responses import Response
+from starlette.types import ASGIApp
 
-from app.core.cache import cache
-from app.core.casbin import enforcer
+from app.core.casbin import enforcer, ensure_policy_loaded
 from app.core.config import settings
+from app.core.credentials import app_credentials
 from app.core.database import engine
-from app.core.security import ALGORITHM
-from app.model.application import Application
+from app.core.nonce import NONCE_WINDOW, nonce_store
+from app.core.ratelimit import RateLimitRules, rate_limiter
+from app.core.security import decode_token
 from app.model.user import User
 
 
@@ -29,6 +33,9 @@ class CasbinMiddleware(BaseHTTPMiddleware):
         if request.method == "OPTIONS":
             return await call_next(request)
 
+        # Load policies if the startup phase did not (no-op afterwards)
+        ensure_policy_loaded()
+
         # Extract Authorization header
         authorization = request.headers.get("Authorization")
 
@@ -39,8 +46,7 @@ class CasbinMiddleware(BaseHTTPMiddleware):
         if authorization and authorization.startswith("Bearer "):
             token = authorization.split(" ")[1]
             try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-                user_id = payload.get("sub")
+                user_id = decode_token(token).sub
 
                 if user_id:
                     try:
@@ -63,8 +69,11 @@ class CasbinMiddleware(BaseHTTPMiddleware):
                             # Determine subject
                             if user.role:
                                 subject = f"api:{user.role.name}"
+                            # Identify the caller to the rate limiter
+                            request.state.user_id = user_id
+                            request.state.role = subject.removeprefix("api:")
 
-            except jwt.PyJWTError:
+            except (jwt.PyJWTError, ValidationError):
                 return JSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"detail": "Could not validate credentials"},
@@ -97,18 +106,12 @@ class OpenApiMiddleware(BaseHTTPMiddleware):
         x_sign = request.headers.get("X-Sign")
         x_trace_id = request.headers.get("X-Trace-Id")
 
-        # 1. Prevent replay attacks
+        # 1. Require a nonce (claimed once the signature is verified)
         if not x_trace_id:
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Missing X-Trace-Id header"},
             )
-        trace_key = f"openapi:trace:{x_trace_id}"
-        if cache.redis.get(trace_key):
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Replay attack detected"},
-            )
 
         # 2. Check timestamp (e.g., 15 minutes expiration)
         if not x_timestamp:
@@ -123,9 +126,9 @@ class OpenApiMiddleware(BaseHTTPMiddleware):
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Invalid timestamp format"},
             )
-        # Check if timestamp is within allowed window (900 seconds)
+        # Check if timestamp is within allowed window
         current_timestamp = int(time.time())
-        if abs(current_timestamp - timestamp_int) > 900:
+        if abs(current_timestamp - timestamp_int) > NONCE_WINDOW:
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Timestamp expired"},
@@ -144,37 +147,92 @@ class OpenApiMiddleware(BaseHTTPMiddleware):
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Invalid App ID format"},
             )
-        # Retrieve application from database
-        with Session(engine) as session:
-            statement = select(Application).where(Application.app_id == app_uuid)
-            app = session.exec(statement).first()
-            if not app or not app.is_active:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Invalid App ID or App is inactive"},
-                )
+        # Retrieve the application key (cached, see AppCredentials)
+        app_key = await app_credentials.get_app_key(app_uuid)
+        if not app_key:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Invalid App ID or App is inactive"},
+            )
 
-            # 4. Verify Signature
-            if not x_sign:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Missing X-Sign header"},
-                )
-            # Construct expected signature
-            sign_str = (
-                f"app_id={x_app_id}&timestamp={x_timestamp}&trace_id={x_trace_id}"
+        # 4. Verify Signature
+        if not x_sign:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Missing X-Sign header"},
             )
-            expected_sign = hmac.new(
-                app.app_key.encode("utf-8"), sign_str.encode("utf-8"), hashlib.sha256
-            ).hexdigest()
+        # Construct expected signature
+        sign_str = f"app_id={x_app_id}&timestamp={x_timestamp}&trace_id={x_trace_id}"
+        expected_sign = hmac.new(
+            app_key.encode("utf-8"), sign_str.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
 
-            if not hmac.compare_digest(expected_sign, x_sign):
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Invalid Signature"},
-                )
+        if not hmac.compare_digest(expected_sign, x_sign):
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Invalid Signature"},
+            )
+
+        # 5. Prevent replay attacks: claim the Trace ID, atomically, for as
+        # long as its timestamp is accepted
+        if not await nonce_store.claim(str(app_uuid), x_trace_id, timestamp_int):
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Replay attack detected"},
+            )
 
-        # Cache Trace ID with expiration (900s matches timestamp window)
-        cache.redis.set(trace_key, "1", ex=900)
+        # Identify the caller to the rate limiter
+        request.state.app_id = x_app_id
 
         return await call_next(request)
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Apply the quotas of `RATE_LIMITS`, after the caller has been authenticated.
+
+    Must be added before CasbinMiddleware and OpenApiMiddleware, so that it
+    runs inside them and sees the application or user they identified.
+    """
+
+    def __init__(self, app: ASGIApp, rules: RateLimitRules | None = None) -> None:
+        super().__init__(app)
+        self.rules = rules or RateLimitRules(
+            settings.RATE_LIMITS, settings.RATE_LIMIT_DEFAULT
+        )
+
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        if not self.rules or request.method == "OPTIONS":
+            return await call_next(request)
+
+        app_id = getattr(request.state, "app_id", None)
+        user_id = getattr(request.state, "user_id", None)
+        if app_id:
+            client = f"app:{app_id}"
+        elif user_id:
+            client = f"user:{user_id}"
+        else:
+            # Behind a trusted proxy (see scripts/start.sh), the real client
+            client = f"ip:{request.client.host if request.client else 'unknown'}"
+        buckets = self.rules.resolve(
+            client,
+            request.method,
+            request.url.path,
+            app_id=app_id,
+            role=getattr(request.state, "role", "guest"),
+        )
+        result = await rate_limiter.hit(buckets) if buckets else None
+        if result is None:
+            return await call_next(request)
+        if not result.allowed:
+            return JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Rate limit exceeded"},
+                headers=result.headers,
+            )
+
+        response = await call_next(request)
+        response.headers.update(result.headers)
+        return response
@@ -0,0 +1,99 @@
+import hashlib
+import math
+import threading
+
+from app.core.cache import cache
+from app.core.config import settings
+
+NONCE_CACHE_PREFIX = "openapi:nonce"
+# Signed requests are accepted for this many seconds either side of their
+# timestamp, so a nonce must be remembered for as long
+NONCE_WINDOW = 900
+# Nonces are grouped by the minute of their signed timestamp: a replay must
+# carry the same timestamp, so it always lands in the same bucket
+NONCE_BUCKET_SECONDS = 60
+# Target false positive rate of the optional in-process Bloom filter
+NONCE_BLOOM_ERROR_RATE = 1e-6
+
+
+class BloomFilter:
+    """Fixed size Bloom filter over bytes, sized for `capacity` items."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.__bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: bytes) -> list[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item: bytes) -> bool:
+        return all(self.__bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: bytes) -> None:
+        for p in self._positions(item):
+            self.__bits[p >> 3] |= 1 << (p & 7)
+
+
+class NonceStore:
+    """
+    Replay protection for signed OpenAPI calls.
+
+    Each (app, minute of the signed timestamp) bucket is one Redis set of
+    8-byte nonce digests that expires once its timestamps fall out of the
+    accepted window, so memory is bounded by the calls of one window and
+    costs a set entry per call rather than a key.
+
+    With `OPENAPI_NONCE_BLOOM_CAPACITY` set, nonces claimed by this process
+    are also added to a per-bucket Bloom filter, which rejects their replays
+    without a Redis round trip (at a `NONCE_BLOOM_ERROR_RATE` risk of
+    rejecting a fresh nonce).
+    """
+
+    def __init__(self) -> None:
+        self.__filters: dict[int, BloomFilter] = {}
+        self.__lock = threading.Lock()
+
+    async def claim(self, app_id: str, nonce: str, timestamp: int) -> bool:
+        """Record a nonce, False if it was already used (a replay)."""
+        bucket = timestamp // NONCE_BUCKET_SECONDS
+        digest = hashlib.blake2b(f"{app_id}:{nonce}".encode(), digest_size=8).digest()
+
+        bloom = self._bloom(bucket)
+        if bloom is not None and digest in bloom:
+            return False
+
+        # Check and claim in one atomic round trip
+        key = f"{NONCE_CACHE_PREFIX}:{app_id}:{bucket}"
+        pipe = cache.async_redis.pipeline(transaction=True)
+        pipe.sadd(key, digest)
+        pipe.expireat(key, (bucket + 1) * NONCE_BUCKET_SECONDS + NONCE_WINDOW)
+        added, _ = await pipe.execute()
+
+        if bloom is not None:
+            with self.__lock:
+                bloom.add(digest)
+        return bool(added)
+
+    def _bloom(self, bucket: int) -> BloomFilter | None:
+        capacity = settings.OPENAPI_NONCE_BLOOM_CAPACITY
+        if not capacity:
+            return None
+        with self.__lock:
+            bloom = self.__filters.get(bucket)
+            if bloom is None:
+                bloom = self.__filters[bucket] = BloomFilter(
+                    capacity, NONCE_BLOOM_ERROR_RATE
+                )
+                # Drop the filters of buckets no longer accepted
+                oldest = bucket - 2 * NONCE_WINDOW // NONCE_BUCKET_SECONDS - 1
+                for stale in [b for b in self.__filters if b < oldest]:
+                    del self.__filters[stale]
+            return bloom
+
+
+nonce_store = NonceStore()
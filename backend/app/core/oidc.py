@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import jwt
+
+from app.core.config import Settings, settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Cached documents are refreshed in the background once this share of
+# OIDC_METADATA_TTL has passed, so logins do not wait for the provider
+OIDC_REFRESH_AHEAD = 0.8
+# Minimum seconds between key reloads caused by an unknown key id, so that
+# tokens with made-up key ids cannot make every login hit the provider
+OIDC_JWKS_MIN_REFRESH_INTERVAL = 60
+# Seconds of clock difference with the provider tolerated on exp/iat/nbf
+OIDC_CLOCK_SKEW = 30
+
+
+class OidcError(Exception):
+    """Raised when the provider refused a login or returned unusable data."""
+
+
+def _parse_discovery(document: Any) -> dict[str, Any]:
+    if not isinstance(document, dict) or not all(
+        isinstance(document.get(key), str) for key in ("issuer", "jwks_uri")
+    ):
+        raise OidcError("Discovery document lacks issuer or jwks_uri")
+    return document
+
+
+def _parse_jwks(document: Any) -> dict[str | None, jwt.PyJWK]:
+    """Signing keys by key id; keys for other uses or algorithms are skipped."""
+    try:
+        keys = jwt.PyJWKSet.from_dict(document).keys
+    except (jwt.PyJWKSetError, TypeError) as e:
+        raise OidcError(f"Invalid JWKS: {e}") from e
+    return {key.key_id: key for key in keys if key.public_key_use in (None, "sig")}
+
+
+class OidcClient:
+    """
+    Client for the OpenID Connect provider, shared for the app's lifetime.
+
+    Requests reuse a pool of keep-alive connections (multiplexed over HTTP/2
+    when the provider supports it), so logins skip the TCP and TLS handshakes.
+    The discovery document and signing keys are cached for `metadata_ttl`
+    seconds and refreshed in the background before they expire; an ID token
+    signed with an unknown key reloads the keys at once, for key rotations.
+    """
+
+    def __init__(
+        self,
+        *,
+        verify: bool = True,
+        pool_size: int = 20,
+        timeout: float = 10.0,
+        metadata_ttl: float = 3600,
+        transport: Any = None,
+    ) -> None:
+        self.verify = verify
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.metadata_ttl = metadata_ttl
+        self.__transport = transport
+        self.__client: httpx.AsyncClient | None = None
+        self.__loop: asyncio.AbstractEventLoop | None = None
+        # url -> (parsed document, time.monotonic() it was fetched)
+        self.__documents: dict[str, tuple[Any, float]] = {}
+        # url -> fetch in progress, shared by concurrent logins
+        self.__fetches: dict[str, asyncio.Task[Any]] = {}
+        # Clients of previous event loops being closed
+        self.__closing: set[asyncio.Task[None]] = set()
+
+    def _close_stale(
+        self, client: "httpx.AsyncClient", loop: asyncio.AbstractEventLoop | None
+    ) -> None:
+        """Close the client of another event loop, on that loop while it runs."""
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        task = asyncio.create_task(client.aclose())
+        self.__closing.add(task)
+        task.add_done_callback(self.__closing.discard)
+
+    def _http(self) -> "httpx.AsyncClient":
+        # Imported lazily: httpx is only needed when OIDC is enabled
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self.__client is None or self.__loop is not loop:
+            # Connections and tasks belong to the event loop that created them
+            if self.__client is not None:
+                self._close_stale(self.__client, self.__loop)
+            self.__client = httpx.AsyncClient(
+                http2=True,
+                verify=self.verify,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                transport=self.__transport,
+            )
+            self.__loop = loop
+            self.__fetches = {}
+        return self.__client
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """JSON body of a successful response."""
+        import httpx
+
+        try:
+            response = await self._http().request(method, url, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise OidcError(f"{method} {url} failed: {e}") from e
+
+    async def _fetch(self, url: str, parse: Callable[[Any], Any]) -> Any:
+        value = parse(await self._request("GET", url))
+        self.__documents[url] = (value, time.monotonic())
+        return value
+
+    def _fetch_task(self, url: str, parse: Callable[[Any], Any]) -> asyncio.Task[Any]:
+        self._http()
+        fetches = self.__fetches
+        task = fetches.get(url)
+        if task is None:
+            task = fetches[url] = asyncio.create_task(self._fetch(url, parse))
+
+            def done(task: asyncio.Task[Any]) -> None:
+                if fetches.get(url) is task:
+                    del fetches[url]
+                if not task.cancelled() and task.exception():
+                    logger.warning(f"Failed to refresh {url}: {task.exception()}")
+
+            task.add_done_callback(done)
+        return task
+
+    async def _document(self, url: str, parse: Callable[[Any], Any]) -> Any:
+        """Cached document, fetched once by concurrent callers."""
+        cached = self.__documents.get(url)
+        if cached is None:
+            return await asyncio.shield(self._fetch_task(url, parse))
+        value, fetched_at = cached
+        age = time.monotonic() - fetched_at
+        if age < self.metadata_ttl * OIDC_REFRESH_AHEAD:
+            return value
+        task = self._fetch_task(url, parse)
+        if age < self.metadata_ttl:
+            return value
+        try:
+            return await asyncio.shield(task)
+        except OidcError as e:
+            # Keep logins working while the provider is unreachable
+            logger.warning(f"Using expired {url}: {e}")
+            return value
+
+    async def _signing_key(self, jwks_uri: str, kid: str | None) -> jwt.PyJWK | None:
+        keys: dict[str | None, jwt.PyJWK] = await self._document(jwks_uri, _parse_jwks)
+        if kid not in keys:
+            _, fetched_at = self.__documents[jwks_uri]
+            if time.monotonic() - fetched_at >= OIDC_JWKS_MIN_REFRESH_INTERVAL:
+                # The provider may have rotated its keys since they were cached
+                keys = await asyncio.shield(self._fetch_task(jwks_uri, _parse_jwks))
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        return keys.get(kid)
+
+    async def verify_id_token(self, id_token: str, config: Settings) -> dict[str, Any]:
+        """Claims of an ID token, once its signature, issuer and audience check out."""
+        if not config.OIDC_ISSUER:
+            raise OidcError("OIDC_ISSUER is not set")
+        discovery = await self._document(
+            f"{config.OIDC_ISSUER.rstrip('/')}/.well-known/openid-configuration",
+            _parse_discovery,
+        )
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError as e:
+            raise OidcError(f"Invalid ID token: {e}") from e
+        key = await self._signing_key(discovery["jwks_uri"], header.get("kid"))
+        if key is None:
+            raise OidcError("ID token is signed with an unknown key")
+        try:
+            claims: dict[str, Any] = jwt.decode(
+                id_token,
+                key.key,
+                algorithms=[key.algorithm_name],
+                audience=config.OIDC_CLIENT_ID,
+                issuer=discovery["issuer"],
+                leeway=OIDC_CLOCK_SKEW,
+                options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise OidcError(f"Invalid ID token: {e}") from e
+        return claims
+
+    async def exchange_code(
+        self, config: Settings, code: str, redirect_uri: str
+    ) -> dict[str, Any]:
+        """
+        Claims of the user who logged in with an authorization code.
+
+        Read from the verified ID token when `OIDC_ISSUER` is set, otherwise
+        from the userinfo endpoint, with the access token.
+        """
+        if not config.OIDC_TOKEN_URL:
+            raise OidcError("OIDC_TOKEN_URL is not set")
+        tokens = await self._request(
+            "POST",
+            config.OIDC_TOKEN_URL,
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": redirect_uri,
+                "client_id": config.OIDC_CLIENT_ID,
+                "client_secret": config.OIDC_CLIENT_SECRET,
+            },
+        )
+        if not isinstance(tokens, dict):
+            raise OidcError("Invalid token response")
+        if config.OIDC_ISSUER:
+            if not tokens.get("id_token"):
+                raise OidcError("Token response lacks an ID token")
+            return await self.verify_id_token(tokens["id_token"], config)
+        if not tokens.get("access_token"):
+            raise OidcError("Token response lacks an access token")
+        if not config.OIDC_USERINFO_URL:
+            raise OidcError("OIDC_USERINFO_URL is not set")
+        claims = await self._request(
+            "GET",
+            config.OIDC_USERINFO_URL,
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        )
+        if not isinstance(claims, dict):
+            raise OidcError("Invalid userinfo response")
+        return claims
+
+    async def aclose(self) -> None:
+        for task in self.__fetches.values():
+            task.cancel()
+        self.__fetches = {}
+        client, self.__client = self.__client, None
+        if client is not None:
+            if self.__loop is asyncio.get_running_loop():
+                await client.aclose()
+            else:
+                self._close_stale(client, self.__loop)
+        await asyncio.gather(*self.__closing, return_exceptions=True)
+
+
+oidc_client = OidcClient(
+    verify=settings.OIDC_TLS_VERIFY,
+    pool_size=settings.OIDC_HTTP_POOL_SIZE,
+    timeout=settings.OIDC_HTTP_TIMEOUT,
+    metadata_ttl=settings.OIDC_METADATA_TTL,
+)
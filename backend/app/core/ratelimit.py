@@ -0,0 +1,277 @@
+import logging
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import redis
+from redis.commands.core import AsyncScript
+from starlette.routing import compile_path
+
+from app.core.cache import ExpiringLRU, cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_PREFIX = "ratelimit"
+RATE_LIMIT_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+# Upper bound on leases kept in process memory
+RATE_LIMIT_LOCAL_MAX_SIZE = 10000
+
+# Generic cell rate algorithm over several buckets at once. Each bucket stores
+# its theoretical arrival time (TAT, in ms); a request is allowed if every
+# bucket has room, and then charged to all of them.
+#
+# KEYS: the buckets. ARGV[1]: tokens wanted (a larger value leases tokens for
+# the local pre-check), ARGV[2]: unspent tokens of an expired lease, given back
+# first, then the emission interval and burst tolerance (ms) of each bucket.
+# Returns {granted, bucket index, remaining, reset ms, retry ms}.
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local wanted = tonumber(ARGV[1])
+local refund = tonumber(ARGV[2])
+local tats = {}
+local granted = wanted
+local rejected, retry = 0, 0
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2 + 1])
+    local tolerance = tonumber(ARGV[i * 2 + 2])
+    local stored = tonumber(redis.call('GET', key) or now)
+    local tat = math.max(stored - refund * interval, now)
+    local capacity = math.floor((tolerance - (tat - now)) / interval)
+    if capacity < 1 and tat + interval - tolerance - now > retry then
+        rejected, retry = i, tat + interval - tolerance - now
+    end
+    tats[i] = tat
+    granted = math.min(granted, capacity)
+end
+if granted < 1 then
+    if refund > 0 then
+        for i, key in ipairs(KEYS) do
+            if tats[i] > now then
+                redis.call('SET', key, tats[i], 'PX', math.ceil(tats[i] - now))
+            else
+                redis.call('DEL', key)
+            end
+        end
+    end
+    return {0, rejected, 0, 0, math.ceil(retry)}
+end
+local index, remaining, reset = 1, -1, 0
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2 + 1])
+    local tolerance = tonumber(ARGV[i * 2 + 2])
+    local tat = tats[i] + granted * interval
+    redis.call('SET', key, tat, 'PX', math.ceil(tat - now))
+    local left = math.floor((tolerance - (tat - now)) / interval)
+    if remaining < 0 or left < remaining then
+        index, remaining, reset = i, left, tat - now
+    end
+end
+return {granted, index, remaining, math.ceil(reset), 0}
+"""
+
+
+@dataclass(frozen=True)
+class Quota:
+    """`limit` requests per `period` seconds, which may all arrive in a burst."""
+
+    limit: int
+    period: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Quota":
+        """Parse a quota such as `100/minute`."""
+        limit, _, period = (part.strip() for part in value.partition("/"))
+        if period not in RATE_LIMIT_PERIODS or not limit.isdigit() or not int(limit):
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return cls(limit=int(limit), period=RATE_LIMIT_PERIODS[period])
+
+    @property
+    def interval_ms(self) -> float:
+        return self.period * 1000 / self.limit
+
+    @property
+    def tolerance_ms(self) -> int:
+        return self.period * 1000
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the quota is fully replenished
+    reset: int
+    # Seconds until a rejected request may be retried
+    retry_after: int = 0
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+@dataclass
+class _Lease:
+    """Tokens granted by Redis ahead of time, spent without a round trip."""
+
+    tokens: int
+    limit: int
+    remaining: int
+    # time.monotonic() deadlines
+    reset_at: float
+    expires_at: float
+
+
+class RateLimiter:
+    """
+    GCRA rate limiter shared by all workers through Redis.
+
+    Clients well under their limit lease a few tokens per round trip (see
+    `RATE_LIMIT_LOCAL_BATCH`) and spend them in process, so most of their
+    requests are checked locally; near the limit every request goes to Redis.
+    Tokens left when a lease expires are given back on the next round trip,
+    so a client is only charged for the requests it made.
+    """
+
+    def __init__(self) -> None:
+        self.__script: AsyncScript | None = None
+        # Kept until the buckets are replenished, after the lease expired:
+        # its remaining tokens tell how close the client is to its limit
+        self.__leases: ExpiringLRU[tuple[str, ...], _Lease] = ExpiringLRU(
+            RATE_LIMIT_LOCAL_MAX_SIZE
+        )
+        self.__lock = threading.Lock()
+
+    async def hit(self, buckets: list[tuple[str, Quota]]) -> RateLimitResult | None:
+        """
+        Charge one request to every bucket, or reject it if any is exhausted.
+
+        The result describes the most constrained bucket. None is returned
+        when Redis is unavailable: the limiter fails open.
+        """
+        keys = tuple(key for key, _ in buckets)
+        now = time.monotonic()
+        with self.__lock:
+            lease = self.__leases.get(keys, now)
+            if lease and lease.tokens > 0 and lease.expires_at > now:
+                lease.tokens -= 1
+                return RateLimitResult(
+                    allowed=True,
+                    limit=lease.limit,
+                    remaining=lease.remaining + lease.tokens,
+                    reset=math.ceil(lease.reset_at - now),
+                )
+            # Unspent tokens of the expired lease go back with this round
+            # trip (and only with this one, for concurrent requests)
+            refund = lease.tokens if lease else 0
+            if lease:
+                lease.tokens = 0
+
+        # Lease tokens only while the client is obviously under its limit
+        batch = settings.RATE_LIMIT_LOCAL_BATCH
+        wanted = max(batch, 1) if lease and lease.remaining >= 2 * batch else 1
+        try:
+            granted, index, remaining, reset_ms, retry_ms = await self._run(
+                buckets, wanted, refund
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter unavailable: {e}")
+            return None
+
+        quota = buckets[index - 1][1]
+        result = RateLimitResult(
+            allowed=granted > 0,
+            limit=quota.limit,
+            remaining=remaining + granted - 1 if granted else 0,
+            reset=math.ceil(reset_ms / 1000),
+            retry_after=math.ceil(retry_ms / 1000),
+        )
+        lease = _Lease(
+            tokens=max(granted - 1, 0),
+            limit=quota.limit,
+            remaining=remaining,
+            reset_at=now + reset_ms / 1000,
+            expires_at=now + settings.RATE_LIMIT_LOCAL_TTL,
+        )
+        self.__leases.set(keys, lease, max(lease.reset_at, lease.expires_at))
+        return result
+
+    async def _run(
+        self, buckets: list[tuple[str, Quota]], wanted: int, refund: int = 0
+    ) -> list[int]:
+        if self.__script is None:
+            self.__script = cache.async_redis.register_script(GCRA_SCRIPT)
+        args: list[float] = [wanted, refund]
+        for _, quota in buckets:
+            args += [quota.interval_ms, quota.tolerance_ms]
+        values = await self.__script(
+            keys=[f"{RATE_LIMIT_PREFIX}:{key}" for key, _ in buckets], args=args
+        )
+        return [int(value) for value in values]
+
+
+class RateLimitRules:
+    """Quotas from `RATE_LIMITS` and `RATE_LIMIT_DEFAULT`, resolved per request."""
+
+    def __init__(self, rules: dict[str, str], default: str | None = None) -> None:
+        self.default = Quota.parse(default) if default else None
+        self.apps: dict[str, Quota] = {}
+        self.roles: dict[str, Quota] = {}
+        self.routes: list[tuple[str | None, str, re.Pattern[str], Quota]] = []
+        for name, value in rules.items():
+            kind, _, target = name.partition(":")
+            quota = Quota.parse(value)
+            if kind == "app":
+                self.apps[target] = quota
+            elif kind == "role":
+                self.roles[target] = quota
+            elif kind == "route":
+                method, _, template = target.rpartition(" ")
+                regex, _, _ = compile_path(template)
+                self.routes.append((method.upper() or None, template, regex, quota))
+            else:
+                raise ValueError(f"Invalid rate limit rule: {name!r}")
+
+    def __bool__(self) -> bool:
+        return bool(self.default or self.apps or self.roles or self.routes)
+
+    def resolve(
+        self,
+        client: str,
+        method: str,
+        path: str,
+        app_id: str | None = None,
+        role: str | None = None,
+    ) -> list[tuple[str, Quota]]:
+        """
+        Buckets a request is charged to.
+
+        The client (application, user or address) has one bucket for its
+        application or role quota, falling back to the default one, and one
+        per route template it calls that has a quota of its own.
+        """
+        quota = None
+        if app_id:
+            quota = self.apps.get(app_id, self.apps.get("*"))
+        elif role:
+            quota = self.roles.get(role)
+        quota = quota or self.default
+
+        buckets = [(client, quota)] if quota else []
+        for route_method, template, regex, route_quota in self.routes:
+            if route_method in (None, method) and regex.match(path):
+                buckets.append((f"{client}:{method} {template}", route_quota))
+        return buckets
+
+
+rate_limiter = RateLimiter()
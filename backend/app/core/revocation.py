@@ -0,0 +1,26 @@
+import uuid
+from typing import cast
+
+from app.core.cache import Cache
+
+TOKEN_GENERATION_PREFIX = "token:generation:user"
+
+
+def get_token_generation(cache: Cache, user_id: uuid.UUID | str) -> int:
+    """
+    Current token generation of a user; tokens of older generations are revoked.
+
+    Read through the near cache (when enabled), so checking it on every
+    request is usually a dictionary lookup.
+    """
+    return int(cache.get(f"{TOKEN_GENERATION_PREFIX}:{user_id}") or 0)
+
+
+async def aget_token_generation(cache: Cache, user_id: uuid.UUID | str) -> int:
+    """Like `get_token_generation`, with the asyncio client."""
+    return int(await cache.aget(f"{TOKEN_GENERATION_PREFIX}:{user_id}") or 0)
+
+
+def revoke_user_tokens(cache: Cache, user_id: uuid.UUID | str) -> int:
+    """Revoke all access and refresh tokens issued to a user so far."""
+    return cast(int, cache.redis.incr(f"{TOKEN_GENERATION_PREFIX}:{user_id}"))
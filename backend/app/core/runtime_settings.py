@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from typing import Any
+
+from pydantic import TypeAdapter, ValidationError
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import cache
+from app.core.config import Settings, settings
+from app.core.database import engine
+from app.model.system_setting import SystemSetting
+
+logger = logging.getLogger(__name__)
+
+# Bumped on every change of the overrides, so that all processes reload them
+RUNTIME_SETTINGS_REVISION_KEY = "settings:revision"
+# Seconds between checks of the revision (a dictionary lookup when the near
+# cache is enabled, otherwise a Redis round trip)
+RUNTIME_SETTINGS_CHECK_INTERVAL = 1.0
+
+# Settings that can be overridden from the admin panel (system_settings rows)
+RUNTIME_SETTINGS_KEYS = frozenset(
+    {
+        "PROJECT_NAME",
+        "SENTRY_DSN",
+        "SMTP_HOST",
+        "SMTP_PORT",
+        "SMTP_USER",
+        "SMTP_PASSWORD",
+        "SMTP_TLS",
+        "SMTP_SSL",
+        "EMAILS_FROM_EMAIL",
+        "EMAILS_FROM_NAME",
+        "OIDC_ENABLED",
+        "OIDC_NAME",
+        "OIDC_AUTH_URL",
+        "OIDC_TOKEN_URL",
+        "OIDC_USERINFO_URL",
+        "OIDC_ISSUER",
+        "OIDC_CLIENT_ID",
+        "OIDC_CLIENT_SECRET",
+        "OIDC_SCOPES",
+        "SIGNOUT_REDIRECT_URL",
+        "AUTO_LOGIN",
+        "LDAP_ENABLED",
+        "LDAP_HOST",
+        "LDAP_PORT",
+        "LDAP_BIND_DN",
+        "LDAP_BIND_PASSWORD",
+        "LDAP_BASE_DN",
+        "LDAP_USER_FILTER",
+        "LDAP_EMAIL_ATTRIBUTE",
+        "LDAP_USERNAME_ATTRIBUTE",
+        "LDAP_FULLNAME_ATTRIBUTE",
+    }
+)
+
+# Marks overrides that failed to load, so that they are retried
+_STALE = object()
+
+
+def apply_overrides(base: Settings, overrides: dict[str, str | None]) -> Settings:
+    """Copy of `base` with the stored (string) overrides parsed into their types."""
+    update: dict[str, Any] = {}
+    for key, value in overrides.items():
+        if key not in RUNTIME_SETTINGS_KEYS:
+            continue
+        annotation = Settings.model_fields[key].annotation
+        try:
+            update[key] = TypeAdapter(annotation).validate_python(value)
+        except ValidationError as e:
+            logger.warning(f"Ignoring invalid value of setting {key}: {e}")
+    return base.model_copy(update=update)
+
+
+class RuntimeSettings:
+    """
+    The configuration with the overrides stored in `system_settings` applied.
+
+    Overrides are loaded once and kept in process memory. Writers bump the
+    revision in Redis (see `invalidate`); readers check it at most every
+    `RUNTIME_SETTINGS_CHECK_INTERVAL` seconds and only go to the database
+    when it changed. If Redis is unavailable the loaded overrides are kept.
+    """
+
+    def __init__(self) -> None:
+        self.__settings: Settings | None = None
+        self.__revision: object = None
+        self.__checked_at = 0.0
+        self.__lock = threading.Lock()
+
+    def get(self) -> Settings:
+        """Current settings, for sync code."""
+        now = time.monotonic()
+        current = self._current(now)
+        if current is None:
+            revision: object
+            try:
+                revision = cache.get(RUNTIME_SETTINGS_REVISION_KEY)
+            except Exception as e:
+                logger.debug(f"Settings revision unavailable: {e}")
+                revision = self.__revision
+            current = self._unchanged(revision, now) or self._reload(revision, now)
+        return current
+
+    async def aget(self) -> Settings:
+        """Like `get`, for async code: Redis and the database off the event loop."""
+        now = time.monotonic()
+        current = self._current(now)
+        if current is None:
+            revision: object
+            try:
+                revision = await cache.aget(RUNTIME_SETTINGS_REVISION_KEY)
+            except Exception as e:
+                logger.debug(f"Settings revision unavailable: {e}")
+                revision = self.__revision
+            current = self._unchanged(revision, now)
+            if current is None:
+                current = await run_in_threadpool(self._reload, revision, now)
+        return current
+
+    def invalidate(self) -> None:
+        """Reload the overrides in every process, after they were changed."""
+        try:
+            cache.redis.incr(RUNTIME_SETTINGS_REVISION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to publish a settings change: {e}")
+        with self.__lock:
+            self.__settings = None
+
+    def _current(self, now: float) -> Settings | None:
+        """The loaded settings, if their revision was checked recently."""
+        if now - self.__checked_at < RUNTIME_SETTINGS_CHECK_INTERVAL:
+            return self.__settings
+        return None
+
+    def _unchanged(self, revision: object, now: float) -> Settings | None:
+        """The loaded settings, if they are still at `revision`."""
+        current = self.__settings
+        if current is None or revision != self.__revision:
+            return None
+        self.__checked_at = now
+        return current
+
+    @staticmethod
+    def _load() -> dict[str, str | None] | None:
+        try:
+            with Session(engine) as session:
+                rows = session.exec(select(SystemSetting)).all()
+                return {row.key: row.value for row in rows}
+        except Exception as e:
+            logger.warning(f"Failed to load settings overrides: {e}")
+            return None
+
+    def _reload(self, revision: object, now: float) -> Settings:
+        """
+        Load the overrides at `revision`. Concurrent callers wait for the
+        first one and reuse what it loaded, instead of all querying the
+        database when the revision changes.
+        """
+        with self.__lock:
+            current = self._current(time.monotonic()) or self._unchanged(revision, now)
+            if current is not None:
+                return current
+            overrides = self._load()
+            if overrides is None:
+                # Keep what was loaded before (or the defaults) and retry
+                current = self.__settings or settings
+                revision = _STALE
+            else:
+                current = apply_overrides(settings, overrides)
+            self.__settings = current
+            self.__revision = revision
+            self.__checked_at = now
+            return current
+
+
+runtime_settings = RuntimeSettings()
@@ -1,5 +1,14 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
 # Fix passlib compatibility with bcrypt 4.x
 # bcrypt 4.x removed __about__ module, but passlib still tries to access it
@@ -16,29 +25,278 @@ if not hasattr(bcrypt, "__about__"):
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.model.base import TokenPayload
+
+logger = logging.getLogger(__name__)
 
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Stored instead of a hash for users without a local password (such as the
+# users synced from LDAP): no password verifies against it
+UNUSABLE_PASSWORD = "!"
+
+pwd_context = CryptContext(
+    schemes=settings.PASSWORD_HASH_SCHEMES,
+    deprecated="auto",
+    # Pin the work factor so that hashes made with other rounds need an update
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
+T = TypeVar("T")
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+
+def create_access_token(
+    subject: str | Any, expires_delta: timedelta, generation: int = 0
+) -> str:
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "exp": now + expires_delta,
+        "iat": now,
+        "sub": str(subject),
+        "type": "access",
+        # Token generation of the user (see app.core.revocation)
+        "gen": generation,
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def create_refresh_token(subject: str | Any, expires_delta: timedelta) -> str:
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+def create_refresh_token(
+    subject: str | Any, expires_delta: timedelta, generation: int = 0
+) -> str:
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "exp": now + expires_delta,
+        "iat": now,
+        "sub": str(subject),
+        "type": "refresh",
+        "gen": generation,
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+class TokenCache:
+    """
+    LRU of verified tokens, keyed by a digest of the token string.
+
+    Clients reuse an access token for its whole lifetime, so its signature
+    and claims are checked once per process and then served from memory
+    until it expires. Only successfully verified tokens are stored.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        # digest -> (claims, expiration timestamp)
+        self.__tokens: OrderedDict[bytes, tuple[TokenPayload, float]] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def decode(self, token: str) -> TokenPayload:
+        """
+        Verify a token and parse its claims.
+
+        Raises jwt.InvalidTokenError, or pydantic.ValidationError for claims
+        that do not fit TokenPayload.
+        """
+        digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        with self.__lock:
+            cached = self.__tokens.get(digest)
+            if cached is not None:
+                if cached[1] > time.time():
+                    self.__tokens.move_to_end(digest)
+                    return cached[0]
+                del self.__tokens[digest]
+
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        token_data = TokenPayload(**payload)
+        exp = payload.get("exp")
+        if self.max_size and isinstance(exp, int | float):
+            with self.__lock:
+                self.__tokens[digest] = (token_data, exp)
+                while len(self.__tokens) > self.max_size:
+                    self.__tokens.popitem(last=False)
+        return token_data
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__tokens.clear()
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+
+def decode_token(token: str) -> TokenPayload:
+    """Verify a token and parse its claims, cached until it expires."""
+    return token_cache.decode(token)
+
+
+class PasswordHashingBusyError(Exception):
+    """Raised when too many password hashing jobs are already waiting."""
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for password hashing and verification.
+
+    bcrypt is CPU bound by design (about 250ms per operation), so running it
+    on the request threadpool lets a burst of logins starve every other
+    request. Jobs run on a process pool instead; once `max_pending`
+    interactive jobs are queued or running, new ones are rejected with
+    PasswordHashingBusyError (served as 503) rather than piling up. Callers
+    wait for their job on a request thread, so `max_pending` must stay below
+    the size of the request threadpool (see `limit_pending`).
+
+    Jobs run in the calling thread with `max_workers=0`, and in daemonic
+    processes (Celery prefork workers), which cannot have child processes.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.__executor: ProcessPoolExecutor | None = None
+        self.__lock = threading.Lock()
+        self.__pending = 0
+        self.__bulk_pending = 0
+        self.__completed = 0
+        self.__rejected = 0
+
+    @property
+    def inline(self) -> bool:
+        """Whether jobs run in the calling thread instead of the pool."""
+        return not self.max_workers or multiprocessing.current_process().daemon
+
+    def limit_pending(self, limit: int) -> None:
+        """Lower `max_pending` to at most `limit` jobs."""
+        with self.__lock:
+            self.max_pending = min(self.max_pending, limit)
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a job on the pool and wait for its result."""
+        return self.submit(fn, *args).result()
+
+    def submit(
+        self, fn: Callable[..., T], *args: Any, bounded: bool = True
+    ) -> "Future[T]":
+        """
+        Queue a job. `bounded=False` is for bulk jobs: they are counted
+        apart and do not take the slots of interactive ones.
+        """
+        if self.inline:
+            future: Future[T] = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        with self.__lock:
+            if bounded and self.__pending >= self.max_pending:
+                self.__rejected += 1
+                logger.warning(
+                    f"Password hashing queue is full ({self.__pending} pending)"
+                )
+                raise PasswordHashingBusyError
+            if self.__executor is None:
+                # spawn: forking a multi-threaded server process is not safe
+                self.__executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            if bounded:
+                self.__pending += 1
+            else:
+                self.__bulk_pending += 1
+        future = self.__executor.submit(fn, *args)
+        future.add_done_callback(self.__on_done if bounded else self.__on_bulk_done)
+        return future
+
+    def map(self, fn: Callable[[Any], T], items: Iterable[Any]) -> list[T]:
+        """Run a batch of jobs (bulk operations, not subject to backpressure)."""
+        if self.inline:
+            return [fn(item) for item in items]
+        futures = [self.submit(fn, item, bounded=False) for item in items]
+        return [future.result() for future in futures]
+
+    def __on_done(self, _future: "Future[Any]") -> None:
+        with self.__lock:
+            self.__pending -= 1
+            self.__completed += 1
+
+    def __on_bulk_done(self, _future: "Future[Any]") -> None:
+        with self.__lock:
+            self.__bulk_pending -= 1
+            self.__completed += 1
+
+    def shutdown(self) -> None:
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    def stats(self) -> dict[str, int]:
+        with self.__lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.__pending,
+                "bulk_pending": self.__bulk_pending,
+                "completed": self.__completed,
+                "rejected": self.__rejected,
+            }
+
+
+password_hasher = PasswordHasher(
+    max_workers=(
+        # Each server worker process has its own pool: share the CPUs
+        max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY))
+        if settings.PASSWORD_HASH_WORKERS is None
+        else settings.PASSWORD_HASH_WORKERS
+    ),
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def _hash_password(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
+    return password_hasher.run(_verify_password, plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return password_hasher.run(_hash_password, password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash uses a deprecated scheme or another work factor."""
+    return pwd_context.needs_update(hashed_password)
+
+
+# Runs the background hashes of get_password_hash_async when the pool runs
+# jobs inline (PASSWORD_HASH_WORKERS=0), so they never hold up the caller
+inline_hash_thread = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="password-hash"
+)
+
+
+def get_password_hash_async(password: str) -> "Future[str] | None":
+    """Hash a password in the background; None when the pool is busy."""
+    if password_hasher.inline:
+        return inline_hash_thread.submit(_hash_password, password)
+    try:
+        return password_hasher.submit(_hash_password, password)
+    except PasswordHashingBusyError:
+        return None
+
+
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    """Hash many passwords in parallel on the password hashing pool."""
+    return password_hasher.map(_hash_password, passwords)
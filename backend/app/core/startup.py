@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+from app.core.cache import cache
+from app.core.casbin import ensure_policy_loaded
+from app.core.config import settings
+from app.core.storage import storage
+
+logger = logging.getLogger(__name__)
+
+# External services checked when the application starts. Each check is also
+# performed lazily on first use, so a failed or slow check does not prevent
+# the application from starting.
+STARTUP_CHECKS: dict[str, Callable[[], object]] = {
+    "casbin policies": ensure_policy_loaded,
+    "storage bucket": storage.ensure_bucket,
+    "redis": lambda: cache.redis.ping(),
+}
+
+
+async def run_startup_checks(timeout: float | None = None) -> dict[str, bool]:
+    """
+    Run the startup checks concurrently in the default executor.
+
+    Every check is bounded by `timeout` seconds (STARTUP_CHECK_TIMEOUT by
+    default). Failures are logged and reported as False in the result.
+    """
+    timeout = settings.STARTUP_CHECK_TIMEOUT if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(
+            asyncio.wait_for(loop.run_in_executor(None, check), timeout)
+            for check in STARTUP_CHECKS.values()
+        ),
+        return_exceptions=True,
+    )
+
+    status = {}
+    for name, result in zip(STARTUP_CHECKS, results, strict=True):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.error(f"Startup check '{name}' timed out after {timeout}s")
+        elif isinstance(result, BaseException):
+            logger.error(f"Startup check '{name}' failed: {result}")
+        status[name] = not isinstance(result, BaseException)
+    return status
@@ -1,40 +1,99 @@
 import io
 import logging
+import re
+import time
 import uuid
 from datetime import timedelta
+from typing import TYPE_CHECKING, BinaryIO
 from urllib.parse import urlparse
 
-from minio import Minio
-
+from app.core.cache import ExpiringLRU, cache
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from _typeshed import WriteableBuffer
+    from minio import Minio
+
 logger = logging.getLogger(__name__)
 
+PRESIGNED_URL_CACHE_PREFIX = "storage:presigned"
+# Cached URLs are handed out for this share of their lifetime, so a client
+# always receives a URL with the remaining 20% of its validity left
+PRESIGNED_URL_CACHE_RATIO = 0.8
+# Upper bound on presigned URLs kept in process memory
+PRESIGNED_URL_LOCAL_MAX_SIZE = 10000
+
+# Square WebP renditions generated for every uploaded avatar, in pixels
+AVATAR_RENDITIONS = (64, 128, 256)
+# Rendition served to the UI (avatars are shown at up to 64px on 2x screens)
+AVATAR_DEFAULT_RENDITION = 128
+AVATAR_QUALITY = 85
+# Refuse to decode images above this many pixels (decompression bombs)
+AVATAR_MAX_PIXELS = 25_000_000
+AVATAR_RENDITION_PATTERN = re.compile(r"^(avatars/.+)/(\d+)\.webp$")
+
+# Multipart part size for streamed uploads; each upload buffers at most one
+# part in memory (MinIO requires at least 5 MiB)
+UPLOAD_PART_SIZE = 10 * 1024 * 1024
+
+
+class _LimitedReader(io.RawIOBase):
+    """Raw stream over a file that raises once more than `limit` bytes were read."""
+
+    def __init__(self, file: BinaryIO, limit: int) -> None:
+        super().__init__()
+        self.__file = file
+        self.__limit = limit
+        self.__read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "WriteableBuffer") -> int:
+        view = memoryview(buffer).cast("B")
+        data = self.__file.read(len(view))
+        self.__read += len(data)
+        if self.__read > self.__limit:
+            raise ValueError("File is too large")
+        view[: len(data)] = data
+        return len(data)
+
 
 class Storage:
     def __init__(self) -> None:
         self.__bucket_name = settings.STORAGE_BUCKET_NAME
-        self.__client = Minio(
-            endpoint=settings.STORAGE_ENDPOINT,
-            access_key=settings.STORAGE_ACCESS_KEY,
-            secret_key=settings.STORAGE_SECRET_KEY,
-            secure=settings.STORAGE_SECURE,
+        # The MinIO client (and the minio package) is loaded on first use
+        self.__client: Minio | None = None
+        # Presigned URL cache: key -> url, until the unix timestamp to stop
+        # reusing it
+        self.__presigned_urls: ExpiringLRU[str, str] = ExpiringLRU(
+            PRESIGNED_URL_LOCAL_MAX_SIZE
         )
-        # Ensure bucket exists
-        try:
-            self._ensure_bucket()
-        except Exception as e:
-            logger.error(f"Failed to ensure bucket exists: {e}")
+        # The bucket is checked at application startup or before the first
+        # upload, never at import time
+        self.__bucket_ready = False
 
     @property
-    def minio(self) -> Minio:
+    def minio(self) -> "Minio":
+        if self.__client is None:
+            from minio import Minio
+
+            self.__client = Minio(
+                endpoint=settings.STORAGE_ENDPOINT,
+                access_key=settings.STORAGE_ACCESS_KEY,
+                secret_key=settings.STORAGE_SECRET_KEY,
+                secure=settings.STORAGE_SECURE,
+            )
         return self.__client
 
-    def _ensure_bucket(self) -> None:
-        """Ensure the default bucket exists."""
-        if not self.__client.bucket_exists(bucket_name=self.__bucket_name):
-            self.__client.make_bucket(bucket_name=self.__bucket_name)
+    def ensure_bucket(self) -> None:
+        """Ensure the default bucket exists (checked once per process)."""
+        if self.__bucket_ready:
+            return
+        if not self.minio.bucket_exists(bucket_name=self.__bucket_name):
+            self.minio.make_bucket(bucket_name=self.__bucket_name)
             logger.info(f"Created bucket: {self.__bucket_name}")
+        self.__bucket_ready = True
 
     def get_presigned_url(
         self,
@@ -42,8 +101,46 @@ class Storage:
         method: str = "GET",
         expires: timedelta = timedelta(minutes=15),
     ) -> str:
-        """Generate a presigned URL for the object."""
-        url = self.__client.get_presigned_url(
+        """
+        Generate a presigned URL for the object.
+
+        URLs are cached in process and shared across workers through Redis,
+        so the signing cost is paid once per object for most of the URL lifetime.
+        """
+        key = f"{PRESIGNED_URL_CACHE_PREFIX}:{method}:{int(expires.total_seconds())}:{object_name}"
+        now = time.time()
+
+        # 1. Try the in-process cache
+        cached = self.__presigned_urls.get(key, now)
+        if cached:
+            return cached
+
+        # 2. Try the shared cache
+        try:
+            pipe = cache.redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.ttl(key)
+            url: str | None
+            ttl: int
+            url, ttl = pipe.execute()
+            if url and ttl > 0:
+                self.__presigned_urls.set(key, url, now + ttl)
+                return url
+        except Exception as e:
+            logger.debug(f"Presigned URL cache unavailable: {e}")
+
+        # 3. Sign a new URL and cache it
+        url = self._sign_url(object_name, method, expires)
+        ttl = int(expires.total_seconds() * PRESIGNED_URL_CACHE_RATIO)
+        self.__presigned_urls.set(key, url, now + ttl)
+        try:
+            cache.redis.set(key, url, ex=ttl)
+        except Exception as e:
+            logger.debug(f"Presigned URL cache unavailable: {e}")
+        return url
+
+    def _sign_url(self, object_name: str, method: str, expires: timedelta) -> str:
+        url = self.minio.get_presigned_url(
             method,
             self.__bucket_name,
             object_name,
@@ -53,27 +150,96 @@ class Storage:
         parsed = urlparse(url)
         return f"{settings.FRONTEND_HOST}/s3{parsed.path}?{parsed.query}"
 
-    def save_avatar(self, user_id: uuid.UUID, data: bytes, content_type: str) -> str:
-        """Upload user avatar to the storage and return its object name."""
-        # Generate unique filename
-        ext = content_type.split("/")[-1]
-        if ext == "jpeg":
-            ext = "jpg"
-        filename = f"{uuid.uuid4()}.{ext}"
-
-        # Define object name (private path)
-        object_name = f"avatars/{user_id}/{filename}"
+    def save_file(
+        self,
+        object_name: str,
+        file: BinaryIO,
+        content_type: str = "application/octet-stream",
+        length: int = -1,
+        max_size: int | None = None,
+    ) -> str:
+        """
+        Stream a file to storage without loading it into memory.
 
-        # Upload the object
-        self.__client.put_object(
+        Pass `length` when the size is known (e.g. `UploadFile.size`) to upload
+        small files in a single request; larger or unsized files are sent as
+        a multipart upload, one `UPLOAD_PART_SIZE` part at a time. A `ValueError` is raised
+        if the file turns out to be larger than `max_size` bytes.
+        """
+        if max_size is not None:
+            if length > max_size:
+                raise ValueError("File is too large")
+            # Buffered, so that MinIO reads whole parts through the limit
+            file = io.BufferedReader(_LimitedReader(file, max_size))
+        self.ensure_bucket()
+        self.minio.put_object(
             bucket_name=self.__bucket_name,
             object_name=object_name,
-            data=io.BytesIO(data),
-            length=len(data),
+            data=file,
+            length=length,
+            part_size=UPLOAD_PART_SIZE,
+            num_parallel_uploads=1,
             content_type=content_type,
         )
-        logger.info(f"Uploaded avatar for user {user_id} to {object_name}")
         return object_name
 
+    def save_avatar(self, user_id: uuid.UUID, file: BinaryIO) -> str:
+        """
+        Resize the uploaded avatar into WebP renditions and store them.
+
+        Renditions are stored as `avatars/{user_id}/{uuid}/{size}.webp`, and
+        the object name of the largest one is returned.
+        """
+        # The image is decoded from the (spooled) upload file itself, so the
+        # original is never copied into memory
+        file.seek(0, io.SEEK_END)
+        if file.tell() > settings.AVATAR_MAX_SIZE:
+            raise ValueError("Avatar file is too large")
+        file.seek(0)
+        renditions = self._render_avatar(file)
+
+        # Define object names (private path)
+        prefix = f"avatars/{user_id}/{uuid.uuid4()}"
+        for size, rendition in renditions.items():
+            self.save_file(
+                f"{prefix}/{size}.webp",
+                io.BytesIO(rendition),
+                content_type="image/webp",
+                length=len(rendition),
+            )
+        object_name = f"{prefix}/{max(AVATAR_RENDITIONS)}.webp"
+        logger.info(f"Uploaded avatar for user {user_id} to {prefix}")
+        return object_name
+
+    @staticmethod
+    def _render_avatar(file: BinaryIO) -> dict[int, bytes]:
+        """Decode an image and encode a square WebP for each rendition size."""
+        from PIL import Image, ImageOps, UnidentifiedImageError
+
+        try:
+            with Image.open(file) as image:
+                if image.width * image.height > AVATAR_MAX_PIXELS:
+                    raise ValueError("Avatar image dimensions are too large")
+                avatar = ImageOps.exif_transpose(image).convert("RGBA")
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            raise ValueError("Invalid image file")
+
+        renditions = {}
+        for size in AVATAR_RENDITIONS:
+            buffer = io.BytesIO()
+            ImageOps.fit(avatar, (size, size), Image.Resampling.LANCZOS).save(
+                buffer, format="WEBP", quality=AVATAR_QUALITY
+            )
+            renditions[size] = buffer.getvalue()
+        return renditions
+
+    @staticmethod
+    def avatar_rendition(object_name: str, size: int = AVATAR_DEFAULT_RENDITION) -> str:
+        """Object name of the given avatar rendition; other objects are unchanged."""
+        match = AVATAR_RENDITION_PATTERN.match(object_name)
+        if not match:
+            return object_name
+        return f"{match.group(1)}/{size}.webp"
+
 
 storage = Storage()
@@ -0,0 +1,121 @@
+import logging
+import time
+from typing import cast
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LOGIN_THROTTLE_PREFIX = "login"
+# Consecutive lockouts are remembered for this long when doubling the next one
+LOGIN_STRIKES_TTL = 86400
+
+
+def _scopes(ip: str | None, username: str) -> list[tuple[str, str, int]]:
+    """(scope, identifier, failure limit) pairs a login attempt is counted against."""
+    scopes = [("user", username.strip().lower(), settings.LOGIN_MAX_FAILURES_PER_USER)]
+    if ip:
+        scopes.append(("ip", ip, settings.LOGIN_MAX_FAILURES_PER_IP))
+    return scopes
+
+
+def _lock_key(scope: str, identifier: str) -> str:
+    return f"{LOGIN_THROTTLE_PREFIX}:lock:{scope}:{identifier}"
+
+
+def _failures_key(scope: str, identifier: str, bucket: int) -> str:
+    return f"{LOGIN_THROTTLE_PREFIX}:failures:{scope}:{identifier}:{bucket}"
+
+
+def _strikes_key(scope: str, identifier: str) -> str:
+    return f"{LOGIN_THROTTLE_PREFIX}:strikes:{scope}:{identifier}"
+
+
+def sliding_window_count(
+    previous: int, current: int, elapsed: float, window: int
+) -> float:
+    """
+    Estimate the events seen in the last `window` seconds from two fixed windows.
+
+    The previous window is weighted by how much of it still overlaps the
+    sliding window, `elapsed` being the seconds spent in the current one.
+    """
+    return current + previous * (1 - elapsed / window)
+
+
+def get_login_retry_after(cache: redis.Redis, ip: str | None, username: str) -> int:
+    """
+    Seconds until a login attempt is allowed, 0 if it is allowed now.
+
+    Checked before any password is verified, with a single Redis round trip,
+    so locked out attempts never reach bcrypt or LDAP.
+    """
+    keys = [
+        _lock_key(scope, identifier) for scope, identifier, _ in _scopes(ip, username)
+    ]
+    try:
+        deadlines = cast(list[bytes | str | None], cache.mget(keys))
+    except redis.RedisError as e:
+        logger.warning(f"Login throttle unavailable: {e}")
+        return 0
+    now = time.time()
+    return max((int(float(d) - now) + 1 for d in deadlines if d), default=0)
+
+
+def record_login_failure(cache: redis.Redis, ip: str | None, username: str) -> int:
+    """
+    Count a failed login and lock out its IP or username past the limit.
+
+    Failures are counted over a sliding window; each lockout of the same
+    identifier within `LOGIN_STRIKES_TTL` doubles in length, up to
+    `LOGIN_LOCKOUT_MAX_SECONDS`. Returns the longest lockout set, or 0.
+    """
+    window = settings.LOGIN_FAILURE_WINDOW_SECONDS
+    now = time.time()
+    bucket, elapsed = divmod(now, window)
+    lockout = 0
+    try:
+        for scope, identifier, limit in _scopes(ip, username):
+            key = _failures_key(scope, identifier, int(bucket))
+            current = cast(int, cache.incr(key))
+            if current == 1:
+                cache.expire(key, 2 * window)
+            previous = cast(
+                bytes | str | None,
+                cache.get(_failures_key(scope, identifier, int(bucket) - 1)),
+            )
+            count = sliding_window_count(int(previous or 0), current, elapsed, window)
+            if count < limit:
+                continue
+
+            strikes_key = _strikes_key(scope, identifier)
+            strikes = cast(int, cache.incr(strikes_key))
+            if strikes == 1:
+                cache.expire(strikes_key, LOGIN_STRIKES_TTL)
+            duration = min(
+                settings.LOGIN_LOCKOUT_SECONDS * 2 ** (strikes - 1),
+                settings.LOGIN_LOCKOUT_MAX_SECONDS,
+            )
+            cache.set(_lock_key(scope, identifier), now + duration, ex=duration)
+            logger.warning(f"Login locked for {scope} {identifier} for {duration}s")
+            lockout = max(lockout, duration)
+    except redis.RedisError as e:
+        logger.warning(f"Login throttle unavailable: {e}")
+    return lockout
+
+
+def reset_login_failures(cache: redis.Redis, username: str) -> None:
+    """Forget the failures of a username after a successful login."""
+    window = settings.LOGIN_FAILURE_WINDOW_SECONDS
+    bucket = int(time.time() // window)
+    identifier = username.strip().lower()
+    try:
+        cache.delete(
+            _failures_key("user", identifier, bucket),
+            _failures_key("user", identifier, bucket - 1),
+            _strikes_key("user", identifier),
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Login throttle unavailable: {e}")
@@ -1,36 +1,60 @@
 import hashlib
+import logging
+import re
 import secrets
+import uuid
+from collections.abc import Iterable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, NamedTuple
 
-from sqlmodel import Session, or_, select
+from sqlalchemy import Insert
+from sqlalchemy import select as sa_select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, col, or_, select, update
 
 from app.core.config import settings
-from app.core.ldap import authenticate as ldap_authenticate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import (
+    UNUSABLE_PASSWORD,
+    get_password_hash,
+    get_password_hash_async,
+    get_password_hashes,
+    password_needs_rehash,
+    verify_password,
+)
 from app.model import Role, User, UserCreate, UserUpdate
 
+logger = logging.getLogger(__name__)
 
-def create_user(*, session: Session, user_create: UserCreate) -> User:
+# Attempts at allocating a free username when concurrent signups collide
+USERNAME_ALLOCATION_ATTEMPTS = 5
+# Rows per INSERT batch (and per IN (...) lookup) in bulk user creation
+USER_BATCH_SIZE = 500
+# Rows per multi-row upsert (and per IN (...) lookup) of key-value pairs
+KEY_VALUE_BATCH_SIZE = 500
+
+
+def get_gravatar_url(email: str) -> str:
+    email_hash = hashlib.md5(email.lower().encode(encoding="utf-8")).hexdigest()
+    return f"{settings.GRAVATAR_SOURCE}{email_hash}?d=identicon&s=256"
+
+
+def create_user(
+    *, session: Session, user_create: UserCreate, ldap_dn: str | None = None
+) -> User:
+    """
+    Create a user, allocating a free username if the requested one is taken.
+
+    Users linked to a directory entry (`ldap_dn`) get no usable local
+    password: they log in with their LDAP one.
+    """
     # Ensure username is set
     if not user_create.username:
         user_create.username = user_create.email.split("@")[0]
-    # Ensure unique username
-    existing_user = get_user_by_username(session=session, username=user_create.username)
-    if existing_user:
-        suffix = 1
-        base_username = user_create.username
-        while True:
-            new_username = f"{base_username}{suffix}"
-            if not get_user_by_username(session=session, username=new_username):
-                user_create.username = new_username
-                break
-            suffix += 1
+    base_username = user_create.username
 
     # Ensure avatar is set
     if not user_create.avatar:
-        email_hash = hashlib.md5(
-            user_create.email.lower().encode(encoding="utf-8")
-        ).hexdigest()
-        user_create.avatar = f"{settings.GRAVATAR_SOURCE}{email_hash}?d=identicon&s=256"
+        user_create.avatar = get_gravatar_url(user_create.email)
 
     # Ensure role is set
     if not user_create.role_id:
@@ -38,19 +62,392 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
         if role:
             user_create.role_id = role.id
 
-    # Create user
-    db_obj = User.model_validate(
-        user_create,
-        update={
-            "hashed_password": get_password_hash(user_create.password),
-        },
+    hashed_password = (
+        UNUSABLE_PASSWORD if ldap_dn else get_password_hash(user_create.password)
     )
-    session.add(db_obj)
-    session.commit()
+    attempts = 0
+    while True:
+        # Ensure unique username
+        user_create.username = get_available_username(
+            session=session, username=base_username
+        )
+        # Create user
+        db_obj = User.model_validate(
+            user_create, update={"hashed_password": hashed_password, "ldap_dn": ldap_dn}
+        )
+        session.add(db_obj)
+        try:
+            session.commit()
+            break
+        except IntegrityError:
+            session.rollback()
+            attempts += 1
+            # A concurrent signup took the username first: allocate another
+            # one. Any other constraint violation (e.g. email) is re-raised.
+            taken = get_user_by_username(session=session, username=user_create.username)
+            if not taken or attempts >= USERNAME_ALLOCATION_ATTEMPTS:
+                raise
     session.refresh(db_obj)
     return db_obj
 
 
+def get_available_username(*, session: Session, username: str) -> str:
+    """
+    Return `username` if it is free, otherwise `username` followed by the
+    next numeric suffix (one past the highest one in use).
+
+    A single prefix query on the unique username index is used, however many
+    users share the prefix.
+    """
+    taken = session.exec(
+        select(User.username).where(
+            col(User.username).startswith(username, autoescape=True)
+        )
+    ).all()
+    return _next_username(username, set(taken))
+
+
+def _next_username(username: str, taken: set[str]) -> str:
+    if username not in taken:
+        return username
+    pattern = re.compile(rf"{re.escape(username)}(\d+)")
+    suffixes = [int(m.group(1)) for name in taken if (m := pattern.fullmatch(name))]
+    return f"{username}{max(suffixes, default=0) + 1}"
+
+
+def get_existing_emails(*, session: Session, emails: Iterable[str]) -> set[str]:
+    """Return the given emails that already belong to a user."""
+    emails = list(emails)
+    existing: set[str] = set()
+    for i in range(0, len(emails), USER_BATCH_SIZE):
+        batch = emails[i : i + USER_BATCH_SIZE]
+        existing.update(
+            session.exec(select(User.email).where(col(User.email).in_(batch))).all()
+        )
+    return existing
+
+
+def allocate_usernames(*, session: Session, usernames: list[str]) -> list[str]:
+    """
+    Free usernames for a batch of new users, in order.
+
+    One IN query for the requested names, plus one prefix query per name
+    that is already taken; names repeated in the batch get suffixes too.
+    """
+    taken: set[str] = set()
+    unique_usernames = list(set(usernames))
+    for i in range(0, len(unique_usernames), USER_BATCH_SIZE):
+        batch = unique_usernames[i : i + USER_BATCH_SIZE]
+        taken.update(
+            session.exec(
+                select(User.username).where(col(User.username).in_(batch))
+            ).all()
+        )
+    prefixes_loaded: set[str] = set()
+    allocated = []
+    for username in usernames:
+        if username in taken and username not in prefixes_loaded:
+            taken.update(
+                session.exec(
+                    select(User.username).where(
+                        col(User.username).startswith(username, autoescape=True)
+                    )
+                ).all()
+            )
+            prefixes_loaded.add(username)
+        allocated.append(_next_username(username, taken))
+        taken.add(allocated[-1])
+    return allocated
+
+
+def create_users(
+    *, session: Session, users_create: list[UserCreate]
+) -> list[User | None]:
+    """
+    Create many users at once, with the same defaults as `create_user`.
+
+    Usernames are allocated with set-based queries, passwords are hashed in
+    parallel and rows are inserted in batches of `USER_BATCH_SIZE`. Emails
+    must not exist yet (see `get_existing_emails`). The result has one entry
+    per input; None marks a row that conflicted with a concurrent insert.
+    """
+    usernames = allocate_usernames(
+        session=session,
+        usernames=[u.username or u.email.split("@")[0] for u in users_create],
+    )
+    for user_create, username in zip(users_create, usernames, strict=True):
+        user_create.username = username
+
+    role = session.exec(select(Role).where(Role.name == "user")).first()
+    hashed_passwords = get_password_hashes([u.password for u in users_create])
+    db_objs = []
+    for user_create, hashed_password in zip(
+        users_create, hashed_passwords, strict=True
+    ):
+        if not user_create.avatar:
+            user_create.avatar = get_gravatar_url(user_create.email)
+        if not user_create.role_id and role:
+            user_create.role_id = role.id
+        db_objs.append(
+            User.model_validate(
+                user_create, update={"hashed_password": hashed_password}
+            )
+        )
+
+    created: list[User | None] = []
+    for i in range(0, len(db_objs), USER_BATCH_SIZE):
+        batch = db_objs[i : i + USER_BATCH_SIZE]
+        ids = [db_obj.id for db_obj in batch]
+        session.add_all(batch)
+        try:
+            session.commit()
+            # Reload the committed (expired) users with one query
+            session.exec(select(User).where(col(User.id).in_(ids))).all()
+            created.extend(batch)
+        except IntegrityError:
+            # Another request inserted some of these users meanwhile: insert
+            # the batch row by row and report the conflicting ones
+            session.rollback()
+            for db_obj in batch:
+                session.add(db_obj)
+                try:
+                    session.commit()
+                    created.append(db_obj)
+                except IntegrityError:
+                    session.rollback()
+                    created.append(None)
+    return created
+
+
+def _upsert_statement(
+    dialect: str,
+    model: type[SQLModel],
+    rows: list[dict[str, Any]],
+    key: str,
+    value: str,
+) -> Insert | None:
+    """Multi-row INSERT that updates `value` on a `key` conflict, if supported."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+        postgresql_stmt = postgresql_insert(model).values(rows)
+        return postgresql_stmt.on_conflict_do_update(
+            index_elements=[key], set_={value: postgresql_stmt.excluded[value]}
+        )
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        sqlite_stmt = sqlite_insert(model).values(rows)
+        return sqlite_stmt.on_conflict_do_update(
+            index_elements=[key], set_={value: sqlite_stmt.excluded[value]}
+        )
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        mysql_stmt = mysql_insert(model).values(rows)
+        return mysql_stmt.on_duplicate_key_update({value: mysql_stmt.inserted[value]})
+    return None
+
+
+def upsert_key_values(
+    *,
+    session: Session,
+    model: type[SQLModel],
+    values: Mapping[str, str | None],
+    key: str = "key",
+    value: str = "value",
+) -> dict[str, str | None]:
+    """
+    Write key-value pairs to a table keyed by `key`, skipping unchanged ones.
+
+    The stored values are read with one IN (...) query and the changed pairs
+    written with one multi-row upsert (per `KEY_VALUE_BATCH_SIZE` pairs).
+    Does not commit. Returns the pairs that were written.
+    """
+    key_column = getattr(model, key)
+    value_column = getattr(model, value)
+    keys = list(values)
+    stored: dict[str, str | None] = {}
+    for i in range(0, len(keys), KEY_VALUE_BATCH_SIZE):
+        batch = keys[i : i + KEY_VALUE_BATCH_SIZE]
+        stored.update(
+            session.exec(
+                select(key_column, value_column).where(key_column.in_(batch))
+            ).all()
+        )
+    changed = {k: v for k, v in values.items() if k not in stored or stored[k] != v}
+
+    rows: list[dict[str, Any]] = [{key: k, value: v} for k, v in changed.items()]
+    dialect = session.get_bind().dialect.name
+    for i in range(0, len(rows), KEY_VALUE_BATCH_SIZE):
+        rows_batch = rows[i : i + KEY_VALUE_BATCH_SIZE]
+        stmt = _upsert_statement(dialect, model, rows_batch, key, value)
+        if stmt is not None:
+            session.execute(stmt)
+        else:
+            for row in rows_batch:
+                session.merge(model(**row))
+    return changed
+
+
+class _DirectoryMatch(NamedTuple):
+    """Columns of a local user that a directory entry may be synced into."""
+
+    id: uuid.UUID
+    ldap_dn: str | None
+    email: str
+    full_name: str | None
+    is_superuser: bool
+
+
+def sync_ldap_users(
+    *,
+    session: Session,
+    entries: list[dict[str, str | None]],
+    link_by_email: bool = False,
+) -> dict[str, int]:
+    """
+    Mirror a full LDAP directory listing into the users table.
+
+    Entries are `{"dn", "username", "email", "full_name"}` dicts (see
+    `app.core.ldap.fetch_directory_users`). Users are matched by DN, then
+    by email among the users synced earlier, whose DN may have changed.
+    Local accounts are only linked to the directory entry with their email
+    when `link_by_email` is set; otherwise the entry is skipped. Superusers
+    are never linked, updated or disabled. Changed names and emails are
+    written with bulk UPDATEs, new users inserted in batches of
+    `USER_BATCH_SIZE`, and active users whose DN is no longer listed are
+    disabled. Returns the number of users created, updated and disabled.
+    """
+    counts = {"created": 0, "updated": 0, "disabled": 0}
+    # DN -> (email, entry), for the entries with both
+    entries_by_dn: dict[str, tuple[str, dict[str, str | None]]] = {}
+    for entry in entries:
+        dn, email = entry.get("dn"), entry.get("email")
+        if dn and email:
+            entries_by_dn[dn] = (email, entry)
+    if not entries_by_dn:
+        # An empty listing is more likely a misconfiguration than an empty
+        # directory: never disable every user because of it
+        logger.warning("LDAP sync skipped: no users with an email listed")
+        return counts
+
+    columns = (
+        col(User.id),
+        col(User.ldap_dn),
+        col(User.email),
+        col(User.full_name),
+        col(User.is_superuser),
+    )
+    dns = list(entries_by_dn)
+    by_dn: dict[str, _DirectoryMatch] = {}
+    # None marks the emails of the users about to be created
+    by_email: dict[str, _DirectoryMatch | None] = {}
+    for i in range(0, len(dns), USER_BATCH_SIZE):
+        batch = dns[i : i + USER_BATCH_SIZE]
+        rows = session.execute(
+            sa_select(*columns).where(
+                or_(
+                    col(User.ldap_dn).in_(batch),
+                    col(User.email).in_([entries_by_dn[dn][0] for dn in batch]),
+                )
+            )
+        ).all()
+        for row in rows:
+            found = _DirectoryMatch._make(row)
+            if found.ldap_dn:
+                by_dn[found.ldap_dn] = found
+            by_email[found.email] = found
+
+    updates = []
+    new_entries: list[tuple[str, dict[str, str | None]]] = []
+    for dn, (email, entry) in entries_by_dn.items():
+        match: _DirectoryMatch | None = by_dn.get(dn)
+        if match is None and email in by_email:
+            match = by_email[email]
+            if match is None:
+                # Two entries with the same email create a single user
+                continue
+            if match.ldap_dn is None and not link_by_email:
+                logger.warning(f"LDAP sync skipped {dn}: {email} is a local account")
+                continue
+            if match.ldap_dn in entries_by_dn:
+                # Synced from another entry that is still listed
+                continue
+        if match is None:
+            new_entries.append((email, entry))
+            by_email[email] = None
+            continue
+        if match.is_superuser:
+            continue
+        changes: dict[str, Any] = {}
+        if match.ldap_dn != dn:
+            changes["ldap_dn"] = dn
+        if match.full_name != entry["full_name"]:
+            changes["full_name"] = entry["full_name"]
+        # Keep the local email when the directory one belongs to another user
+        if match.email != email and email not in by_email:
+            changes["email"] = email
+        if changes:
+            updates.append({"id": match.id, **changes})
+    for i in range(0, len(updates), USER_BATCH_SIZE):
+        session.execute(update(User), updates[i : i + USER_BATCH_SIZE])
+    session.commit()
+    counts["updated"] = len(updates)
+
+    if new_entries:
+        usernames = allocate_usernames(
+            session=session,
+            usernames=[
+                entry["username"] or email.split("@")[0] for email, entry in new_entries
+            ],
+        )
+        role = session.exec(select(Role).where(Role.name == "user")).first()
+        for i in range(0, len(new_entries), USER_BATCH_SIZE):
+            session.add_all(
+                User(
+                    email=email,
+                    username=username,
+                    full_name=entry["full_name"],
+                    avatar=get_gravatar_url(email),
+                    # Directory users log in with their LDAP password
+                    hashed_password=UNUSABLE_PASSWORD,
+                    role_id=role.id if role else None,
+                    ldap_dn=entry["dn"],
+                )
+                for (email, entry), username in zip(
+                    new_entries[i : i + USER_BATCH_SIZE],
+                    usernames[i : i + USER_BATCH_SIZE],
+                    strict=True,
+                )
+            )
+            session.commit()
+        counts["created"] = len(new_entries)
+
+    # Disable the directory users that are no longer listed
+    listed = set(entries_by_dn)
+    gone = [
+        user_id
+        for user_id, dn in session.exec(
+            select(User.id, col(User.ldap_dn)).where(
+                col(User.ldap_dn).is_not(None),
+                User.is_active,
+                col(User.is_superuser).is_(False),
+            )
+        ).all()
+        if dn not in listed
+    ]
+    for i in range(0, len(gone), USER_BATCH_SIZE):
+        session.exec(
+            update(User)
+            .where(col(User.id).in_(gone[i : i + USER_BATCH_SIZE]))
+            .values(is_active=False)
+        )
+    session.commit()
+    counts["disabled"] = len(gone)
+    return counts
+
+
 def update_user(*, session: Session, db_user: User, user_update: UserUpdate) -> User:
     user_data = user_update.model_dump(exclude_unset=True)
     extra_data = {}
@@ -71,6 +468,37 @@ def get_user_by_oidc_sub(*, session: Session, oidc_sub: str) -> User | None:
     return db_user
 
 
+def get_or_create_oidc_user(
+    *,
+    session: Session,
+    sub: str,
+    email: str,
+    username: str | None = None,
+    full_name: str | None = None,
+) -> User:
+    """
+    User of an OIDC subject. On its first login the subject is linked to the
+    user with the same email, or to a new user with a random password.
+    """
+    user = get_user_by_oidc_sub(session=session, oidc_sub=sub)
+    if user:
+        return user
+    user = get_user_by_email(session=session, email=email)
+    if not user:
+        user_in = UserCreate(
+            email=email,
+            username=username,
+            password=secrets.token_urlsafe(32),
+            full_name=full_name,
+        )
+        user = create_user(session=session, user_create=user_in)
+    user.oidc_sub = sub
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
 def get_user_by_username(*, session: Session, username: str) -> User | None:
     statement = select(User).where(User.username == username)
     db_user = session.exec(statement).first()
@@ -96,37 +524,105 @@ def delete_user(*, session: Session, db_user: User) -> None:
     session.commit()
 
 
+# Stores upgraded password hashes in the background (see upgrade_password_hash)
+password_rehash_writer = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="password-rehash"
+)
+
+
+def upgrade_password_hash(
+    *, session: Session, user: User, password: str
+) -> Future[str] | None:
+    """
+    Rehash a password whose hash uses an outdated scheme or work factor.
+
+    The login does not wait for the new hash: it is computed on the password
+    hashing pool (or a background thread when there is no pool) and stored
+    once ready, unless the password was changed in the meantime. When the
+    pool is busy the upgrade waits for a later login.
+    """
+    future = get_password_hash_async(password)
+    if future is None:
+        return None
+
+    engine = session.get_bind()
+    user_id, old_hash = user.id, user.hashed_password
+
+    def store(done: Future[str]) -> None:
+        try:
+            with Session(engine) as update_session:
+                update_session.exec(
+                    update(User)
+                    .where(
+                        col(User.id) == user_id,
+                        col(User.hashed_password) == old_hash,
+                    )
+                    .values(hashed_password=done.result())
+                )
+                update_session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to upgrade password hash for user {user_id}: {e}")
+
+    # Done callbacks run on the thread that delivers the pool's results:
+    # the database write must not hold it up
+    future.add_done_callback(lambda done: password_rehash_writer.submit(store, done))
+    return future
+
+
 def authenticate(*, session: Session, username: str, password: str) -> User | None:
+    # Imported here: the runtime settings are loaded through
+    # app.core.database, which depends on this module
+    from app.core.runtime_settings import runtime_settings
+
     db_user = get_user_by_username_or_email(
         session=session, username=username, email=username
     )
+    ldap_enabled = runtime_settings.get().LDAP_ENABLED
+
+    # Users synced from the directory only need a bind as their DN;
+    # superusers always keep their local password
+    if db_user and db_user.ldap_dn and ldap_enabled and not db_user.is_superuser:
+        # Imported lazily: ldap3 is only needed when LDAP is enabled
+        from app.core.ldap import verify_user
+
+        return db_user if verify_user(db_user.ldap_dn, password) else None
 
     # Use local authentication first
     if db_user and verify_password(password, db_user.hashed_password):
+        if password_needs_rehash(db_user.hashed_password):
+            upgrade_password_hash(session=session, user=db_user, password=password)
         return db_user
 
     # Use LDAP authentication if enabled
-    if settings.LDAP_ENABLED:
+    if ldap_enabled:
+        # Imported lazily: ldap3 is only needed when LDAP is enabled
+        from app.core.ldap import authenticate as ldap_authenticate
+
         ldap_user = ldap_authenticate(username, password)
         if ldap_user:
-            # Check if user exists locally
-            if db_user:
-                return db_user
-
-            # Check if user with same email exists
+            # Check if user exists locally, then if a user with the same email does
             email = ldap_user.get("email")
-            if email:
+            existing_user = db_user
+            if existing_user is None and email:
                 existing_user = get_user_by_email(session=session, email=email)
-                if existing_user:
-                    return existing_user
+            if existing_user:
+                # Link it to its entry, so that its next logins are a bind
+                if existing_user.ldap_dn is None and not existing_user.is_superuser:
+                    existing_user.ldap_dn = ldap_user["dn"]
+                    session.add(existing_user)
+                    session.commit()
+                    session.refresh(existing_user)
+                return existing_user
 
-            # Create new user from LDAP info
+            # Create new user from LDAP info (the random password is not stored)
             user_create = UserCreate(
                 email=email,
                 username=ldap_user.get("username"),
                 password=secrets.token_urlsafe(32),
                 full_name=ldap_user.get("full_name"),
             )
-            return create_user(session=session, user_create=user_create)
+            return create_user(
+                session=session, user_create=user_create, ldap_dn=ldap_user["dn"]
+            )
 
     return None
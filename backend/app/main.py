@@ -1,13 +1,27 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
-# Ensure tasks are registered
-import app.worker.tasks  # noqa
 from app.api.main import api_router
+from app.core.cache import cache
 from app.core.config import settings
-from app.core.middleware import CasbinMiddleware, OpenApiMiddleware
+from app.core.middleware import (
+    CasbinMiddleware,
+    OpenApiMiddleware,
+    RateLimitMiddleware,
+)
+from app.core.oidc import oidc_client
+from app.core.security import PasswordHashingBusyError, password_hasher
+from app.core.startup import run_startup_checks
+
+# Ensure tasks are registered
+from app.worker import tasks as _tasks  # noqa: F401
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -17,12 +31,32 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # External services are not touched at import time; check them here,
+    # concurrently and with a timeout, before serving requests
+    await run_startup_checks()
+    # Requests waiting for a password hash hold a threadpool thread: keep
+    # at least half of the threads for other requests
+    threads = anyio.to_thread.current_default_thread_limiter().total_tokens
+    password_hasher.limit_pending(int(threads) // 2)
+    yield
+    password_hasher.shutdown()
+    await oidc_client.aclose()
+    await cache.close()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
 
+# Middleware added first runs innermost: rate limits apply to the callers
+# authenticated by the middleware below
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(CasbinMiddleware)
 app.add_middleware(OpenApiMiddleware)
 
@@ -37,3 +71,15 @@ if settings.all_cors_origins:
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+
+@app.exception_handler(PasswordHashingBusyError)
+async def password_hashing_busy_handler(
+    _request: Request, _exc: PasswordHashingBusyError
+) -> JSONResponse:
+    # Shed load instead of queueing more bcrypt work than the pool can absorb
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please try again"},
+        headers={"Retry-After": "1"},
+    )
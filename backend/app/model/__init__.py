@@ -20,8 +20,12 @@ from app.model.application import (
 from app.model.base import (
     BaseDataModel,
     DateTime,
+    ListFields,
     Message,
     NewPassword,
+    PasswordHashingStats,
+    RedisPoolsStats,
+    RedisPoolStats,
     Token,
     TokenPayload,
 )
@@ -63,6 +67,8 @@ from app.model.task import (
     TaskPublic,
     TasksPublic,
     TaskStatus,
+    TaskSummariesPublic,
+    TaskSummaryPublic,
     TaskType,
     TaskUpdate,
 )
@@ -71,15 +77,19 @@ from app.model.task_execution import (
     TaskExecutionCreate,
     TaskExecutionPublic,
     TaskExecutionsPublic,
+    TaskExecutionSummariesPublic,
+    TaskExecutionSummaryPublic,
     TaskExecutionUpdate,
 )
 from app.model.user import (
     UpdatePassword,
     User,
     UserCreate,
+    UserImportResult,
     UserPrivate,
     UserPublic,
     UserRegister,
+    UsersImportReport,
     UsersPrivate,
     UsersPublic,
     UserUpdate,
@@ -102,10 +112,14 @@ __all__ = [
     "ApplicationsPrivate",
     "ApplicationsPublic",
     "DateTime",
+    "ListFields",
     "Message",
     "Token",
     "TokenPayload",
     "NewPassword",
+    "PasswordHashingStats",
+    "RedisPoolStats",
+    "RedisPoolsStats",
     "BaseDataModel",
     "CasbinRule",
     "Group",
@@ -138,11 +152,15 @@ __all__ = [
     "TaskUpdate",
     "TaskPublic",
     "TasksPublic",
+    "TaskSummaryPublic",
+    "TaskSummariesPublic",
     "TaskExecution",
     "TaskExecutionCreate",
     "TaskExecutionUpdate",
     "TaskExecutionPublic",
     "TaskExecutionsPublic",
+    "TaskExecutionSummaryPublic",
+    "TaskExecutionSummariesPublic",
     "UserRegister",
     "User",
     "UserCreate",
@@ -153,4 +171,6 @@ __all__ = [
     "UsersPublic",
     "UserPrivate",
     "UsersPrivate",
+    "UserImportResult",
+    "UsersImportReport",
 ]
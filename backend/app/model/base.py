@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from typing import Annotated
+from typing import Annotated, Literal
 
 from pydantic import PlainSerializer
 from sqlmodel import Field, SQLModel
@@ -20,6 +20,10 @@ def _utc_serializer(dt: datetime) -> str:
 
 DateTime = Annotated[datetime, PlainSerializer(_utc_serializer)]
 
+# Projection for list endpoints: "summary" (the default) skips the wide
+# detail-only columns, which "full" includes
+ListFields = Literal["full", "summary"]
+
 
 class Message(SQLModel):
     message: str
@@ -35,6 +39,10 @@ class TokenPayload(SQLModel):
     # Save user id in "sub" field
     sub: str | None = None
     type: str = "access"
+    # Issue time and token generation of the user (tokens issued before
+    # generations existed count as generation 0)
+    iat: int | None = None
+    gen: int = 0
 
 
 class NewPassword(SQLModel):
@@ -42,6 +50,26 @@ class NewPassword(SQLModel):
     new_password: str
 
 
+class PasswordHashingStats(SQLModel):
+    workers: int
+    max_pending: int
+    pending: int
+    bulk_pending: int
+    completed: int
+    rejected: int
+
+
+class RedisPoolStats(SQLModel):
+    max_connections: int
+    in_use: int
+    available: int
+
+
+class RedisPoolsStats(SQLModel):
+    sync: RedisPoolStats
+    asyncio: RedisPoolStats
+
+
 class BaseDataModel(SQLModel):
     """Base data model with common fields"""
 
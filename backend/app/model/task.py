@@ -136,14 +136,14 @@ class Task(TaskBase, BaseDataModel, table=True):
     )
 
 
-class TaskPublic(SQLModel):
+class TaskSummaryPublic(SQLModel):
+    """List view of a task, without the wide JSON argument columns"""
+
     id: uuid.UUID
     name: str
     description: str | None = None
     task_type: TaskType
     celery_task_name: str
-    celery_task_args: str | None = None
-    celery_task_kwargs: str | None = None
     scheduled_time: DateTime | None = None
     periodic_schedule_type: PeriodicScheduleType | None = None
     crontab_minute: str | None = None
@@ -165,6 +165,16 @@ class TaskPublic(SQLModel):
     updated_at: DateTime | None = None
 
 
+class TaskPublic(TaskSummaryPublic):
+    celery_task_args: str | None = None
+    celery_task_kwargs: str | None = None
+
+
 class TasksPublic(SQLModel):
     tasks: list[TaskPublic]
     total: int
+
+
+class TaskSummariesPublic(SQLModel):
+    tasks: list[TaskSummaryPublic]
+    total: int
@@ -53,25 +53,35 @@ class TaskExecution(TaskExecutionBase, BaseDataModel, table=True):
     task: Optional["Task"] = Relationship(back_populates="executions")
 
 
-class TaskExecutionPublic(SQLModel):
+class TaskExecutionSummaryPublic(SQLModel):
+    """List view of an execution, without the wide arguments/result columns"""
+
     id: uuid.UUID
     task_id: uuid.UUID
     task_name: str | None = None
     celery_task_name: str | None = None
     celery_task_id: str
-    celery_task_args: str | None = None
-    celery_task_kwargs: str | None = None
     status: str
     started_at: DateTime | None = None
     completed_at: DateTime | None = None
-    result: str | None = None
-    traceback: str | None = None
     worker: str | None = None
     runtime: float | None = None
     created_at: DateTime | None = None
     updated_at: DateTime | None = None
 
 
+class TaskExecutionPublic(TaskExecutionSummaryPublic):
+    celery_task_args: str | None = None
+    celery_task_kwargs: str | None = None
+    result: str | None = None
+    traceback: str | None = None
+
+
 class TaskExecutionsPublic(SQLModel):
     executions: list[TaskExecutionPublic]
     total: int
+
+
+class TaskExecutionSummariesPublic(SQLModel):
+    executions: list[TaskExecutionSummaryPublic]
+    total: int
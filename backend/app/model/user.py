@@ -1,5 +1,5 @@
 import uuid
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 
 from pydantic import EmailStr, field_validator
 from sqlmodel import Field, Relationship, SQLModel
@@ -67,6 +67,9 @@ class User(UserBase, BaseDataModel, table=True):
     # OpenID Connect subject identifier
     oidc_sub: str | None = Field(default=None, nullable=True, index=True)
 
+    # Distinguished name of users synced from LDAP (see crud.sync_ldap_users)
+    ldap_dn: str | None = Field(default=None, nullable=True, index=True, max_length=512)
+
     # Role
     role_id: uuid.UUID | None = Field(default=None, foreign_key="roles.id")
     role: Role | None = Relationship(back_populates="users")
@@ -103,12 +106,12 @@ class UserPublic(SQLModel):
     @field_validator("avatar", mode="after")
     @classmethod
     def presigned_avatar_url(cls, v: str | None) -> str | None:
-        if v and v.startswith("http"):
+        if not v or v.startswith("http"):
             return v
 
         from app.core.storage import storage
 
-        return storage.get_presigned_url(v)
+        return storage.get_presigned_url(storage.avatar_rendition(v))
 
 
 class UsersPublic(SQLModel):
@@ -125,3 +128,21 @@ class UserPrivate(UserPublic):
 class UsersPrivate(SQLModel):
     users: list[UserPrivate]
     total: int
+
+
+class UserImportResult(SQLModel):
+    """Outcome of one row of a bulk user import."""
+
+    row: int
+    email: str | None = None
+    status: Literal["created", "skipped", "failed"]
+    detail: str | None = None
+    id: uuid.UUID | None = None
+    username: str | None = None
+
+
+class UsersImportReport(SQLModel):
+    created: int
+    skipped: int
+    failed: int
+    results: list[UserImportResult]
@@ -4,13 +4,12 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
-import emails  # type: ignore
 import jwt
-from jinja2 import Template
 from jwt.exceptions import InvalidTokenError
 
 from app.core import security
 from app.core.config import settings
+from app.core.runtime_settings import runtime_settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,6 +25,9 @@ def render_email_template(*, template_name: str, context: dict[str, Any]) -> str
     template_str = (
         Path(__file__).parent / "email-templates" / "build" / template_name
     ).read_text()
+    # Imported lazily, like `emails` below, to keep them out of cold starts
+    from jinja2 import Template
+
     html_content = Template(template_str).render(context)
     return html_content
 
@@ -36,27 +38,30 @@ def send_email(
     subject: str = "",
     html_content: str = "",
 ) -> None:
-    assert settings.emails_enabled, "no provided configuration for email variables"
+    config = runtime_settings.get()
+    assert config.emails_enabled, "no provided configuration for email variables"
+    import emails  # type: ignore
+
     message = emails.Message(
         subject=subject,
         html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+        mail_from=(config.EMAILS_FROM_NAME, config.EMAILS_FROM_EMAIL),
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
+    smtp_options = {"host": config.SMTP_HOST, "port": config.SMTP_PORT}
+    if config.SMTP_TLS:
         smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
+    elif config.SMTP_SSL:
         smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
+    if config.SMTP_USER:
+        smtp_options["user"] = config.SMTP_USER
+    if config.SMTP_PASSWORD:
+        smtp_options["password"] = config.SMTP_PASSWORD
     response = message.send(to=email_to, smtp=smtp_options)
     logger.info(f"send email result: {response}")
 
 
 def generate_test_email(email_to: str) -> EmailData:
-    project_name = settings.PROJECT_NAME
+    project_name = runtime_settings.get().PROJECT_NAME
     subject = f"{project_name} - Test email"
     html_content = render_email_template(
         template_name="test_email.html",
@@ -68,7 +73,7 @@ def generate_test_email(email_to: str) -> EmailData:
 def generate_reset_password_email(
     email_to: str, username: str, token: str
 ) -> EmailData:
-    project_name = settings.PROJECT_NAME
+    project_name = runtime_settings.get().PROJECT_NAME
     subject = f"{project_name} - Password recovery for user {username}"
     link = f"{settings.FRONTEND_HOST}/reset-password?token={token}"
     html_content = render_email_template(
@@ -87,7 +92,7 @@ def generate_reset_password_email(
 def generate_new_account_email(
     email_to: str, username: str, password: str
 ) -> EmailData:
-    project_name = settings.PROJECT_NAME
+    project_name = runtime_settings.get().PROJECT_NAME
     subject = f"{project_name} - New account for user {username}"
     html_content = render_email_template(
         template_name="new_account.html",
@@ -102,6 +107,23 @@ def generate_new_account_email(
     return EmailData(subject=subject, html_content=html_content)
 
 
+def generate_set_password_email(email_to: str, username: str, token: str) -> EmailData:
+    project_name = runtime_settings.get().PROJECT_NAME
+    subject = f"{project_name} - New account for user {username}"
+    link = f"{settings.FRONTEND_HOST}/reset-password?token={token}"
+    html_content = render_email_template(
+        template_name="set_password.html",
+        context={
+            "project_name": project_name,
+            "username": username,
+            "email": email_to,
+            "valid_hours": settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS,
+            "link": link,
+        },
+    )
+    return EmailData(subject=subject, html_content=html_content)
+
+
 def generate_reset_password_token(email: str) -> str:
     delta = timedelta(hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS)
     now = datetime.now(timezone.utc)
@@ -1,5 +1,17 @@
 import logging
+import uuid
 
+from sqlmodel import Session
+
+from app import crud
+from app.core.database import engine
+from app.core.runtime_settings import runtime_settings
+from app.model import User
+from app.utils import (
+    generate_reset_password_token,
+    generate_set_password_email,
+    send_email,
+)
 from app.worker.celery import celery_app
 
 logger = logging.getLogger(__name__)
@@ -32,3 +44,54 @@ def demo_dynamic_task(self, *args, **kwargs):  # noqa: ARG001
     return (
         f"Dynamic task {self.request.id} completed with args: {args}, kwargs: {kwargs}"
     )
+
+
+@celery_app.task(name="send_new_account_email", acks_late=True, ignore_result=True)
+def send_new_account_email(user_id: str) -> None:
+    """
+    Send the welcome email for a new account, with a link to set its password.
+
+    Only the user id travels through the broker, never the password.
+    """
+    with Session(engine) as session:
+        user = session.get(User, uuid.UUID(user_id))
+    if user is None:
+        logger.info(f"Welcome email skipped: user {user_id} no longer exists")
+        return
+    token = generate_reset_password_token(email=user.email)
+    email_data = generate_set_password_email(
+        email_to=user.email, username=user.username, token=token
+    )
+    send_email(
+        email_to=user.email,
+        subject=email_data.subject,
+        html_content=email_data.html_content,
+    )
+
+
+@celery_app.task(name="sync_ldap_users", acks_late=True)
+def sync_ldap_users() -> dict[str, int] | None:
+    """
+    Sync users and their attributes from the LDAP directory.
+
+    Scheduled by `init_db` every `LDAP_SYNC_INTERVAL_MINUTES` (disabled when
+    LDAP is not enabled at that time), so that logins of directory users only
+    need a bind.
+    """
+    config = runtime_settings.get()
+    if not config.LDAP_ENABLED or not config.ldap_configured:
+        logger.info("LDAP sync skipped: LDAP is not enabled")
+        return None
+
+    # Imported lazily: ldap3 is only needed when LDAP is enabled
+    from app.core.ldap import fetch_directory_users
+
+    entries = fetch_directory_users()
+    with Session(engine) as session:
+        counts = crud.sync_ldap_users(
+            session=session,
+            entries=entries,
+            link_by_email=config.LDAP_SYNC_LINK_BY_EMAIL,
+        )
+    logger.info(f"LDAP sync of {len(entries)} entries: {counts}")
+    return counts
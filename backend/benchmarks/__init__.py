@@ -0,0 +1,5 @@
+import os
+
+# Benchmarks seed throwaway in-memory databases. Keep import-time consumers of
+# the configured database (e.g. the Casbin adapter) off the real server.
+os.environ.setdefault("DATABASE_TYPE", "sqlite")
@@ -0,0 +1,96 @@
+"""
+Import-time audit.
+
+Imports a module in a fresh interpreter with `python -X importtime`, logs the
+slowest top-level imports and fails (exit code 1) when the total exceeds the
+budget or when an optional subsystem that must be loaded lazily was imported.
+
+Run from the backend directory, e.g.:
+`python -m benchmarks.importtime app.main --budget-ms 2000`
+`python -m benchmarks.importtime app.worker.tasks app.backend_pre_start`
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# Optional subsystems that must only be imported when they are used
+LAZY_MODULES = ("ldap3", "emails", "jinja2", "httpx", "minio", "PIL")
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def profile(module: str) -> list[ImportTime]:
+    """Import `module` in a fresh interpreter and parse the -X importtime log."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        env=os.environ,
+        text=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        imports.append(
+            ImportTime(
+                module=name.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+            )
+        )
+    return imports
+
+
+def audit(module: str, budget_ms: float, top: int) -> bool:
+    imports = profile(module)
+    total_ms = sum(i.self_us for i in imports) / 1000
+    logger.info(f"{module}: {total_ms:.0f} ms, {len(imports)} modules")
+    # Cost of each third-party package where it is first imported
+    packages: dict[str, int] = {}
+    for i in imports:
+        package = i.module.split(".")[0]
+        if package != module.split(".")[0]:
+            packages[package] = max(packages.get(package, 0), i.cumulative_us)
+    for package, cumulative_us in sorted(
+        packages.items(), key=lambda item: item[1], reverse=True
+    )[:top]:
+        logger.info(f"  {cumulative_us / 1000:8.1f} ms  {package}")
+
+    ok = True
+    eager = sorted({i.module for i in imports} & set(LAZY_MODULES))
+    if eager:
+        logger.error(f"{module}: imports lazy subsystems eagerly: {eager}")
+        ok = False
+    if total_ms > budget_ms:
+        logger.error(f"{module}: {total_ms:.0f} ms exceeds budget of {budget_ms} ms")
+        ok = False
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=["app.main"])
+    parser.add_argument("--budget-ms", type=float, default=2000)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    results = [audit(module, args.budget_ms, args.top) for module in args.modules]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
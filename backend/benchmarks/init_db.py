@@ -0,0 +1,63 @@
+"""
+Benchmark `init_db` seeding on a fresh and on an already seeded database.
+
+Reports wall time and the number of SQL statements and commits issued,
+including the Casbin policy writes.
+
+Run from the backend directory: `python -m benchmarks.init_db`
+"""
+
+import logging
+import time
+from unittest.mock import patch
+
+import casbin
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core import casbin as casbin_module
+from app.core.database import init_db
+from app.model import CasbinRule
+from benchmarks.utils import create_memory_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    engine = create_memory_engine()
+    counts = {"statements": 0, "commits": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*args) -> None:  # noqa: ARG001
+        counts["statements"] += 1
+
+    @event.listens_for(engine, "commit")
+    def count_commit(*args) -> None:  # noqa: ARG001
+        counts["commits"] += 1
+
+    enforcer = casbin.Enforcer(casbin_module.model_path)
+    enforcer.set_adapter(
+        casbin_module.Adapter(engine, CasbinRule, create_all_models=False)
+    )
+
+    # Keep init_db's own logging out of the results
+    logging.getLogger("app.core.database").setLevel(logging.WARNING)
+    with (
+        patch.object(casbin_module, "enforcer", enforcer),
+        patch.object(casbin_module, "_policy_loaded", False),
+    ):
+        for run in ("fresh database", "seeded database"):
+            counts.update(statements=0, commits=0)
+            start = time.perf_counter()
+            with Session(engine) as session:
+                init_db(session)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info(
+                f"{run}: {elapsed_ms:.0f} ms, {counts['statements']} statements, "
+                f"{counts['commits']} commits"
+            )
+
+
+if __name__ == "__main__":
+    main()
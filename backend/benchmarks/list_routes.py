@@ -0,0 +1,106 @@
+"""
+Benchmark the list routes that return PydanticJSONResponse.
+
+Each route is requested in interleaved pairs: once through the fast path and
+once with the route's model handed back to FastAPI's default response_model
+serialization (dump, re-validate, jsonable_encoder, json.dumps). The paired
+ratios show whether skipping that round trip is a real end-to-end gain.
+
+Run from the backend directory: `python -m benchmarks.list_routes`
+"""
+
+import json
+import logging
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.deps import get_current_user, get_db
+from app.api.routes import task
+from app.model import Task, User
+from benchmarks.utils import compare, create_memory_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROWS = 100
+
+# (route module, path, query parameters)
+ROUTES: list[tuple[ModuleType, str, dict[str, Any]]] = [
+    (task, "/tasks/", {}),
+    (task, "/tasks/", {"fields": "full"}),
+]
+
+
+def seed(session: Session) -> User:
+    owner = User(
+        email="owner@example.com",
+        username="owner",
+        full_name="Owner",
+        hashed_password="not-a-real-hash",
+        is_superuser=True,
+    )
+    session.add(owner)
+    args = json.dumps([f"argument {j}" for j in range(20)])
+    kwargs = json.dumps({"retries": 3, "queue": "default"})
+    for i in range(ROWS):
+        session.add(
+            Task(
+                name=f"Task {i}",
+                description=f"This is task {i}.",
+                celery_task_name="app.worker.tasks.demo_dynamic_task",
+                celery_task_args=args,
+                celery_task_kwargs=kwargs,
+                owner=owner,
+            )
+        )
+    session.commit()
+    return owner
+
+
+def response_model(module: ModuleType, request: Callable[[], Any]) -> Callable[[], Any]:
+    """Run request with the route's model serialized by FastAPI instead."""
+
+    def run() -> Any:
+        with patch.object(module, "PydanticJSONResponse", lambda content: content):
+            return request()
+
+    return run
+
+
+def main() -> None:
+    engine = create_memory_engine()
+    with Session(engine, expire_on_commit=False) as session:
+        owner = seed(session)
+
+    app = FastAPI()
+    for module in {module for module, _, _ in ROUTES}:
+        app.include_router(module.router)
+
+    def get_db_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_db_override
+    app.dependency_overrides[get_current_user] = lambda: owner
+    client = TestClient(app)
+
+    for module, path, params in ROUTES:
+        params = {"limit": ROWS, **params}
+
+        def fast(path: str = path, params: dict[str, Any] = params) -> Any:
+            return client.get(path, params=params)
+
+        baseline = response_model(module, fast)
+        assert fast().json() == baseline().json()
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        compare(f"GET {path}?{query} ({len(fast().content)} bytes)", baseline, fast)
+
+
+if __name__ == "__main__":
+    main()
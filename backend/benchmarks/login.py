@@ -0,0 +1,121 @@
+"""
+Benchmark login throughput under a burst of concurrent logins.
+
+Runs the same burst with bcrypt in the request threadpool (inline) and on the
+password hashing process pool, and measures the latency of a trivial
+endpoint served during the burst, which shows whether logins starve
+unrelated requests.
+
+Run from the backend directory: `python -m benchmarks.login`
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from unittest.mock import patch
+
+import httpx
+from fastapi import FastAPI
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import crud
+from app.api.deps import get_db
+from app.api.routes import login
+from app.core import security
+from app.core.config import settings
+from app.core.security import PasswordHasher
+from app.model import UserCreate
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+LOGINS = 64
+PINGS = 200
+PASSWORD = "changethis"
+
+
+async def burst(app: FastAPI) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def log_in() -> None:
+            r = await client.post(
+                f"{settings.API_V1_STR}/login/access-token",
+                data={"username": "bench@example.com", "password": PASSWORD},
+            )
+            assert r.status_code == 200, r.text
+
+        async def ping() -> float:
+            start = time.perf_counter()
+            await client.get("/ping")
+            return (time.perf_counter() - start) * 1000
+
+        async def pings() -> list[float]:
+            latencies = []
+            for _ in range(PINGS):
+                latencies.append(await ping())
+                await asyncio.sleep(0.005)
+            return latencies
+
+        start = time.perf_counter()
+        ping_task = asyncio.create_task(pings())
+        await asyncio.gather(*(log_in() for _ in range(LOGINS)))
+        elapsed = time.perf_counter() - start
+        latencies = await ping_task
+
+    latencies.sort()
+    logger.info(
+        f"  {LOGINS / elapsed:.1f} logins/s; ping p50 "
+        f"{statistics.median(latencies):.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms"
+    )
+
+
+def main() -> None:
+    # A file database: concurrent requests need their own connections
+    directory = tempfile.TemporaryDirectory()
+    engine = create_engine(
+        f"sqlite:///{directory.name}/login.db",
+        connect_args={"check_same_thread": False},
+        pool_size=LOGINS,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        with patch.object(security, "password_hasher", PasswordHasher(0, 0)):
+            crud.create_user(
+                session=session,
+                user_create=UserCreate(email="bench@example.com", password=PASSWORD),
+            )
+
+    app = FastAPI()
+    app.include_router(login.router, prefix=settings.API_V1_STR)
+
+    @app.get("/ping")
+    def ping() -> bool:
+        return True
+
+    def get_db_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_db_override
+
+    workers = os.cpu_count() or 1
+    for name, hasher in (
+        ("inline (request threadpool)", PasswordHasher(0, 0)),
+        (f"process pool ({workers} workers)", PasswordHasher(workers, LOGINS)),
+    ):
+        logger.info(name)
+        with patch.object(security, "password_hasher", hasher):
+            # Warm up the pool processes
+            hasher.run(security._hash_password, PASSWORD)
+            asyncio.run(burst(app))
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark the OIDC code exchange under a burst of concurrent logins.
+
+Serves a stub identity provider over TLS on localhost (uvicorn, in a
+thread) and runs the same burst of logins two ways: with a new HTTP client
+per login, which pays a TCP and TLS handshake each time and skips the ID
+token signature check, and with the shared `OidcClient`, which reuses pooled
+connections and verifies every ID token against the cached provider keys.
+uvicorn speaks HTTP/1.1, so the numbers show connection reuse alone; HTTP/2
+providers also multiplex the logins over fewer connections.
+
+Run from the backend directory: `python -m benchmarks.oidc`
+"""
+
+import asyncio
+import datetime
+import logging
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import jwt
+import uvicorn
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.oidc import OidcClient
+
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+LOGINS = 200
+CONCURRENCY = 20
+
+
+def write_certificate(directory: Path) -> tuple[str, str]:
+    """Self-signed certificate for localhost, as (certificate, key) paths."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        )
+    )
+    return str(cert_path), str(key_path)
+
+
+def stub_provider(issuer: str) -> FastAPI:
+    """Discovery, JWKS and token endpoints; every code yields the same ID token."""
+    signing_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(signing_key.public_key(), as_dict=True)
+    now = int(time.time())
+    id_token = jwt.encode(
+        {
+            "iss": issuer,
+            "aud": "bench",
+            "sub": "bench-subject",
+            "email": "bench@example.com",
+            "iat": now,
+            "exp": now + 3600,
+        },
+        signing_key,
+        algorithm="RS256",
+        headers={"kid": "bench"},
+    )
+
+    app = FastAPI()
+
+    @app.get("/.well-known/openid-configuration")
+    def discovery() -> dict:
+        return {"issuer": issuer, "jwks_uri": f"{issuer}/jwks"}
+
+    @app.get("/jwks")
+    def jwks() -> dict:
+        return {"keys": [{**jwk, "kid": "bench", "use": "sig"}]}
+
+    @app.post("/token")
+    def token() -> dict:
+        return {"access_token": "bench", "id_token": id_token}
+
+    return app
+
+
+def start_server(app: FastAPI, port: int, cert: str, key: str) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            host="127.0.0.1",
+            port=port,
+            ssl_certfile=cert,
+            ssl_keyfile=key,
+            log_level="warning",
+        )
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def burst(log_in) -> None:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def timed() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await log_in()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    logger.info(
+        f"  {LOGINS / elapsed:.1f} logins/s; latency p50 "
+        f"{statistics.median(latencies):.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms"
+    )
+
+
+def main() -> None:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    issuer = f"https://localhost:{port}"
+    directory = tempfile.TemporaryDirectory()
+    cert, key = write_certificate(Path(directory.name))
+    server = start_server(stub_provider(issuer), port, cert, key)
+
+    config = settings.model_copy(
+        update={
+            "OIDC_ISSUER": issuer,
+            "OIDC_TOKEN_URL": f"{issuer}/token",
+            "OIDC_CLIENT_ID": "bench",
+            "OIDC_CLIENT_SECRET": "bench",
+        }
+    )
+    redirect_uri = "https://localhost/callback"
+    form = {"grant_type": "authorization_code", "code": "bench"}
+
+    async def per_login_client() -> None:
+        async with httpx.AsyncClient(verify=cert) as client:
+            response = await client.post(config.OIDC_TOKEN_URL, data=form)
+            id_token = response.json()["id_token"]
+            jwt.decode(id_token, options={"verify_signature": False})
+
+    async def run_shared() -> None:
+        client = OidcClient(verify=cert, pool_size=CONCURRENCY)
+
+        async def shared_client() -> None:
+            claims = await client.exchange_code(config, "bench", redirect_uri)
+            assert claims["sub"] == "bench-subject"
+
+        await burst(shared_client)
+        await client.aclose()
+
+    logger.info(f"new client per login, unverified ID token ({CONCURRENCY} at once)")
+    asyncio.run(burst(per_login_client))
+    logger.info(f"shared OidcClient, verified ID token ({CONCURRENCY} at once)")
+    asyncio.run(run_shared())
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark application startup.
+
+Measures, each in a fresh interpreter:
+- `import app.main` (must not block on MinIO, Redis or the database)
+- the lifespan startup phase (concurrent service checks, bounded by
+  STARTUP_CHECK_TIMEOUT)
+- the first and second request latency
+
+Run from the backend directory: `python -m benchmarks.startup`
+"""
+
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROUNDS = 5
+
+PROBE = """
+import json, logging, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+from app.core.config import settings
+
+with TestClient(app.main.app) as client:
+    started = time.perf_counter()
+    client.get(f"{settings.API_V1_STR}/login/config")
+    first = time.perf_counter()
+    client.get(f"{settings.API_V1_STR}/login/config")
+    second = time.perf_counter()
+
+print(json.dumps({
+    "import app.main": imported - start,
+    "lifespan startup": started - imported,
+    "first request": first - started,
+    "second request": second - first,
+}))
+"""
+
+
+def probe() -> dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        check=True,
+        env=os.environ,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    results = [probe() for _ in range(ROUNDS)]
+    for name in results[0]:
+        timings = [result[name] * 1000 for result in results]
+        logger.info(
+            f"{name}: median {statistics.median(timings):.1f} ms, "
+            f"min {min(timings):.1f} ms ({ROUNDS} runs)"
+        )
+
+
+if __name__ == "__main__":
+    main()
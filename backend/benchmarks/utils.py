@@ -0,0 +1,80 @@
+import gc
+import logging
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Engine
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+# Import all models to ensure they are registered with SQLModel
+from app import model  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+# Keep TestClient request logs out of the benchmark output
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def create_memory_engine() -> Engine:
+    """In-memory SQLite engine with all tables created."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def measure(
+    name: str, func: Callable[[], Any], *, rounds: int = 20, warmup: int = 2
+) -> float:
+    """Run func repeatedly and log the mean wall time in milliseconds."""
+    for _ in range(warmup):
+        func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    mean_ms = (time.perf_counter() - start) / rounds * 1000
+    logger.info(f"{name}: {mean_ms:.2f} ms/op ({rounds} rounds)")
+    return mean_ms
+
+
+def compare(
+    name: str,
+    baseline: Callable[[], Any],
+    candidate: Callable[[], Any],
+    *,
+    rounds: int = 200,
+    warmup: int = 5,
+) -> float:
+    """
+    Time two callables in interleaved pairs and log the paired speedup.
+
+    Each round runs both back to back after a gc.collect(), so drift in the
+    machine's load hits both sides alike. Logs the median times and the
+    median and interquartile range of the per-round baseline/candidate
+    ratios, and returns the median ratio: the gain is only real when the
+    whole range is above 1.
+    """
+    for _ in range(warmup):
+        baseline()
+        candidate()
+    baseline_s, candidate_s = [], []
+    for _ in range(rounds):
+        for func, timings in ((baseline, baseline_s), (candidate, candidate_s)):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    ratios = [b / c for b, c in zip(baseline_s, candidate_s, strict=True)]
+    q1, median, q3 = statistics.quantiles(ratios, n=4)
+    logger.info(
+        f"{name}: {statistics.median(baseline_s) * 1000:.2f} -> "
+        f"{statistics.median(candidate_s) * 1000:.2f} ms/op, "
+        f"speedup {median:.2f}x (IQR {q1:.2f}-{q3:.2f}, {rounds} rounds)"
+    )
+    return median
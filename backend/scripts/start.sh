@@ -1,11 +1,19 @@
 #! /usr/bin/env bash
 set -e
 
-# Start Celery worker
-celery -A app.worker.celery worker -l info &
+# Start Celery worker (prefork pool processes cannot start a password
+# hashing pool, so they hash inline)
+PASSWORD_HASH_WORKERS=0 celery -A app.worker.celery worker -l info &
 
 # Start Celery beat
 celery -A app.worker.celery beat -l info &
 
-# Start FastAPI
-fastapi run app/main.py --workers 4
+# Start FastAPI (WEB_CONCURRENCY is also read by the app, to share the CPUs
+# between the password hashing pools of the workers)
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-4}
+# Trust X-Forwarded-For from the reverse proxies (nginx, Traefik) on the
+# container networks, so the login throttle and the rate limits see the real
+# client address instead of the proxy's. Addresses added by clients in front
+# of the first untrusted hop are ignored
+export FORWARDED_ALLOW_IPS=${FORWARDED_ALLOW_IPS:-127.0.0.1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16}
+fastapi run app/main.py --workers "$WEB_CONCURRENCY" --proxy-headers
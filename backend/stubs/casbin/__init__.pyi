@@ -0,0 +1,23 @@
+# Partial stubs: casbin ships without type information. Only the Enforcer
+# API used by the app is declared.
+from typing import Any
+
+class Enforcer:
+    def __init__(
+        self,
+        model: str | None = None,
+        adapter: Any = None,
+        enable_log: bool = False,
+        logging_config: dict[str, Any] | None = None,
+    ) -> None: ...
+    def enforce(self, *rvals: Any) -> bool: ...
+    def add_policy(self, *params: str) -> bool: ...
+    def add_policies(self, rules: list[list[str]]) -> bool: ...
+    def add_grouping_policy(self, *params: str) -> bool: ...
+    def get_policy(self) -> list[list[str]]: ...
+    def has_policy(self, *params: str) -> bool: ...
+    def load_policy(self) -> None: ...
+    def remove_policy(self, *params: str) -> bool: ...
+    def set_adapter(self, adapter: Any) -> None: ...
+
+def __getattr__(name: str) -> Any: ...
@@ -0,0 +1,28 @@
+# Partial stubs: casbin_sqlalchemy_adapter ships without type information.
+# Only the Adapter API used (and overridden) by the app is declared.
+from collections.abc import Sequence
+from contextlib import AbstractContextManager
+from typing import Any
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+class Adapter:
+    def __init__(
+        self,
+        engine: Engine | str,
+        db_class: type[Any] | None = None,
+        db_class_softdelete_attribute: Any = None,
+        filtered: bool = False,
+        create_all_models: bool = True,
+    ) -> None: ...
+    def _session_scope(self) -> AbstractContextManager[Session]: ...
+    def _save_policy_line(
+        self, ptype: str, rule: Sequence[str], session: Session | None = None
+    ) -> None: ...
+    def add_policy(self, sec: str, ptype: str, rule: Sequence[str]) -> None: ...
+    def add_policies(
+        self, sec: str, ptype: str, rules: Sequence[Sequence[str]]
+    ) -> None: ...
+
+def __getattr__(name: str) -> Any: ...
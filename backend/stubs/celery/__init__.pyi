@@ -0,0 +1,17 @@
+# Partial stubs: celery ships without type information. Only the Celery
+# app API used by the app is declared; submodules stay untyped.
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+class Celery:
+    conf: Any
+    control: Any
+    tasks: dict[str, Any]
+    def __init__(self, main: str | None = None, **kwargs: Any) -> None: ...
+    def task(self, *args: Any, **options: Any) -> Callable[[_F], _F]: ...
+    def send_task(self, name: str, *args: Any, **options: Any) -> Any: ...
+    def __getattr__(self, name: str) -> Any: ...
+
+def __getattr__(name: str) -> Any: ...
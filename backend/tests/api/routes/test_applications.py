@@ -103,3 +103,58 @@ def test_delete_application(
         headers=superuser_token_headers,
     )
     assert r.status_code == 404
+
+
+def test_rotate_application_key(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    import hashlib
+    import hmac
+    import time
+    import uuid
+    from unittest.mock import AsyncMock, MagicMock, patch
+
+    r = client.post(
+        f"{settings.API_V1_STR}/apps/",
+        headers=superuser_token_headers,
+        json={"name": "Partner App"},
+    )
+    created = r.json()
+
+    def call_openapi(app_key: str) -> int:
+        timestamp, trace_id = str(int(time.time())), uuid.uuid4().hex
+        sign = hmac.new(
+            app_key.encode(),
+            f"app_id={created['app_id']}&timestamp={timestamp}&trace_id={trace_id}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        headers = {
+            "X-App-Id": created["app_id"],
+            "X-Timestamp": timestamp,
+            "X-Trace-Id": trace_id,
+            "X-Sign": sign,
+        }
+        return client.get(
+            f"{settings.API_V1_STR}/openapi/demo", headers=headers
+        ).status_code
+
+    cache = MagicMock()
+    cache.aget = AsyncMock(return_value=None)
+    cache.async_redis.set = AsyncMock()
+    cache.async_redis.pipeline.return_value.execute = AsyncMock(return_value=[1, True])
+    with patch("app.core.nonce.cache", cache), patch(
+        "app.core.credentials.cache", cache
+    ):
+        assert call_openapi(created["app_key"]) == 200
+
+        r = client.post(
+            f"{settings.API_V1_STR}/apps/{created['id']}/rotate-key",
+            headers=superuser_token_headers,
+        )
+        assert r.status_code == 200
+        new_key = r.json()["app_key"]
+        assert new_key != created["app_key"]
+
+        # The cached key is invalidated by the rotation
+        assert call_openapi(created["app_key"]) == 401
+        assert call_openapi(new_key) == 200
@@ -1,8 +1,20 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
+
+from app import crud
+from app.api.deps import get_cache
+from app.core.cache import Cache
 from app.core.config import settings
+from app.core.oidc import OidcError, oidc_client
+from app.core.runtime_settings import runtime_settings
+from app.core.security import PasswordHashingBusyError, password_hasher
+from app.main import app
 from tests.utils import random_email, random_lower_string
 
+
 def test_get_access_token(client: TestClient) -> None:
     login_data = {
         "username": settings.FIRST_SUPERUSER,
@@ -63,3 +75,66 @@ def test_reset_password(client: TestClient, session: Session) -> None:
     )
     assert r.status_code == 200
     assert "message" in r.json()
+
+def test_login_returns_503_when_hashing_pool_is_busy(client: TestClient) -> None:
+    with patch.object(password_hasher, "run", side_effect=PasswordHashingBusyError):
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={
+                "username": settings.FIRST_SUPERUSER,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            },
+        )
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_login_is_throttled_before_verifying_password(client: TestClient) -> None:
+    mock_cache = MagicMock(spec=Cache)
+    mock_cache.redis = MagicMock()
+    mock_cache.redis.mget.return_value = [None, str(time.time() + 30)]
+    app.dependency_overrides[get_cache] = lambda: mock_cache
+
+    with patch("app.api.routes.login.crud.authenticate") as mock_authenticate:
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={"username": settings.FIRST_SUPERUSER, "password": "wrong"},
+        )
+    assert r.status_code == 429
+    assert 29 <= int(r.headers["Retry-After"]) <= 31
+    mock_authenticate.assert_not_called()
+
+
+def test_oidc_callback_links_the_verified_subject(
+    client: TestClient, session: Session
+) -> None:
+    config = settings.model_copy(
+        update={
+            "OIDC_ENABLED": True,
+            "OIDC_AUTH_URL": "https://idp.example.com/auth",
+            "OIDC_TOKEN_URL": "https://idp.example.com/token",
+            "OIDC_USERINFO_URL": "https://idp.example.com/userinfo",
+            "OIDC_CLIENT_ID": "app",
+            "OIDC_CLIENT_SECRET": "secret",
+        }
+    )
+    claims = {"sub": "subject-1", "email": settings.FIRST_SUPERUSER}
+    with (
+        patch.object(runtime_settings, "aget", AsyncMock(return_value=config)),
+        patch.object(oidc_client, "exchange_code", AsyncMock(return_value=claims)),
+    ):
+        r = client.get(
+            f"{settings.API_V1_STR}/login/oidc/callback",
+            params={"code": "code"},
+            follow_redirects=False,
+        )
+        assert r.status_code == 307
+        assert "access_token=" in r.headers["location"]
+        user = crud.get_user_by_oidc_sub(session=session, oidc_sub="subject-1")
+        assert user and user.email == settings.FIRST_SUPERUSER
+
+        oidc_client.exchange_code.side_effect = OidcError("bad signature")
+        r = client.get(
+            f"{settings.API_V1_STR}/login/oidc/callback", params={"code": "code"}
+        )
+        assert r.status_code == 400
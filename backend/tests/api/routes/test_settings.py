@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_updated_settings_apply_without_restart(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/settings/",
+        headers=superuser_token_headers,
+        json={"OIDC_NAME": "Corporate SSO", "SMTP_PORT": 2525},
+    )
+    assert r.status_code == 200
+
+    r = client.get(f"{settings.API_V1_STR}/settings/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert (r.json()["OIDC_NAME"], r.json()["SMTP_PORT"]) == ("Corporate SSO", 2525)
+
+    r = client.get(f"{settings.API_V1_STR}/login/config")
+    assert r.json()["oidc_name"] == "Corporate SSO"
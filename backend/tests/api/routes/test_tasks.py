@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.model.task import Task
+from app.model.task_execution import TaskExecution
+
+
+def create_task_with_execution(session: Session) -> Task:
+    task = Task(
+        name="Projection Task",
+        celery_task_name="demo_dynamic_task",
+        celery_task_args='["a", "b"]',
+        celery_task_kwargs='{"key": "value"}',
+    )
+    session.add(task)
+    session.commit()
+    session.refresh(task)
+
+    execution = TaskExecution(
+        task_id=task.id,
+        celery_task_id="projection_task_id",
+        celery_task_args='["a", "b"]',
+        result="done",
+        traceback="Traceback (most recent call last): ...",
+        worker="worker@test",
+    )
+    session.add(execution)
+    session.commit()
+    return task
+
+
+def test_read_tasks_full(
+    client: TestClient, superuser_token_headers: dict[str, str], session: Session
+) -> None:
+    create_task_with_execution(session)
+    r = client.get(
+        f"{settings.API_V1_STR}/tasks/",
+        headers=superuser_token_headers,
+        params={"fields": "full"},
+    )
+    assert r.status_code == 200
+    result = r.json()
+    assert result["total"] == 1
+    assert result["tasks"][0]["celery_task_args"] == '["a", "b"]'
+
+
+def test_read_tasks_summary_by_default(
+    client: TestClient, superuser_token_headers: dict[str, str], session: Session
+) -> None:
+    create_task_with_execution(session)
+    r = client.get(f"{settings.API_V1_STR}/tasks/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    task = r.json()["tasks"][0]
+    assert task["name"] == "Projection Task"
+    assert "celery_task_args" not in task
+    assert "celery_task_kwargs" not in task
+
+
+def test_read_task_executions_summary_by_default(
+    client: TestClient, superuser_token_headers: dict[str, str], session: Session
+) -> None:
+    task = create_task_with_execution(session)
+    for url in (
+        f"{settings.API_V1_STR}/tasks/executions/all",
+        f"{settings.API_V1_STR}/tasks/{task.id}/executions",
+    ):
+        r = client.get(url, headers=superuser_token_headers)
+        assert r.status_code == 200
+        result = r.json()
+        assert result["total"] == 1
+        execution = result["executions"][0]
+        assert execution["task_name"] == "Projection Task"
+        assert execution["celery_task_name"] == "demo_dynamic_task"
+        assert execution["worker"] == "worker@test"
+        for column in ("celery_task_args", "celery_task_kwargs", "result", "traceback"):
+            assert column not in execution
+
+        r = client.get(url, headers=superuser_token_headers, params={"fields": "full"})
+        assert r.status_code == 200
+        execution = r.json()["executions"][0]
+        assert execution["result"] == "done"
+        assert execution["traceback"].startswith("Traceback")
@@ -1,7 +1,16 @@
+import io
+from unittest.mock import MagicMock, patch
+
 from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.api.deps import get_cache, get_celery_app
 from app.core.config import settings
+from app.core.runtime_settings import runtime_settings
+from app.core.storage import storage
+from app.main import app
 from tests.utils import random_email, random_lower_string
-from unittest.mock import patch
+
 
 def test_read_users(
     client: TestClient, superuser_token_headers: dict[str, str]
@@ -232,3 +241,204 @@ def test_force_logout(
     )
     assert r.status_code == 200
     assert r.json()["message"] == "User forced to logout"
+
+def test_upload_avatar(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 400), "red").save(buffer, format="PNG")
+
+    with patch.object(storage.minio, "put_object") as mock_put, patch.object(
+        storage.minio, "bucket_exists", return_value=True
+    ), patch.object(
+        storage, "get_presigned_url", return_value="http://signed"
+    ) as mock_sign:
+        r = client.post(
+            f"{settings.API_V1_STR}/users/me/avatar",
+            headers=superuser_token_headers,
+            files={"file": ("avatar.png", buffer.getvalue(), "image/png")},
+        )
+        assert r.status_code == 200
+        assert r.json()["avatar"] == "http://signed"
+
+        # One square WebP per rendition
+        uploaded = {}
+        for call in mock_put.call_args_list:
+            assert call.kwargs["content_type"] == "image/webp"
+            uploaded[call.kwargs["object_name"]] = Image.open(call.kwargs["data"])
+        assert sorted(image.size for image in uploaded.values()) == [
+            (64, 64),
+            (128, 128),
+            (256, 256),
+        ]
+        # The UI is served the 128px rendition
+        signed = mock_sign.call_args.args[0]
+        assert signed.endswith("/128.webp")
+        assert signed in uploaded
+
+def test_upload_avatar_invalid_image(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/me/avatar",
+        headers=superuser_token_headers,
+        files={"file": ("avatar.png", b"not an image", "image/png")},
+    )
+    assert r.status_code == 400
+
+def test_import_users_csv(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    content = (
+        "email,password,full_name\n"
+        f"{settings.FIRST_SUPERUSER},changethis,Existing\n"
+        "bulk1@example.com,changethis,Bulk One\n"
+        "bulk2@example.com,changethis,\n"
+        "bulk1@example.com,changethis,Duplicate\n"
+        "not-an-email,changethis,Invalid\n"
+        "bulk3@example.com,short,Short Password\n"
+    )
+    celery = MagicMock()
+    config = settings.model_copy(
+        update={"SMTP_HOST": "smtp.example.com", "EMAILS_FROM_EMAIL": "info@example.com"}
+    )
+    with patch.dict(
+        app.dependency_overrides, {get_celery_app: lambda: celery}
+    ), patch.object(runtime_settings, "get", return_value=config), patch(
+        "app.api.routes.user.send_email"
+    ) as mock_send_email:
+        r = client.post(
+            f"{settings.API_V1_STR}/users/bulk",
+            headers=superuser_token_headers,
+            params={"send_welcome_email": True},
+            files={"file": ("users.csv", content, "text/csv")},
+        )
+        # Welcome emails are queued for the worker, never sent inline
+        mock_send_email.assert_not_called()
+    assert r.status_code == 200
+    report = r.json()
+    assert (report["created"], report["skipped"], report["failed"]) == (2, 2, 2)
+    statuses = [(row["row"], row["status"]) for row in report["results"]]
+    assert statuses == [
+        (1, "skipped"),
+        (2, "created"),
+        (3, "created"),
+        (4, "skipped"),
+        (5, "failed"),
+        (6, "failed"),
+    ]
+    assert report["results"][1]["username"] == "bulk1"
+    # Only the user id is queued, never the password
+    assert [call.kwargs["kwargs"] for call in celery.send_task.call_args_list] == [
+        {"user_id": report["results"][1]["id"]},
+        {"user_id": report["results"][2]["id"]},
+    ]
+    assert report["results"][4]["detail"].startswith("email:")
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/{report['results'][1]['id']}",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json()["full_name"] == "Bulk One"
+
+    # The imported password works
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "bulk2@example.com", "password": "changethis"},
+    )
+    assert r.status_code == 200
+
+
+def test_import_users_ndjson(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    content = (
+        '{"email": "nd@example.com", "password": "changethis", "username": "nd"}\n'
+        "\n"
+        '{"email": "nd2@example.com", "password": "changethis", "username": "nd"}\n'
+        "not json\n"
+    )
+    r = client.post(
+        f"{settings.API_V1_STR}/users/bulk",
+        headers=superuser_token_headers,
+        files={"file": ("users.ndjson", content, "application/x-ndjson")},
+    )
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [row["username"] for row in results[:2]] == ["nd", "nd1"]
+    assert results[2] == {
+        "row": 4,
+        "email": None,
+        "status": "failed",
+        "detail": "Invalid JSON",
+        "id": None,
+        "username": None,
+    }
+
+    r = client.post(
+        f"{settings.API_V1_STR}/users/bulk",
+        headers=superuser_token_headers,
+        files={"file": ("users.txt", content, "text/plain")},
+    )
+    assert r.status_code == 400
+
+
+def test_force_logout_revokes_issued_tokens(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    # Dict backed cache, shared by all requests of the test
+    values: dict[str, str] = {}
+    cache = MagicMock()
+    cache.get.side_effect = values.get
+    cache.redis.get.return_value = None
+    cache.redis.mget.return_value = []
+
+    def incr(key: str) -> int:
+        values[key] = str(int(values.get(key, 0)) + 1)
+        return int(values[key])
+
+    cache.redis.incr.side_effect = incr
+    app.dependency_overrides[get_cache] = lambda: cache
+
+    username = random_email()
+    password = random_lower_string()
+    with patch("app.api.routes.user.send_email"):
+        r = client.post(
+            f"{settings.API_V1_STR}/users/",
+            headers=superuser_token_headers,
+            json={"email": username, "password": password, "username": username},
+        )
+        user_id = r.json()["id"]
+
+    def login() -> dict[str, str]:
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={"username": username, "password": password},
+        )
+        assert r.status_code == 200
+        return r.json()
+
+    tokens = login()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=headers).status_code == 200
+
+    r = client.post(
+        f"{settings.API_V1_STR}/users/{user_id}/force-logout",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+
+    # Both tokens issued before the forced logout are revoked
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "User forced logout"
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        params={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 400
+
+    # The user can log in again
+    headers = {"Authorization": f"Bearer {login()['access_token']}"}
+    assert client.get(f"{settings.API_V1_STR}/users/me", headers=headers).status_code == 200
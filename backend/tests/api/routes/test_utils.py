@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_redis_pools_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/redis-pools/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    stats = r.json()
+    assert set(stats) == {"sync", "asyncio"}
+    assert set(stats["asyncio"]) == {"max_connections", "in_use", "available"}
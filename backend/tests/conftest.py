@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 import sys
 
 # Mock casbin dependencies to avoid DB connection during import
@@ -52,6 +52,7 @@ def client_fixture(session: Session):
         mock_cache = MagicMock(spec=Cache)
         mock_cache.redis = MagicMock()
         mock_cache.redis.get.return_value = None
+        mock_cache.get.return_value = None
         mock_cache.redis.incr.return_value = 1
         return mock_cache
 
@@ -69,9 +70,15 @@ def client_fixture(session: Session):
     
     # Patch engine in middleware and database module to use test engine
     with patch("app.core.middleware.engine", engine), \
+         patch("app.core.credentials.engine", engine), \
+         patch("app.core.runtime_settings.engine", engine), \
          patch("app.core.database.engine", engine), \
          patch("app.worker.handlers.engine", engine):
         yield client
+        # Forget the overrides loaded from this test's database
+        from app.core.runtime_settings import runtime_settings
+
+        runtime_settings.invalidate()
     
     app.dependency_overrides.clear()
 
@@ -89,6 +96,8 @@ def superuser_token_headers_fixture(client: TestClient) -> dict[str, str]:
 
 @pytest.fixture(autouse=True)
 def mock_redis():
-    with patch("app.api.deps.cache") as mock:
+    with patch("app.api.deps.cache") as mock, \
+         patch("app.core.runtime_settings.cache", mock):
         mock.get.return_value = None
+        mock.aget = AsyncMock(return_value=None)
         yield mock
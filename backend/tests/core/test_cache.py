@@ -0,0 +1,135 @@
+import queue
+import time
+from unittest.mock import MagicMock, patch
+
+import redis
+
+from app.core.cache import NEAR_CACHE_INVALIDATION_CHANNEL, ExpiringLRU, NearCache
+
+
+class FakeConnection:
+    """Connection answering the near cache handshake, then relaying messages."""
+
+    messages: queue.Queue = queue.Queue()
+    commands: list[tuple] = []
+    # Set to make PING fail, as on a dropped connection
+    dropped = False
+
+    def __init__(self, **_) -> None:
+        self.responses: list = []
+
+    def send_command(self, *args) -> None:
+        self.commands.append(args)
+        if args[0] == "PING" and self.dropped:
+            raise redis.ConnectionError("Connection reset by peer")
+        if args[:2] == ("CLIENT", "ID"):
+            self.responses.append(7)
+        elif args[0] == "SUBSCRIBE":
+            self.responses.append(["subscribe", args[1], 1])
+        else:
+            self.responses.append("OK")
+
+    def read_response(self):
+        return self.responses.pop(0) if self.responses else self.messages.get()
+
+    def can_read(self, timeout: float) -> bool:
+        if self.responses or not self.messages.empty():
+            return True
+        time.sleep(min(timeout, 0.01))
+        return False
+
+    def disconnect(self) -> None:
+        pass
+
+
+def wait_for(condition) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_near_cache_serves_tracked_keys_until_invalidated() -> None:
+    client = MagicMock()
+    client.get.return_value = None
+    near = NearCache(client, MagicMock(), {})
+
+    with patch("app.core.cache.redis.Connection", FakeConnection):
+        # Reads go to Redis until the invalidation listener is connected
+        assert near.get("token:generation:user:1") is None
+        wait_for(lambda: near.ready)
+        assert (
+            "CLIENT",
+            "TRACKING",
+            "ON",
+            "REDIRECT",
+            7,
+            "BCAST",
+            "PREFIX",
+            "token:generation:",
+            "PREFIX",
+            "openapi:app:",
+            "PREFIX",
+            "settings:",
+        ) in FakeConnection.commands
+
+        # Missing keys are cached too
+        assert near.get("token:generation:user:1") is None
+        client.get.reset_mock()
+        assert near.get("token:generation:user:1") is None
+        client.get.assert_not_called()
+
+        # Untracked keys always go to Redis
+        near.get("other:key")
+        client.get.assert_called_once_with("other:key")
+
+        client.get.return_value = "1"
+        FakeConnection.messages.put(
+            ["message", NEAR_CACHE_INVALIDATION_CHANNEL, ["token:generation:user:1"]]
+        )
+        wait_for(lambda: near.get("token:generation:user:1") == "1")
+        near.stop()
+    assert not near.ready
+
+
+def test_near_cache_is_dropped_when_the_tracker_disconnects() -> None:
+    client = MagicMock()
+    client.get.return_value = "1"
+    near = NearCache(client, MagicMock(), {})
+
+    with (
+        patch("app.core.cache.redis.Connection", FakeConnection),
+        patch("app.core.cache.NEAR_CACHE_PING_INTERVAL", 0.05),
+    ):
+        near.get("settings:revision")
+        wait_for(lambda: near.ready)
+        assert near.get("settings:revision") == "1"
+        wait_for(lambda: ("PING",) in FakeConnection.commands)
+
+        # Redis stops tracking: changes would no longer be notified
+        client.get.return_value = "2"
+        FakeConnection.dropped = True
+        try:
+            wait_for(lambda: not near.ready)
+            assert near.get("settings:revision") == "2"
+        finally:
+            FakeConnection.dropped = False
+            near.stop()
+
+
+def test_expiring_lru_drops_expired_then_least_recently_used() -> None:
+    lru: ExpiringLRU[str, int] = ExpiringLRU(max_size=2)
+    lru.set("a", 1, deadline=10)
+    lru.set("b", 2, deadline=20)
+    assert lru.get("a", now=5) == 1
+
+    # "b" is the least recently used entry: it makes room for "c"
+    lru.set("c", 3, deadline=30)
+    assert (lru.get("a", now=5), lru.get("b", now=5), lru.get("c", now=5)) == (
+        1,
+        None,
+        3,
+    )
+
+    assert lru.get("a", now=10) is None
+    assert len(lru) == 1
@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlmodel import Session
+
+from app.core.credentials import (
+    APP_CREDENTIALS_CACHE_TTL,
+    APP_CREDENTIALS_NEGATIVE_TTL,
+    APP_CREDENTIALS_TOMBSTONE,
+    APP_CREDENTIALS_TOMBSTONE_TTL,
+    AppCredentials,
+)
+from app.model.application import Application
+from tests.conftest import engine
+
+
+@pytest.fixture(name="cache")
+def cache_fixture():
+    with (
+        patch("app.core.credentials.cache") as cache,
+        patch("app.core.credentials.engine", engine),
+    ):
+        cache.async_redis = AsyncMock()
+        cache.aget = AsyncMock(return_value=None)
+        yield cache
+
+
+def test_app_key_is_cached_until_invalidated(session: Session, cache) -> None:
+    app = Application(name="Partner App")
+    session.add(app)
+    session.commit()
+    credentials = AppCredentials()
+
+    assert asyncio.run(credentials.get_app_key(app.app_id)) == app.app_key
+    cache.async_redis.set.assert_called_once_with(
+        f"openapi:app:{app.app_id}",
+        app.app_key,
+        ex=APP_CREDENTIALS_CACHE_TTL,
+        nx=True,
+    )
+
+    # Served from memory without touching the database
+    app.is_active = False
+    session.add(app)
+    session.commit()
+    with patch("app.core.credentials.Session") as mock_session:
+        assert asyncio.run(credentials.get_app_key(app.app_id)) == app.app_key
+    mock_session.assert_not_called()
+
+    credentials.invalidate(app.app_id)
+    cache.redis.set.assert_called_once_with(
+        f"openapi:app:{app.app_id}",
+        APP_CREDENTIALS_TOMBSTONE,
+        ex=APP_CREDENTIALS_TOMBSTONE_TTL,
+    )
+    assert asyncio.run(credentials.get_app_key(app.app_id)) is None
+
+
+def test_unknown_app_is_cached_negatively(session: Session, cache) -> None:  # noqa: ARG001
+    credentials = AppCredentials()
+    app_id = uuid.uuid4()
+
+    assert asyncio.run(credentials.get_app_key(app_id)) is None
+    cache.async_redis.set.assert_called_once_with(
+        f"openapi:app:{app_id}", "", ex=APP_CREDENTIALS_NEGATIVE_TTL, nx=True
+    )
+
+    # Other workers see the negative entry in Redis
+    cache.aget.return_value = ""
+    with patch("app.core.credentials.Session") as mock_session:
+        assert asyncio.run(AppCredentials().get_app_key(app_id)) is None
+    mock_session.assert_not_called()
+
+
+def test_lookup_racing_an_invalidation_is_not_cached(session: Session, cache) -> None:
+    app = Application(name="Rotating App")
+    session.add(app)
+    session.commit()
+    credentials = AppCredentials()
+    old_key = app.app_key
+
+    def load_then_rotate(_app_id: uuid.UUID) -> str:
+        # The key is rotated and invalidated after the lookup read it
+        app.app_key = "rotated"
+        session.add(app)
+        session.commit()
+        credentials.invalidate(app.app_id)
+        return old_key
+
+    with patch.object(credentials, "_load", side_effect=load_then_rotate):
+        assert asyncio.run(credentials.get_app_key(app.app_id)) == old_key
+    # Redis only takes the old key if the tombstone is gone (SET NX), and
+    # the process does not keep it: the next lookup sees the new key
+    assert cache.async_redis.set.call_args.kwargs["nx"] is True
+    cache.aget.return_value = APP_CREDENTIALS_TOMBSTONE
+    assert asyncio.run(credentials.get_app_key(app.app_id)) == "rotated"
@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+
+from sqlmodel import Session, func, select
+
+from app.core.database import DEV_DATA_SIZE, add_policies, init_db
+from app.model import Api, Application, Group, Item, Menu, Role, Task, User
+
+
+def test_init_db_is_idempotent(session: Session) -> None:
+    models = (Role, User, Api, Menu, Item, Application, Group, Task)
+
+    def count_rows() -> dict[type, int]:
+        return {
+            model: session.exec(select(func.count()).select_from(model)).one()
+            for model in models
+        }
+
+    init_db(session)
+    counts = count_rows()
+    init_db(session)
+    assert count_rows() == counts
+
+    assert counts[Role] == 3
+    # The superuser plus the dev users
+    assert counts[User] == DEV_DATA_SIZE + 1
+    assert counts[Group] == DEV_DATA_SIZE
+    assert counts[Api] > 0
+    # The periodic LDAP user sync, disabled as LDAP is not enabled here
+    assert counts[Task] == 1
+    assert not session.exec(select(Task.enabled)).one()
+    # Menus are linked to the parent created in the same batch
+    home = session.exec(select(Menu).where(Menu.name == "home")).one()
+    dashboard = session.exec(select(Menu).where(Menu.name == "dashboard")).one()
+    assert dashboard.parent_id == home.id
+    assert home.parent_id is None
+
+
+def test_add_policies_skips_existing_rules() -> None:
+    enforcer = MagicMock()
+    enforcer.has_policy.side_effect = lambda sub, obj, act: sub == "api:admin"
+
+    add_policies(enforcer, [["api:admin", "/*", "*"], ["api:user", "/items*", "*"]])
+    enforcer.add_policies.assert_called_once_with([["api:user", "/items*", "*"]])
+
+    enforcer.reset_mock()
+    add_policies(enforcer, [["api:admin", "/*", "*"]])
+    enforcer.add_policies.assert_not_called()
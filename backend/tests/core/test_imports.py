@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+from benchmarks.importtime import LAZY_MODULES
+
+
+def test_app_main_does_not_import_optional_subsystems() -> None:
+    # Run in a fresh interpreter: this process has imported everything already
+    code = (
+        "import sys, app.main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == ""
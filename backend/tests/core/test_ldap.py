@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+import pytest
+from ldap3 import MOCK_SYNC, Connection
+
+from app.core.config import settings
+from app.core.ldap import LdapDirectory, LdapPoolTimeoutError
+
+
+@pytest.fixture(name="directory")
+def directory_fixture():
+    config = settings.model_copy(
+        update={
+            "LDAP_HOST": "ldap.example.com",
+            "LDAP_BIND_DN": "uid=service,dc=example,dc=com",
+            "LDAP_BIND_PASSWORD": "service-password",
+            "LDAP_BASE_DN": "dc=example,dc=com",
+            "LDAP_POOL_SIZE": 1,
+            "LDAP_POOL_TIMEOUT": 0.1,
+        }
+    )
+    directory = LdapDirectory(config, client_strategy=MOCK_SYNC)
+    # Mock connections share the entries of their server
+    seed = Connection(directory.search_pool.server, client_strategy=MOCK_SYNC)
+    seed.strategy.add_entry(
+        "uid=service,dc=example,dc=com", {"userPassword": "service-password"}
+    )
+    seed.strategy.add_entry(
+        "cn=jane,dc=example,dc=com",
+        {
+            "objectClass": "person",
+            "cn": "jane",
+            "mail": "jane@example.com",
+            "displayName": "Jane Doe",
+            "userPassword": "jane-password",
+        },
+    )
+    yield directory
+    directory.close()
+
+
+def test_directory_reuses_pooled_connections(directory: LdapDirectory) -> None:
+    with patch("app.core.ldap.Connection", wraps=Connection) as connection:
+        entry = directory.find_user("jane")
+        assert entry.entry_dn == "cn=jane,dc=example,dc=com"
+        assert str(entry["mail"]) == "jane@example.com"
+        assert directory.find_user("john") is None
+
+        assert directory.verify_password(entry.entry_dn, "jane-password")
+        assert not directory.verify_password(entry.entry_dn, "wrong")
+        assert not directory.verify_password(entry.entry_dn, "")
+        assert directory.verify_password(entry.entry_dn, "jane-password")
+    # One connection per pool, bound once
+    assert connection.call_count == 2
+
+
+def test_directory_searches_anonymously_without_bind_password(
+    directory: LdapDirectory,
+) -> None:
+    config = directory.config.model_copy(update={"LDAP_BIND_PASSWORD": ""})
+    anonymous = LdapDirectory(config, client_strategy=MOCK_SYNC)
+    try:
+        with patch("app.core.ldap.Connection", wraps=Connection) as connection:
+            assert anonymous.find_user("jane") is None
+        assert connection.call_args.kwargs["user"] is None
+        assert connection.call_args.kwargs["password"] is None
+    finally:
+        anonymous.close()
+
+
+def test_pool_waits_for_a_free_connection(directory: LdapDirectory) -> None:
+    with directory.search_pool.connection():
+        with pytest.raises(LdapPoolTimeoutError):
+            with directory.search_pool.connection():
+                pass
+    # Connections that raised are closed and replaced
+    with pytest.raises(RuntimeError):
+        with directory.search_pool.connection() as conn:
+            raise RuntimeError
+    assert conn.closed
+    with directory.search_pool.connection() as other:
+        assert other is not conn
+
+
+def test_directory_lists_users_in_pages(directory: LdapDirectory) -> None:
+    seed = Connection(directory.search_pool.server, client_strategy=MOCK_SYNC)
+    for name in ("john", "joe"):
+        seed.strategy.add_entry(
+            f"cn={name},dc=example,dc=com",
+            {"objectClass": "person", "cn": name, "mail": f"{name}@example.com"},
+        )
+    entries = list(directory.iter_users(page_size=1))
+    assert sorted(entry["dn"] for entry in entries) == [
+        "cn=jane,dc=example,dc=com",
+        "cn=joe,dc=example,dc=com",
+        "cn=john,dc=example,dc=com",
+    ]
+
+
+def test_connections_returned_to_a_closed_pool_are_unbound(
+    directory: LdapDirectory,
+) -> None:
+    with directory.search_pool.connection() as conn:
+        # Replaced by a new configuration while the connection is in use
+        directory.close()
+        assert not conn.closed
+    assert conn.closed
@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.core.nonce import NONCE_WINDOW, BloomFilter, NonceStore
+
+
+class FakePipeline:
+    def __init__(self, sets: dict[str, set], expiry: dict[str, int]) -> None:
+        self.sets, self.expiry, self.commands = sets, expiry, []
+
+    def sadd(self, key: str, member: bytes) -> None:
+        self.commands.append(("sadd", key, member))
+
+    def expireat(self, key: str, when: int) -> None:
+        self.commands.append(("expireat", key, when))
+
+    async def execute(self) -> list:
+        results = []
+        for command, key, arg in self.commands:
+            if command == "sadd":
+                members = self.sets.setdefault(key, set())
+                results.append(int(arg not in members))
+                members.add(arg)
+            else:
+                self.expiry[key] = arg
+                results.append(True)
+        return results
+
+
+@pytest.fixture(name="redis")
+def redis_fixture():
+    with patch("app.core.nonce.cache") as cache:
+        redis = cache.async_redis
+        redis.sets, redis.expiry = {}, {}
+        redis.pipeline.side_effect = lambda **_: FakePipeline(redis.sets, redis.expiry)
+        yield redis
+
+
+def test_nonce_is_claimed_once(redis) -> None:
+    store = NonceStore()
+    assert asyncio.run(store.claim("app", "trace-1", 1_000_000))
+    assert not asyncio.run(store.claim("app", "trace-1", 1_000_000))
+    # Nonces are scoped to the application
+    assert asyncio.run(store.claim("other-app", "trace-1", 1_000_000))
+
+    # One set per app and minute, expiring with the last accepted timestamp
+    assert redis.expiry == {
+        "openapi:nonce:app:16666": 16667 * 60 + NONCE_WINDOW,
+        "openapi:nonce:other-app:16666": 16667 * 60 + NONCE_WINDOW,
+    }
+    assert all(len(m) == 8 for s in redis.sets.values() for m in s)
+
+
+def test_bloom_filter_rejects_local_replays_without_redis(redis) -> None:
+    store = NonceStore()
+    with patch.object(settings, "OPENAPI_NONCE_BLOOM_CAPACITY", 1000):
+        assert asyncio.run(store.claim("app", "trace-1", 1_000_000))
+        redis.pipeline.reset_mock()
+        assert not asyncio.run(store.claim("app", "trace-1", 1_000_000))
+    redis.pipeline.assert_not_called()
+
+
+def test_bloom_filter_false_positive_rate() -> None:
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"in-{i}".encode())
+    assert all(f"in-{i}".encode() in bloom for i in range(10_000))
+    false_positives = sum(f"out-{i}".encode() in bloom for i in range(10_000))
+    assert false_positives < 200
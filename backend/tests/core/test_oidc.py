@@ -0,0 +1,172 @@
+import asyncio
+import json
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.core.config import settings
+from app.core.oidc import OidcClient, OidcError
+
+ISSUER = "https://idp.example.com"
+
+
+def _config():
+    return settings.model_copy(
+        update={
+            "OIDC_ISSUER": ISSUER,
+            "OIDC_TOKEN_URL": f"{ISSUER}/token",
+            "OIDC_CLIENT_ID": "app",
+            "OIDC_CLIENT_SECRET": "secret",
+        }
+    )
+
+
+class StubProvider:
+    """Answers discovery, JWKS and token requests; counts them by path."""
+
+    def __init__(self) -> None:
+        self.keys = {
+            "k1": rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        }
+        self.kid = "k1"
+        self.audience = "app"
+        self.requests: dict[str, int] = {}
+
+    def id_token(self) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": ISSUER,
+            "aud": self.audience,
+            "sub": "subject-1",
+            "email": "oidc@example.com",
+            "iat": now,
+            "exp": now + 300,
+        }
+        return jwt.encode(
+            claims, self.keys[self.kid], algorithm="RS256", headers={"kid": self.kid}
+        )
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests[path] = self.requests.get(path, 0) + 1
+        if path == "/.well-known/openid-configuration":
+            return httpx.Response(
+                200, json={"issuer": ISSUER, "jwks_uri": f"{ISSUER}/jwks"}
+            )
+        if path == "/jwks":
+            jwks = [
+                {
+                    **json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key())),
+                    "kid": kid,
+                    "use": "sig",
+                }
+                for kid, key in self.keys.items()
+            ]
+            return httpx.Response(200, json={"keys": jwks})
+        if path == "/token":
+            return httpx.Response(200, json={"id_token": self.id_token()})
+        return httpx.Response(404)
+
+
+def test_id_tokens_are_verified_with_cached_provider_keys() -> None:
+    provider = StubProvider()
+    client = OidcClient(transport=httpx.MockTransport(provider.handle))
+    config = _config()
+
+    async def login() -> dict:
+        return await client.exchange_code(config, "code", "https://app/callback")
+
+    async def scenario() -> None:
+        claims = await asyncio.gather(*(login() for _ in range(5)))
+        assert {c["sub"] for c in claims} == {"subject-1"}
+        # Concurrent logins share one discovery and one key fetch
+        assert provider.requests == {
+            "/.well-known/openid-configuration": 1,
+            "/jwks": 1,
+            "/token": 5,
+        }
+
+        provider.audience = "another-app"
+        with pytest.raises(OidcError):
+            await login()
+        provider.audience = "app"
+        token = provider.id_token()
+        with pytest.raises(OidcError):
+            await client.verify_id_token(token[:-4] + "AAAA", config)
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_key_ids_reload_the_keys_at_most_once_a_minute() -> None:
+    provider = StubProvider()
+    client = OidcClient(transport=httpx.MockTransport(provider.handle))
+    config = _config()
+
+    async def scenario() -> None:
+        await client.verify_id_token(provider.id_token(), config)
+
+        # Rotated just after the keys were cached: not reloaded yet
+        provider.keys["k2"] = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+        provider.kid = "k2"
+        with pytest.raises(OidcError, match="unknown key"):
+            await client.verify_id_token(provider.id_token(), config)
+        assert provider.requests["/jwks"] == 1
+
+        later = time.monotonic() + 61
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("app.core.oidc.time.monotonic", lambda: later)
+            claims = await client.verify_id_token(provider.id_token(), config)
+        assert claims["sub"] == "subject-1"
+        assert provider.requests["/jwks"] == 2
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_unset_provider_urls_are_refused() -> None:
+    client = OidcClient(transport=httpx.MockTransport(StubProvider().handle))
+
+    async def scenario() -> None:
+        config = _config().model_copy(update={"OIDC_TOKEN_URL": None})
+        with pytest.raises(OidcError, match="OIDC_TOKEN_URL"):
+            await client.exchange_code(config, "code", "https://app/callback")
+        config = _config().model_copy(update={"OIDC_ISSUER": None})
+        with pytest.raises(OidcError, match="OIDC_ISSUER"):
+            await client.verify_id_token("token", config)
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_clients_of_previous_event_loops_are_closed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = OidcClient(transport=httpx.MockTransport(StubProvider().handle))
+    config = _config()
+    closed: list[httpx.AsyncClient] = []
+    aclose = httpx.AsyncClient.aclose
+
+    async def tracked_aclose(self: httpx.AsyncClient) -> None:
+        closed.append(self)
+        await aclose(self)
+
+    monkeypatch.setattr(httpx.AsyncClient, "aclose", tracked_aclose)
+
+    async def login() -> None:
+        await client.exchange_code(config, "code", "https://app/callback")
+
+    async def login_and_close() -> None:
+        await login()
+        await client.aclose()
+
+    asyncio.run(login())
+    assert closed == []
+    # The client left behind by the first loop is closed by the second one
+    asyncio.run(login_and_close())
+    assert len(closed) == 2 and closed[0] is not closed[1]
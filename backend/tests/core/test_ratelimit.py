@@ -0,0 +1,125 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.middleware import RateLimitMiddleware
+from app.core.ratelimit import Quota, RateLimiter, RateLimitResult, RateLimitRules
+
+
+def test_quota_parse() -> None:
+    assert Quota.parse("100/minute") == Quota(limit=100, period=60)
+    assert Quota.parse(" 5 / second ") == Quota(limit=5, period=1)
+    for value in ("100", "0/minute", "ten/minute", "100/week"):
+        with pytest.raises(ValueError):
+            Quota.parse(value)
+
+
+def test_rules_resolve_buckets() -> None:
+    rules = RateLimitRules(
+        {
+            "app:*": "1000/hour",
+            "role:guest": "10/minute",
+            "route:POST /api/v1/items/{id}": "2/second",
+        },
+        default="60/minute",
+    )
+    assert rules.resolve("app:a", "GET", "/api/v1/openapi/x", app_id="a") == [
+        ("app:a", Quota(1000, 3600))
+    ]
+    assert rules.resolve("ip:1.2.3.4", "GET", "/api/v1/items/", role="guest") == [
+        ("ip:1.2.3.4", Quota(10, 60))
+    ]
+    assert rules.resolve("user:u", "POST", "/api/v1/items/42", role="admin") == [
+        ("user:u", Quota(60, 60)),
+        ("user:u:POST /api/v1/items/{id}", Quota(2, 1)),
+    ]
+    assert not RateLimitRules({})
+    with pytest.raises(ValueError):
+        RateLimitRules({"tenant:x": "1/second"})
+
+
+def test_rate_limiter_leases_tokens_while_under_the_limit() -> None:
+    limiter = RateLimiter()
+    buckets = [("user:u", Quota(100, 60))]
+    calls = []
+
+    async def run(_buckets, wanted, _refund):
+        calls.append(wanted)
+        # granted, bucket index, remaining, reset ms, retry ms
+        return [wanted, 1, 90 - wanted, 6000, 0]
+
+    with patch.object(limiter, "_run", side_effect=run):
+        results = [asyncio.run(limiter.hit(buckets)) for _ in range(12)]
+    # The first round trip learns the client is far from its limit, the
+    # second leases a batch that serves the next requests locally
+    assert calls == [1, 10, 10]
+    assert [r.remaining for r in results[:4]] == [89, 89, 88, 87]
+    assert all(r.allowed and r.limit == 100 for r in results)
+
+
+def test_rate_limiter_gives_back_unspent_leased_tokens() -> None:
+    limiter = RateLimiter()
+    buckets = [("user:u", Quota(100, 86400))]
+    # Tokens left in the bucket (the quota does not replenish in this test)
+    available = 100
+
+    async def run(_buckets, wanted, refund):
+        nonlocal available
+        available += refund
+        granted = min(wanted, available)
+        available -= granted
+        # granted, bucket index, remaining, reset ms, retry ms
+        return [granted, 1, available, (100 - available) * 864_000, 0]
+
+    # One request every 2 seconds: every lease expires almost unspent
+    clock = iter(range(0, 40, 2))
+    with (
+        patch.object(limiter, "_run", side_effect=run),
+        patch("app.core.ratelimit.time") as mock_time,
+    ):
+        mock_time.monotonic.side_effect = lambda: next(clock)
+        results = [asyncio.run(limiter.hit(buckets)) for _ in range(20)]
+    assert [r.remaining for r in results] == list(range(99, 79, -1))
+    # Only the unspent tokens of the last lease are still charged
+    assert available == 100 - 20 - 9
+
+
+def test_rate_limiter_fails_open() -> None:
+    import redis
+
+    limiter = RateLimiter()
+    with patch.object(limiter, "_run", side_effect=redis.ConnectionError):
+        assert asyncio.run(limiter.hit([("user:u", Quota(1, 1))])) is None
+
+
+def test_rate_limit_middleware_sets_headers_and_rejects() -> None:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping() -> str:
+        return "pong"
+
+    app.add_middleware(
+        RateLimitMiddleware, rules=RateLimitRules({}, default="10/minute")
+    )
+    client = TestClient(app)
+
+    allowed = RateLimitResult(allowed=True, limit=10, remaining=9, reset=6)
+    with patch("app.core.middleware.rate_limiter.hit", return_value=allowed) as hit:
+        r = client.get("/ping")
+    assert r.status_code == 200
+    assert r.headers["RateLimit-Limit"] == "10"
+    assert r.headers["RateLimit-Remaining"] == "9"
+    assert r.headers["RateLimit-Reset"] == "6"
+    assert hit.call_args.args[0] == [("ip:testclient", Quota(10, 60))]
+
+    rejected = RateLimitResult(
+        allowed=False, limit=10, remaining=0, reset=60, retry_after=6
+    )
+    with patch("app.core.middleware.rate_limiter.hit", return_value=rejected):
+        r = client.get("/ping")
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "6"
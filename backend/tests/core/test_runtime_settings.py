@@ -0,0 +1,87 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.runtime_settings import RuntimeSettings, apply_overrides
+from app.model.system_setting import SystemSetting
+from tests.conftest import engine
+
+
+@pytest.fixture(name="cache")
+def cache_fixture():
+    with (
+        patch("app.core.runtime_settings.cache") as cache,
+        patch("app.core.runtime_settings.engine", engine),
+    ):
+        cache.get.return_value = "1"
+        cache.aget = AsyncMock(return_value="1")
+        yield cache
+
+
+def test_overrides_are_parsed_into_setting_types() -> None:
+    config = apply_overrides(
+        settings,
+        {
+            "SMTP_PORT": "2525",
+            "SMTP_TLS": "False",
+            "OIDC_NAME": "Corporate SSO",
+            "LDAP_PORT": "not-a-port",
+            "SECRET_KEY": "not-overridable",
+        },
+    )
+    assert (config.SMTP_PORT, config.SMTP_TLS, config.OIDC_NAME) == (
+        2525,
+        False,
+        "Corporate SSO",
+    )
+    assert config.LDAP_PORT == settings.LDAP_PORT
+    assert config.SECRET_KEY == settings.SECRET_KEY
+
+
+def test_overrides_are_reloaded_when_the_revision_changes(
+    session: Session, cache
+) -> None:
+    session.add(SystemSetting(key="OIDC_NAME", value="Corporate SSO"))
+    session.commit()
+    runtime = RuntimeSettings()
+    assert runtime.get().OIDC_NAME == "Corporate SSO"
+
+    # Served from memory while the revision is unchanged
+    session.merge(SystemSetting(key="OIDC_NAME", value="Other SSO"))
+    session.commit()
+    with (
+        patch("app.core.runtime_settings.Session") as mock_session,
+        patch("app.core.runtime_settings.RUNTIME_SETTINGS_CHECK_INTERVAL", 0),
+    ):
+        assert runtime.get().OIDC_NAME == "Corporate SSO"
+        assert asyncio.run(runtime.aget()).OIDC_NAME == "Corporate SSO"
+    mock_session.assert_not_called()
+
+    cache.get.return_value = "2"
+    with patch("app.core.runtime_settings.RUNTIME_SETTINGS_CHECK_INTERVAL", 0):
+        assert runtime.get().OIDC_NAME == "Other SSO"
+
+    runtime.invalidate()
+    cache.redis.incr.assert_called_once_with("settings:revision")
+
+
+@pytest.mark.usefixtures("cache")
+def test_concurrent_reloads_query_the_database_once() -> None:
+    runtime = RuntimeSettings()
+
+    def load() -> dict[str, str | None]:
+        time.sleep(0.2)
+        return {"OIDC_NAME": "Corporate SSO"}
+
+    with (
+        patch.object(runtime, "_load", side_effect=load) as mock_load,
+        ThreadPoolExecutor(max_workers=8) as pool,
+    ):
+        names = list(pool.map(lambda _: runtime.get().OIDC_NAME, range(8)))
+    assert names == ["Corporate SSO"] * 8
+    mock_load.assert_called_once()
@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.security import (
+    PasswordHasher,
+    PasswordHashingBusyError,
+    get_password_hash,
+    get_password_hashes,
+    verify_password,
+)
+
+
+def test_password_hasher_rejects_jobs_beyond_max_pending() -> None:
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    future = hasher.submit(time.sleep, 0.5)
+    with pytest.raises(PasswordHashingBusyError):
+        hasher.submit(time.sleep, 0)
+    assert hasher.stats()["pending"] == 1
+
+    future.result()
+    stats = hasher.stats()
+    assert (stats["pending"], stats["completed"], stats["rejected"]) == (0, 1, 1)
+    # Bulk jobs are not subject to backpressure, and do not take the slots
+    # of interactive jobs
+    bulk = [hasher.submit(time.sleep, 0.5, bounded=False) for _ in range(3)]
+    assert hasher.stats()["bulk_pending"] == 3
+    hasher.run(abs, -1)
+    for future in bulk:
+        future.result()
+    assert hasher.map(abs, [-1, -2, -3]) == [1, 2, 3]
+    stats = hasher.stats()
+    assert (stats["pending"], stats["bulk_pending"]) == (0, 0)
+    hasher.shutdown()
+
+
+def test_password_hasher_runs_inline_without_workers() -> None:
+    hasher = PasswordHasher(max_workers=0, max_pending=0)
+    assert hasher.run(abs, -1) == 1
+    assert hasher.map(abs, [-2]) == [2]
+
+
+def test_password_hasher_runs_inline_in_daemonic_processes() -> None:
+    # Celery prefork workers are daemonic and cannot start a process pool
+    hasher = PasswordHasher(max_workers=2, max_pending=1)
+    with patch.object(
+        multiprocessing, "current_process", return_value=MagicMock(daemon=True)
+    ):
+        assert hasher.run(os.getpid) == os.getpid()
+        assert hasher.map(abs, [-2]) == [2]
+    assert hasher.stats()["completed"] == 0
+
+
+def test_password_hashing_round_trip() -> None:
+    hashed = get_password_hash("changethis")
+    assert verify_password("changethis", hashed)
+    assert not verify_password("wrong", hashed)
+    assert all(
+        verify_password("a-password", h)
+        for h in get_password_hashes(["a-password"] * 2)
+    )
+
+
+def test_tokens_carry_issue_time_and_generation() -> None:
+    from datetime import timedelta
+
+    import jwt
+
+    from app.core.config import settings
+    from app.core.security import ALGORITHM, create_access_token, create_refresh_token
+
+    for create in (create_access_token, create_refresh_token):
+        token = create("user-id", expires_delta=timedelta(minutes=5), generation=3)
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        assert payload["gen"] == 3
+        assert payload["exp"] - payload["iat"] == 300
+
+
+def test_token_cache_verifies_each_token_once() -> None:
+    from datetime import timedelta
+    from unittest.mock import patch
+
+    import jwt
+
+    from app.core import security
+    from app.core.security import TokenCache, create_access_token
+
+    cache = TokenCache(max_size=2)
+    tokens = [
+        create_access_token(f"user-{i}", expires_delta=timedelta(minutes=5))
+        for i in range(3)
+    ]
+    with patch.object(security.jwt, "decode", wraps=jwt.decode) as decode:
+        assert cache.decode(tokens[0]).sub == "user-0"
+        assert cache.decode(tokens[0]).sub == "user-0"
+        assert decode.call_count == 1
+
+        # The least recently used token is evicted
+        cache.decode(tokens[1])
+        cache.decode(tokens[0])
+        cache.decode(tokens[2])
+        cache.decode(tokens[0])
+        assert decode.call_count == 3
+        cache.decode(tokens[1])
+        assert decode.call_count == 4
+
+        # Tokens are served from memory only until they expire
+        with patch.object(security.time, "time", return_value=time.time() + 600):
+            cache.decode(tokens[1])
+        assert decode.call_count == 5
+
+    with pytest.raises(jwt.InvalidTokenError):
+        cache.decode(tokens[0][:-2])
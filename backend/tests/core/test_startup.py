@@ -0,0 +1,29 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from app.core.startup import run_startup_checks
+
+
+def test_startup_checks_run_concurrently_with_timeout() -> None:
+    def fail() -> None:
+        raise ConnectionError("unreachable")
+
+    checks = {
+        "ok": lambda: None,
+        "failing": fail,
+        "slow": lambda: time.sleep(1),
+        "also slow": lambda: time.sleep(1),
+    }
+
+    async def timed_startup() -> tuple[dict[str, bool], float]:
+        start = time.perf_counter()
+        status = await run_startup_checks(timeout=0.2)
+        return status, time.perf_counter() - start
+
+    with patch.dict("app.core.startup.STARTUP_CHECKS", checks, clear=True):
+        status, elapsed = asyncio.run(timed_startup())
+
+    assert status == {"ok": True, "failing": False, "slow": False, "also slow": False}
+    # Slow checks do not hold up startup beyond the timeout
+    assert elapsed < 0.9
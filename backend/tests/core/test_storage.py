@@ -0,0 +1,113 @@
+import io
+from unittest.mock import patch
+
+import pytest
+
+from app.core.storage import UPLOAD_PART_SIZE, Storage
+from app.model.user import UserPublic
+
+
+def test_presigned_url_is_cached_per_object() -> None:
+    storage = Storage()
+    with (
+        patch("app.core.storage.cache") as mock_cache,
+        patch.object(storage.minio, "get_presigned_url") as mock_sign,
+    ):
+        mock_cache.redis.pipeline.return_value.execute.return_value = [None, -2]
+        mock_sign.side_effect = (
+            lambda method, bucket, name, expires: f"http://minio/{bucket}/{name}?sig=1"
+        )
+
+        first = storage.get_presigned_url("avatars/user/a.png")
+        second = storage.get_presigned_url("avatars/user/a.png")
+        other = storage.get_presigned_url("avatars/user/b.png")
+
+        assert first == second
+        assert first != other
+        assert mock_sign.call_count == 2
+        # Signed URLs are shared with other workers
+        assert mock_cache.redis.set.call_count == 2
+
+
+def test_presigned_url_is_reused_from_redis() -> None:
+    storage = Storage()
+    shared_url = "http://localhost:5173/s3/myapp/avatars/user/a.png?X-Amz-Signature=abc"
+    with (
+        patch("app.core.storage.cache") as mock_cache,
+        patch.object(storage.minio, "get_presigned_url") as mock_sign,
+    ):
+        mock_cache.redis.pipeline.return_value.execute.return_value = [shared_url, 600]
+
+        assert storage.get_presigned_url("avatars/user/a.png") == shared_url
+        assert storage.get_presigned_url("avatars/user/a.png") == shared_url
+        mock_sign.assert_not_called()
+        # The second call is served from process memory
+        assert mock_cache.redis.pipeline.return_value.execute.call_count == 1
+
+
+def test_user_public_presigns_avatar_rendition() -> None:
+    from app.core.storage import storage
+
+    with patch.object(
+        storage, "get_presigned_url", return_value="http://signed"
+    ) as mock_sign:
+        user = UserPublic(
+            id="00000000-0000-0000-0000-000000000001",
+            username="user",
+            avatar="avatars/user/abc/256.webp",
+        )
+        assert user.avatar == "http://signed"
+        mock_sign.assert_called_once_with("avatars/user/abc/128.webp")
+
+        # Avatars stored before renditions existed are signed as-is
+        UserPublic(
+            id="00000000-0000-0000-0000-000000000001",
+            username="user",
+            avatar="avatars/user/abc.png",
+        )
+        mock_sign.assert_called_with("avatars/user/abc.png")
+
+
+def test_save_file_streams_multipart_upload() -> None:
+    storage = Storage()
+    uploaded = []
+    with (
+        patch.object(storage.minio, "bucket_exists", return_value=True),
+        patch.object(storage.minio, "put_object") as mock_put,
+    ):
+        mock_put.side_effect = lambda **kwargs: uploaded.append(
+            kwargs["data"].read(UPLOAD_PART_SIZE)
+        )
+        object_name = storage.save_file(
+            "attachments/report.pdf",
+            io.BytesIO(b"x" * 1024),
+            content_type="application/pdf",
+            max_size=2048,
+        )
+
+    assert object_name == "attachments/report.pdf"
+    kwargs = mock_put.call_args.kwargs
+    assert kwargs["length"] == -1
+    assert kwargs["part_size"] == UPLOAD_PART_SIZE
+    assert kwargs["content_type"] == "application/pdf"
+    assert uploaded == [b"x" * 1024]
+
+
+def test_save_file_rejects_oversized_stream() -> None:
+    storage = Storage()
+    with (
+        patch.object(storage.minio, "bucket_exists", return_value=True),
+        patch.object(storage.minio, "put_object") as mock_put,
+    ):
+        mock_put.side_effect = lambda **kwargs: kwargs["data"].read(UPLOAD_PART_SIZE)
+        with pytest.raises(ValueError):
+            storage.save_file(
+                "attachments/big.bin", io.BytesIO(b"x" * 4096), max_size=2048
+            )
+        with pytest.raises(ValueError):
+            storage.save_file(
+                "attachments/big.bin",
+                io.BytesIO(b"x" * 4096),
+                length=4096,
+                max_size=2048,
+            )
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from app.core import throttle
+from app.core.config import settings
+
+
+class FakeRedis:
+    """Just enough of the Redis commands used by the login throttle."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+
+    def incr(self, key: str) -> int:
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def expire(self, key: str, seconds: int) -> None:
+        self.ttls[key] = seconds
+
+    def get(self, key: str) -> str | None:
+        return self.data.get(key)
+
+    def mget(self, keys: list[str]) -> list[str | None]:
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key: str, value: float, ex: int) -> None:
+        self.data[key] = str(value)
+        self.ttls[key] = ex
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_PER_USER", 3)
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_PER_IP", 10)
+    monkeypatch.setattr(settings, "LOGIN_LOCKOUT_SECONDS", 60)
+    monkeypatch.setattr(settings, "LOGIN_LOCKOUT_MAX_SECONDS", 200)
+
+
+def test_sliding_window_count_weights_previous_window() -> None:
+    assert throttle.sliding_window_count(10, 2, elapsed=0, window=100) == 12
+    assert throttle.sliding_window_count(10, 2, elapsed=75, window=100) == 4.5
+
+
+def test_username_is_locked_out_after_max_failures() -> None:
+    cache = FakeRedis()
+    assert throttle.record_login_failure(cache, "10.0.0.1", "John") == 0
+    assert throttle.record_login_failure(cache, "10.0.0.2", "john") == 0
+    assert throttle.get_login_retry_after(cache, "10.0.0.3", "john") == 0
+
+    assert throttle.record_login_failure(cache, "10.0.0.3", "john ") == 60
+    assert 59 <= throttle.get_login_retry_after(cache, "10.0.0.4", "JOHN") <= 61
+    # Other usernames from the same addresses are not affected
+    assert throttle.get_login_retry_after(cache, "10.0.0.1", "jane") == 0
+
+
+def test_repeated_lockouts_double_up_to_the_maximum() -> None:
+    cache = FakeRedis()
+    lockouts = [throttle.record_login_failure(cache, None, "john") for _ in range(6)]
+    assert lockouts == [0, 0, 60, 120, 200, 200]
+
+
+def test_ip_is_locked_out_across_usernames() -> None:
+    cache = FakeRedis()
+    for i in range(10):
+        throttle.record_login_failure(cache, "10.0.0.1", f"user{i}")
+    assert throttle.get_login_retry_after(cache, "10.0.0.1", "someone") > 0
+    assert throttle.get_login_retry_after(cache, "10.0.0.2", "someone") == 0
+
+
+def test_successful_login_resets_username_failures() -> None:
+    cache = FakeRedis()
+    throttle.record_login_failure(cache, None, "john")
+    throttle.record_login_failure(cache, None, "john")
+    throttle.reset_login_failures(cache, "john")
+    assert throttle.record_login_failure(cache, None, "john") == 0
+
+
+def test_expired_lockout_allows_login() -> None:
+    cache = FakeRedis()
+    cache.set(throttle._lock_key("user", "john"), time.time() - 1, ex=60)
+    assert throttle.get_login_retry_after(cache, None, "john") == 0
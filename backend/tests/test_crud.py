@@ -0,0 +1,298 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from passlib.hash import bcrypt
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app import crud
+from app.core import security
+from app.core.security import UNUSABLE_PASSWORD, PasswordHasher
+from app.model.system_setting import SystemSetting
+from app.model.user import User, UserCreate
+
+
+def create(session: Session, email: str, username: str | None = None):
+    return crud.create_user(
+        session=session,
+        user_create=UserCreate(email=email, password="changethis", username=username),
+    )
+
+
+def test_create_user_allocates_next_username_suffix(session: Session) -> None:
+    assert create(session, "john@example.com").username == "john"
+    assert create(session, "john@example.org").username == "john1"
+    assert create(session, "john@example.net").username == "john2"
+    create(session, "johnny@example.com", username="john_5")
+    create(session, "john.doe@example.com", username="john9")
+    assert create(session, "john@example.dev").username == "john10"
+
+
+def test_get_available_username_uses_one_query(session: Session) -> None:
+    for i in range(5):
+        create(session, f"jane{i}@example.com", username="jane")
+    statements = []
+
+    def count(*args) -> None:  # noqa: ARG001
+        statements.append(1)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        username = crud.get_available_username(session=session, username="jane")
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert username == "jane5"
+    assert len(statements) == 1
+
+
+def test_create_user_retries_on_username_race(session: Session) -> None:
+    create(session, "race@example.com")
+    # Simulate a concurrent signup taking "race" after it was found free
+    with patch.object(
+        crud, "get_available_username", side_effect=["race", "race1"]
+    ) as mock_allocate:
+        user = create(session, "race@example.org")
+    assert user.username == "race1"
+    assert mock_allocate.call_count == 2
+
+
+def test_create_user_duplicate_email_is_not_retried(session: Session) -> None:
+    create(session, "dup@example.com")
+    with patch.object(
+        crud, "get_available_username", wraps=crud.get_available_username
+    ) as mock_allocate:
+        with pytest.raises(IntegrityError):
+            create(session, "dup@example.com", username="someone-else")
+    assert mock_allocate.call_count == 1
+
+
+def test_authenticate_upgrades_outdated_password_hash(session: Session) -> None:
+    user = create(session, "rehash@example.com")
+    user.hashed_password = bcrypt.using(rounds=4).hash("changethis")
+    session.add(user)
+    session.commit()
+
+    with patch("app.core.security.password_hasher", PasswordHasher(0, 0)):
+        assert crud.authenticate(
+            session=session, username="rehash@example.com", password="changethis"
+        )
+    # Without a pool the hash is computed on a background thread, then
+    # stored by the writer thread, each in submission order
+    security.inline_hash_thread.submit(lambda: None).result()
+    crud.password_rehash_writer.submit(lambda: None).result()
+    session.refresh(user)
+    assert user.hashed_password.startswith("$2b$12$")
+    assert crud.authenticate(
+        session=session, username="rehash@example.com", password="changethis"
+    )
+
+
+def test_password_hash_upgrade_without_pool_runs_in_background(
+    session: Session,
+) -> None:
+    user = create(session, "inline-rehash@example.com")
+    user.hashed_password = bcrypt.using(rounds=4).hash("changethis")
+    threads = []
+
+    def hash_password(password: str) -> str:
+        threads.append(threading.current_thread().name)
+        return bcrypt.using(rounds=4).hash(password)
+
+    with (
+        patch("app.core.security.password_hasher", PasswordHasher(0, 0)),
+        patch("app.core.security._hash_password", hash_password),
+    ):
+        future = crud.upgrade_password_hash(
+            session=session, user=user, password="changethis"
+        )
+        assert future is not None
+        future.result()
+    assert len(threads) == 1
+    assert threads[0] != threading.current_thread().name
+
+
+def test_upsert_key_values_writes_changed_pairs_in_one_statement(
+    session: Session,
+) -> None:
+    session.add_all(
+        [
+            SystemSetting(key="SMTP_HOST", value="smtp.example.com"),
+            SystemSetting(key="SMTP_PORT", value="25"),
+        ]
+    )
+    session.commit()
+    statements = []
+
+    def record(_conn, _cursor, statement, *args) -> None:  # noqa: ARG001
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        changed = crud.upsert_key_values(
+            session=session,
+            model=SystemSetting,
+            values={
+                "SMTP_HOST": "smtp.example.com",
+                "SMTP_PORT": "587",
+                "SMTP_USER": "mailer",
+            },
+        )
+        session.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert changed == {"SMTP_PORT": "587", "SMTP_USER": "mailer"}
+    # One SELECT ... IN (...) and one multi-row INSERT ... ON CONFLICT
+    assert len(statements) == 2
+    assert "ON CONFLICT" in statements[1]
+    session.expire_all()
+    stored = session.exec(select(SystemSetting.key, SystemSetting.value)).all()
+    assert dict(stored) == {
+        "SMTP_HOST": "smtp.example.com",
+        "SMTP_PORT": "587",
+        "SMTP_USER": "mailer",
+    }
+
+
+def test_sync_ldap_users_upserts_and_disables(session: Session) -> None:
+    local = create(session, "jane@example.com")
+    gone = create(session, "gone@example.com")
+    gone.ldap_dn = "cn=gone,dc=example,dc=com"
+    session.add(gone)
+    session.commit()
+
+    entries = [
+        {
+            "dn": "cn=jane,dc=example,dc=com",
+            "username": "jane",
+            "email": "jane@example.com",
+            "full_name": "Jane Doe",
+        },
+        {
+            "dn": "cn=john,dc=example,dc=com",
+            "username": "jane",
+            "email": "john@example.com",
+            "full_name": "John Doe",
+        },
+        {"dn": "cn=noemail,dc=example,dc=com", "username": "x", "email": None},
+    ]
+    counts = crud.sync_ldap_users(session=session, entries=entries)
+    assert counts == {"created": 1, "updated": 0, "disabled": 1}
+
+    session.expire_all()
+    users = {u.email: u for u in session.exec(select(User)).all()}
+    # Local accounts are left alone unless linking by email is enabled
+    assert users["jane@example.com"].ldap_dn is None
+    assert users["jane@example.com"].full_name is None
+    # New users get a free username and no local password
+    assert users["john@example.com"].username == "jane1"
+    assert users["john@example.com"].ldap_dn == "cn=john,dc=example,dc=com"
+    assert users["john@example.com"].hashed_password == UNUSABLE_PASSWORD
+    assert not users["gone@example.com"].is_active
+
+    counts = crud.sync_ldap_users(session=session, entries=entries, link_by_email=True)
+    assert counts == {"created": 0, "updated": 1, "disabled": 0}
+    session.expire_all()
+    assert users["jane@example.com"].id == local.id
+    assert users["jane@example.com"].ldap_dn == "cn=jane,dc=example,dc=com"
+    assert users["jane@example.com"].full_name == "Jane Doe"
+
+    # A second run has nothing to do; an empty listing disables no one
+    assert crud.sync_ldap_users(session=session, entries=entries[:2]) == {
+        "created": 0,
+        "updated": 0,
+        "disabled": 0,
+    }
+    assert crud.sync_ldap_users(session=session, entries=[]) == {
+        "created": 0,
+        "updated": 0,
+        "disabled": 0,
+    }
+    assert users["john@example.com"].is_active
+
+    # Synced users log in with a single LDAP bind
+    with (
+        patch("app.core.runtime_settings.runtime_settings.get") as get,
+        patch("app.core.ldap.verify_user", return_value=True) as verify_user,
+    ):
+        get.return_value.LDAP_ENABLED = True
+        user = crud.authenticate(
+            session=session, username="john@example.com", password="secret"
+        )
+    assert user is not None and user.email == "john@example.com"
+    verify_user.assert_called_once_with("cn=john,dc=example,dc=com", "secret")
+
+
+def test_authenticate_links_directory_users_by_dn(session: Session) -> None:
+    local = create(session, "local@example.com")
+
+    def ldap_authenticate(username: str, _password: str) -> dict[str, str | None]:
+        name = username.split("@")[0]
+        return {
+            "dn": f"cn={name},dc=example,dc=com",
+            "username": name,
+            "email": f"{name}@example.com",
+            "full_name": name.title(),
+        }
+
+    with (
+        patch("app.core.runtime_settings.runtime_settings.get") as get,
+        patch("app.core.ldap.authenticate", side_effect=ldap_authenticate),
+    ):
+        get.return_value.LDAP_ENABLED = True
+        # Created on first login, without a local password
+        user = crud.authenticate(
+            session=session, username="new@example.com", password="secret"
+        )
+        assert user is not None
+        assert user.ldap_dn == "cn=new,dc=example,dc=com"
+        assert user.hashed_password == UNUSABLE_PASSWORD
+
+        # Existing users are linked to their entry
+        user = crud.authenticate(
+            session=session, username="local@example.com", password="secret"
+        )
+    assert user is not None and user.id == local.id
+    session.refresh(local)
+    assert local.ldap_dn == "cn=local,dc=example,dc=com"
+
+
+def test_sync_ldap_users_never_touches_superusers(session: Session) -> None:
+    admin = create(session, "root@example.com")
+    admin.is_superuser = True
+    session.add(admin)
+    session.commit()
+    entry = {
+        "dn": "cn=root,dc=example,dc=com",
+        "username": "root",
+        "email": "root@example.com",
+        "full_name": "Root",
+    }
+    counts = crud.sync_ldap_users(session=session, entries=[entry], link_by_email=True)
+    assert counts == {"created": 0, "updated": 0, "disabled": 0}
+    session.refresh(admin)
+    assert admin.ldap_dn is None
+
+    # Not disabled when its DN is no longer listed, and logs in locally
+    admin.ldap_dn = entry["dn"]
+    session.add(admin)
+    session.commit()
+    other = {**entry, "dn": "cn=other,dc=example,dc=com", "email": "o@example.com"}
+    counts = crud.sync_ldap_users(session=session, entries=[other])
+    assert counts["disabled"] == 0
+    session.refresh(admin)
+    assert admin.is_active
+    with (
+        patch("app.core.runtime_settings.runtime_settings.get") as get,
+        patch("app.core.ldap.verify_user") as verify_user,
+    ):
+        get.return_value.LDAP_ENABLED = True
+        user = crud.authenticate(
+            session=session, username="root@example.com", password="changethis"
+        )
+    assert user is not None and user.id == admin.id
+    verify_user.assert_not_called()
@@ -1550,6 +1550,17 @@ export const SettingsUpdateSchema = {
             ],
             title: 'Oidc Userinfo Url'
         },
+        OIDC_ISSUER: {
+            anyOf: [
+                {
+                    type: 'string'
+                },
+                {
+                    type: 'null'
+                }
+            ],
+            title: 'Oidc Issuer'
+        },
         OIDC_CLIENT_ID: {
             anyOf: [
                 {
@@ -251,6 +251,7 @@ export type SettingsUpdate = {
     OIDC_AUTH_URL?: (string | null);
     OIDC_TOKEN_URL?: (string | null);
     OIDC_USERINFO_URL?: (string | null);
+    OIDC_ISSUER?: (string | null);
     OIDC_CLIENT_ID?: (string | null);
     OIDC_CLIENT_SECRET?: (string | null);
     OIDC_SCOPES?: (string | null);